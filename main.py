@@ -3,6 +3,15 @@ from fastapi import FastAPI
 app = FastAPI()
 
 from routes.proposal_router import proposal_router
+from routes.metrics_router import metrics_router
+
+from services.scheduler import scheduler
 
 app.include_router(proposal_router)
+app.include_router(metrics_router)
+
 
+@app.on_event("shutdown")
+def shutdown_scheduler():
+    # termina as gerações em andamento antes de o worker sair
+    scheduler.shutdown()
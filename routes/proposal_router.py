@@ -1,58 +1,197 @@
-from fastapi import APIRouter, UploadFile, File, Form
-from services.squad_generator import SquadProposalGenerator
-from services.sustentation_generator import SustentationProposalGenerator
-from services.agent_and_sustentation_generator import AgentAndSustentationProposalGenerator
-from services.construction_generator import ConstructionProposalGenerator
-import json
+from fastapi import APIRouter, BackgroundTasks, Request, HTTPException
+from fastapi.responses import FileResponse, PlainTextResponse
+from routes.responses import RangeFileResponse, RangePackageResponse
+from routes.uploads import PROPOSAL_FORM_OPENAPI, fetch_logo, read_payload_patch, read_proposal_form
+from services.proposal_engine import ProposalGenerator, update_proposal
+from services.proposal_specs import PROPOSAL_SPECS
+from services.output_store import output_store
+from services.scheduler import QueueFull, scheduler
+from services.slide_preview import preview_renderer
+from starlette.concurrency import run_in_threadpool
+from services import profiling
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
 proposal_router = APIRouter(prefix="/proposal", tags=["proposal"])
 
-@proposal_router.post("/generate")
-async def generate_proposal(
-    payload: str = Form(...),
-    logo: UploadFile = File(...)
-    ):
+PPTX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+MEDIA_TYPES = {".pptx": PPTX_MEDIA_TYPE, ".zip": "application/zip"}
 
+
+def _generate(spec, data: dict, logo: bytes, headers, payload_size: int):
+    # roda no pool do tipo; o profiler amostra a thread que de fato gera
+    with profiling.profile_request(headers, spec.tipo, payload_size) as profile:
+        generator = ProposalGenerator(spec)
+
+        if data.get("variants"):
+            stored = generator.generate_variants(data["variants"], logo)
+        else:
+            stored = generator.generate(data, logo)
+
+    return generator.memory, stored, profile
+
+
+def _stored_response(stored) -> dict:
+    # "file" (caminho local) está obsoleto: guardada como delta, a proposta não tem
+    # um .pptx inteiro em disco e ele vem null em vez de apontar para o delta. Use "url"
+    return {
+        "file": None if stored.base else stored.path,
+        "id": stored.id,
+        "url": f"{proposal_router.prefix}/files/{stored.id}",
+    }
+
+
+def _queue_full(e: QueueFull):
+    logger.error(f"Fila cheia para {e.tipo}, recusando")
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+
+@proposal_router.post("/generate", openapi_extra=PROPOSAL_FORM_OPENAPI)
+async def generate_proposal(request: Request, background_tasks: BackgroundTasks):
+
+    # corpo lido em streaming: payload validado e logo checado antes de abrir o template
     try:
-        data = json.loads(payload)
-        tipoProposta = data.get("tipoProposta")
-        
+        form = await read_proposal_form(request)
+    except HTTPException as e:
+        logger.error(f"Requisição rejeitada ({e.status_code}): {e.detail}")
+        raise
+
+    data = form.data
+
+    try:
+        tipoProposta = data["tipoProposta"]
+
         logger.info(f"Iniciando geração de proposta: tipo={tipoProposta}")
 
-        match tipoProposta:
-            case "SQUAD":
-                generator = SquadProposalGenerator("templates/squad.pptx")
-                file_path = await generator.generate(data, logo)
-                return {"file": file_path}
-            
-            case "SUSTENTACAO":
-                generator = SustentationProposalGenerator("templates/sustentacao.pptx")
-                file_path = await generator.generate(data, logo)
-                return {"file": file_path}
-            
-            case "AI AGENT/SUSTENTACAO":
-                generator = AgentAndSustentationProposalGenerator("templates/ai-agent-e-sustentacao.pptx")
-                file_path = await generator.generate(data, logo)
-                return {"file": file_path}
-            
-            case "CONSTRUCAO":
-                generator = ConstructionProposalGenerator("templates/construcao.pptx")
-                file_path = await generator.generate(data, logo)
-                return {"file": file_path}
-            
-            case _:
-                logger.error(f"Tipo de proposta inválido: {tipoProposta}")
-                return {"error": f"Tipo de proposta inválido: {tipoProposta}"}
-    
-    except json.JSONDecodeError as e:
-        logger.error(f"Erro ao fazer parse do payload JSON: {e}")
-        return {"error": "Payload JSON inválido"}
+        spec = PROPOSAL_SPECS[tipoProposta]
+        memory, stored, profile = await scheduler.run(
+            tipoProposta, _generate, spec, data, form.logo, request.headers, form.payload_size
+        )
+
+        # depois da resposta: confere se a apresentação e o contexto foram liberados
+        background_tasks.add_task(memory.verify_released)
+
+        return {**_stored_response(stored), **profile}
+
+    except QueueFull as e:
+        raise _queue_full(e)
     except KeyError as e:
         logger.error(f"Campo obrigatório faltando: {e}")
         return {"error": f"Campo obrigatório faltando: {e}"}
     except Exception as e:
         logger.error(f"Erro ao gerar proposta: {e}", exc_info=True)
-        return {"error": f"Erro ao gerar proposta: {str(e)}"}
\ No newline at end of file
+        return {"error": f"Erro ao gerar proposta: {str(e)}"}
+
+
+@proposal_router.get("/files/{file_id}")
+# HEAD fica fora do schema: o mesmo handler geraria um operationId duplicado
+@proposal_router.head("/files/{file_id}", include_in_schema=False)
+async def download_proposal(file_id: str):
+    stored = output_store.get(file_id)
+
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Proposta não encontrada ou expirada")
+
+    media_type = MEDIA_TYPES.get(os.path.splitext(stored.filename)[1], "application/octet-stream")
+
+    if stored.base:
+        segments, size = await run_in_threadpool(output_store.segments, stored)
+        return RangePackageResponse(stored.path, stored.filename, segments, size, media_type)
+
+    return RangeFileResponse(stored.path, stored.filename, media_type)
+
+
+@proposal_router.patch("/files/{file_id}")
+async def patch_proposal(file_id: str, request: Request):
+    stored = output_store.get(file_id)
+
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Proposta não encontrada ou expirada")
+
+    saved = output_store.load_state(file_id)
+
+    if saved is None:
+        raise HTTPException(status_code=409, detail="Proposta não pode ser atualizada (gerada com variantes)")
+
+    state, images = saved
+    data = await read_payload_patch(request, state["data"])
+
+    # logoUrl novo: baixa antes de ocupar uma vaga de geração
+    if data.get("logoUrl") and data["logoUrl"] != state["data"].get("logoUrl"):
+        images = {**images, "logo": await fetch_logo(data["logoUrl"])}
+
+    try:
+        logger.info(f"Atualizando proposta {file_id}: tipo={data['tipoProposta']}")
+
+        spec = PROPOSAL_SPECS[data["tipoProposta"]]
+        updated = await scheduler.run(data["tipoProposta"], update_proposal, spec, stored, state, data, images)
+
+        return _stored_response(updated)
+
+    except QueueFull as e:
+        raise _queue_full(e)
+    except Exception as e:
+        logger.error(f"Erro ao atualizar proposta: {e}", exc_info=True)
+        return {"error": f"Erro ao atualizar proposta: {str(e)}"}
+
+
+def _render_preview(stored):
+    with output_store.materialized(stored) as path:
+        return preview_renderer.render(path)
+
+
+@proposal_router.get("/files/{file_id}/preview")
+async def preview_proposal(file_id: str):
+    stored = output_store.get(file_id)
+
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Proposta não encontrada ou expirada")
+
+    if not stored.filename.endswith(".pptx"):
+        raise HTTPException(status_code=409, detail="Prévia disponível apenas para propostas .pptx")
+
+    try:
+        keys = await run_in_threadpool(_render_preview, stored)
+    except Exception as e:
+        logger.error(f"Erro ao gerar prévia: {e}", exc_info=True)
+        return {"error": f"Erro ao gerar prévia: {str(e)}"}
+
+    return {
+        "id": stored.id,
+        "slides": [
+            {"index": i, "url": f"{proposal_router.prefix}/previews/{key}.png"}
+            for i, key in enumerate(keys, start=1)
+        ],
+    }
+
+
+@proposal_router.get("/previews/{key}.png")
+async def get_preview(key: str):
+    path = preview_renderer.get(key)
+
+    if path is None:
+        raise HTTPException(status_code=404, detail="Prévia não encontrada")
+
+    # o nome é o hash do conteúdo: a mesma URL nunca muda de imagem
+    return FileResponse(path, media_type="image/png", headers={"Cache-Control": "public, max-age=31536000, immutable"})
+
+
+@proposal_router.get("/diagnostics/profiles")
+async def list_profiles():
+    if not profiling.is_available():
+        raise HTTPException(status_code=404, detail="Profiling desabilitado")
+
+    return profiling.list_profiles()
+
+
+@proposal_router.get("/diagnostics/profiles/{name}")
+async def get_profile(name: str):
+    path = profiling.profile_path(name) if profiling.is_available() else None
+
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile não encontrado")
+
+    with open(path) as f:
+        return PlainTextResponse(f.read())
\ No newline at end of file
@@ -0,0 +1,171 @@
+from email.utils import formatdate
+from urllib.parse import quote
+from starlette.concurrency import run_in_threadpool
+from services.package_io import iter_segments
+from starlette.responses import Response
+import os
+import re
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 64 * 1024
+
+
+class RangeFileResponse(Response):
+    # serve o arquivo com suporte a Range (um intervalo por requisição); usa o
+    # envio zero-copy do servidor quando a extensão ASGI está disponível
+
+    def __init__(self, path: str, filename: str, media_type: str = "application/octet-stream"):
+        self.path = path
+        self.filename = filename
+        self.media_type = media_type
+        self.background = None
+        self.status_code = 200
+        self.raw_headers = []
+
+    def _parse_range(self, range_header: str, size: int):
+        # None: Range ignorado (inválido ou não suportado, ex.: vários intervalos)
+        # False: intervalo fora do arquivo (416)
+        match = RANGE_PATTERN.match(range_header.strip())
+        if not match or match.groups() == ("", ""):
+            return None
+
+        first, last = match.groups()
+
+        if not first:
+            # "bytes=-500": os últimos 500 bytes
+            length = min(int(last), size)
+            if length == 0:
+                return False
+            return size - length, size - 1
+
+        start = int(first)
+
+        # "bytes=5-2" é sintaticamente inválido: o Range é ignorado (RFC 7233)
+        if last and int(last) < start:
+            return None
+
+        if start >= size:
+            return False
+
+        return start, min(int(last), size - 1) if last else size - 1
+
+    async def _start(self, scope, send, size: int, etag: str, mtime: float):
+        # status e cabeçalhos; devolve (início, tamanho) do corpo a enviar, ou None
+        # quando a resposta já terminou (HEAD, 416)
+        headers = {
+            "accept-ranges": "bytes",
+            "content-type": self.media_type,
+            "content-disposition": f"attachment; filename*=utf-8''{quote(self.filename)}",
+            "etag": etag,
+            "last-modified": formatdate(mtime, usegmt=True),
+        }
+
+        request_headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope["headers"]}
+        range_header = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+
+        start, end = 0, size - 1
+        status = 200
+        byte_range = None
+
+        # If-Range diferente do ETag atual: o arquivo mudou, manda inteiro
+        if range_header and (not if_range or if_range == etag):
+            byte_range = self._parse_range(range_header, size)
+
+        if byte_range is False:
+            headers["content-range"] = f"bytes */{size}"
+            await send({
+                "type": "http.response.start",
+                "status": 416,
+                "headers": self._encode(headers, 0),
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return None
+
+        if byte_range:
+            start, end = byte_range
+            status = 206
+            headers["content-range"] = f"bytes {start}-{end}/{size}"
+
+        count = max(end - start + 1, 0)
+
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": self._encode(headers, count),
+        })
+
+        if scope.get("method") == "HEAD":
+            await send({"type": "http.response.body", "body": b""})
+            return None
+
+        return start, count
+
+    async def _send_chunks(self, send, read, count: int):
+        # read() devolve o próximo pedaço (b"" no fim); lido no threadpool
+        remaining = count
+
+        while remaining > 0:
+            chunk = await run_in_threadpool(read, min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            await send({
+                "type": "http.response.body",
+                "body": chunk,
+                "more_body": remaining > 0,
+            })
+
+        if count == 0 or remaining > 0:
+            await send({"type": "http.response.body", "body": b""})
+
+    async def __call__(self, scope, receive, send):
+        with open(self.path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            size = stat.st_size
+            etag = f'"{size:x}-{stat.st_mtime_ns:x}"'
+
+            body = await self._start(scope, send, size, etag, stat.st_mtime)
+            if body is None:
+                return
+
+            start, count = body
+
+            if "http.response.zerocopysend" in scope.get("extensions", {}):
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": f,
+                    "offset": start,
+                    "count": count,
+                })
+                return
+
+            f.seek(start)
+            await self._send_chunks(send, f.read, count)
+
+    def _encode(self, headers: dict, content_length: int):
+        headers = dict(headers, **{"content-length": str(content_length)})
+        return [(k.encode("latin-1"), v.encode("latin-1")) for k, v in headers.items()]
+
+
+class RangePackageResponse(RangeFileResponse):
+    # .pptx guardado como delta do template: montado enquanto é enviado, a partir
+    # dos segmentos de package_io.zip_segments; Range e ETag como num arquivo comum
+
+    def __init__(self, path: str, filename: str, segments: list, size: int, media_type: str = "application/octet-stream"):
+        super().__init__(path, filename, media_type)
+        self.segments = segments
+        self.size = size
+
+    async def __call__(self, scope, receive, send):
+        # o delta não muda depois de gravado: o ETag sai dele e do tamanho montado
+        stat = os.stat(self.path)
+        etag = f'"{self.size:x}-{stat.st_mtime_ns:x}"'
+
+        body = await self._start(scope, send, self.size, etag, stat.st_mtime)
+        if body is None:
+            return
+
+        start, count = body
+        chunks = iter_segments(self.segments, start, count, CHUNK_SIZE)
+        await self._send_chunks(send, lambda _: next(chunks, b""), count)
@@ -0,0 +1,207 @@
+from dataclasses import dataclass
+from fastapi import HTTPException, Request
+from pydantic import ValidationError
+from services.image_upload import ImageAccumulator, ImageTooLarge, UnsupportedImage
+from services.logo_fetcher import LogoFetchError, logo_fetcher
+from services.proposal_specs import parse_payload, patch_payload
+from starlette.concurrency import run_in_threadpool
+import settings
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+    from python_multipart.exceptions import FormParserError
+except ModuleNotFoundError:
+    from multipart.multipart import MultipartParser, parse_options_header
+    from multipart.exceptions import FormParserError
+
+# folga para os cabeçalhos e boundaries do multipart
+FORM_OVERHEAD = 16 * 1024
+
+# schema do formulário para a documentação, já que o corpo é lido na mão
+PROPOSAL_FORM_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["payload"],
+                    "properties": {
+                        "payload": {"type": "string", "description": "JSON da proposta (envie antes do logo)"},
+                        "logo": {
+                            "type": "string",
+                            "format": "binary",
+                            "description": "obrigatório quando o payload não traz logoUrl",
+                        },
+                    },
+                },
+            },
+        },
+    },
+}
+
+
+@dataclass
+class ProposalForm:
+    data: dict
+    logo: bytes
+    payload_size: int
+
+
+def _missing(field: str):
+    return HTTPException(
+        status_code=422,
+        detail=[{"type": "missing", "loc": ["body", field], "msg": "Field required"}],
+    )
+
+
+async def fetch_logo(url: str) -> bytes:
+    # logoUrl baixado no threadpool; mesmas checagens de tamanho e formato do upload
+    try:
+        return await run_in_threadpool(logo_fetcher.fetch, url)
+    except ImageTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UnsupportedImage as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except LogoFetchError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+
+class _ProposalFormReader:
+    # callbacks do parser: o payload é validado assim que a parte termina e o logo
+    # passa pelo ImageAccumulator pedaço a pedaço; qualquer erro interrompe a leitura
+
+    def __init__(self):
+        self.data = None
+        self.payload_size = 0
+        self.logo = None
+        self._field = None
+        self._payload = bytearray()
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+
+    def on_part_begin(self):
+        self._field = None
+        self._disposition = b""
+
+    def on_header_field(self, data, start, end):
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data, start, end):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._disposition)
+        self._field = options.get(b"name", b"").decode("latin-1")
+
+        if self._field == "logo":
+            self.logo = ImageAccumulator()
+
+    def on_part_data(self, data, start, end):
+        if self._field == "payload":
+            if len(self._payload) + end - start > settings.PAYLOAD_MAX_BYTES:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Payload maior que o limite de {settings.PAYLOAD_MAX_BYTES} bytes",
+                )
+            self._payload += data[start:end]
+
+        elif self._field == "logo":
+            self.logo.feed(data[start:end])
+
+    def on_part_end(self):
+        if self._field == "payload":
+            self.payload_size = len(self._payload)
+            self.data = parse_payload(self._payload)
+            self._payload = bytearray()
+
+    def callbacks(self):
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        }
+
+
+async def read_proposal_form(request: Request) -> ProposalForm:
+    content_type, params = parse_options_header(request.headers.get("content-type"))
+
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=415, detail="Esperado multipart/form-data")
+
+    # Content-Length declarado acima do possível: recusa sem ler o corpo
+    max_body = settings.PAYLOAD_MAX_BYTES + settings.LOGO_MAX_BYTES + FORM_OVERHEAD
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_body:
+        raise HTTPException(status_code=413, detail=f"Requisição maior que o limite de {max_body} bytes")
+
+    reader = _ProposalFormReader()
+    parser = MultipartParser(params[b"boundary"], reader.callbacks())
+
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+        parser.finalize()
+
+        if reader.data is None:
+            raise _missing("payload")
+
+        logo_url = reader.data.get("logoUrl")
+        if reader.logo is not None and logo_url:
+            raise HTTPException(
+                status_code=422,
+                detail=[{"type": "extra_forbidden", "loc": ["body", "logo"], "msg": "Envie o logo ou logoUrl, não os dois"}],
+            )
+        if reader.logo is None and not logo_url:
+            raise _missing("logo")
+
+        logo = reader.logo.finish() if reader.logo is not None else None
+
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=422,
+            detail=e.errors(include_url=False, include_context=False, include_input=False),
+        )
+    except ImageTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UnsupportedImage as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except FormParserError:
+        raise HTTPException(status_code=400, detail="Corpo multipart inválido")
+
+    if logo is None:
+        logo = await fetch_logo(logo_url)
+
+    return ProposalForm(reader.data, logo, reader.payload_size)
+
+
+async def read_payload_patch(request: Request, data: dict) -> dict:
+    # corpo JSON do PATCH: mesmo limite do campo payload, validado já mesclado ao payload salvo
+    body = bytearray()
+
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > settings.PAYLOAD_MAX_BYTES:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Payload maior que o limite de {settings.PAYLOAD_MAX_BYTES} bytes",
+            )
+
+    try:
+        return patch_payload(data, body)
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=422,
+            detail=e.errors(include_url=False, include_context=False, include_input=False),
+        )
@@ -0,0 +1,61 @@
+from contextlib import contextmanager
+import os
+import re
+import threading
+
+
+@contextmanager
+def replacing(path: str):
+    # grava num temporário ao lado e troca de uma vez no fim do bloco: quem lê
+    # nunca vê o arquivo pela metade; com erro, o temporário é apagado
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def write_file(path: str, data: bytes | str):
+    with replacing(path) as tmp_path:
+        with open(tmp_path, "w" if isinstance(data, str) else "wb") as f:
+            f.write(data)
+
+
+def scan(directory: str, ext: str, pattern: re.Pattern) -> list[tuple[float, int, str]]:
+    # (último acesso, tamanho, chave) de cada <chave><ext> do diretório
+    entries = []
+
+    if not os.path.isdir(directory):
+        return entries
+
+    for name in os.listdir(directory):
+        key, file_ext = os.path.splitext(name)
+        if file_ext != ext or not pattern.match(key):
+            continue
+        try:
+            stat = os.stat(os.path.join(directory, name))
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_atime, stat.st_size, key))
+
+    return entries
+
+
+def evict_lru(entries, max_bytes: int, remove, total: int = None, keep: str = None) -> int:
+    # entries: (último acesso, tamanho, chave). Remove as menos acessadas até caber
+    # no orçamento; remove(chave) apaga a entrada e pode devolver os bytes extras
+    # liberados junto com ela. Devolve o total que sobrou
+    if total is None:
+        total = sum(size for _, size, _ in entries)
+
+    for _, size, key in sorted(entries):
+        if total <= max_bytes:
+            break
+        if key == keep:
+            continue
+        total -= size + (remove(key) or 0)
+
+    return total
@@ -0,0 +1,95 @@
+from io import BytesIO
+from PIL import Image
+import settings
+
+# formatos que o python-pptx embute sem conversão
+MAGIC_NUMBERS = {
+    b"\x89PNG\r\n\x1a\n": "PNG",
+    b"\xff\xd8\xff": "JPEG",
+    b"GIF87a": "GIF",
+    b"GIF89a": "GIF",
+}
+MAGIC_LENGTH = max(len(magic) for magic in MAGIC_NUMBERS)
+
+# JPEG pode trazer EXIF/ICC antes do SOF; além disso desistimos de achar as dimensões
+HEADER_LIMIT = 256 * 1024
+
+
+class ImageTooLarge(ValueError):
+    pass
+
+
+class UnsupportedImage(ValueError):
+    pass
+
+
+class ImageAccumulator:
+    # recebe a imagem em pedaços e rejeita assim que dá: tamanho a cada pedaço,
+    # formato pelos primeiros bytes e dimensões pelo cabeçalho (sem decodificar pixels)
+
+    def __init__(
+        self,
+        max_bytes: int = settings.LOGO_MAX_BYTES,
+        max_dimension: int = settings.LOGO_MAX_DIMENSION,
+    ):
+        self.max_bytes = max_bytes
+        self.max_dimension = max_dimension
+        self.size = 0
+        self.format = None
+        self.dimensions = None
+        self._chunks = []
+        self._header = bytearray()
+
+    def feed(self, chunk: bytes):
+        self.size += len(chunk)
+
+        if self.size > self.max_bytes:
+            raise ImageTooLarge(f"Imagem maior que o limite de {self.max_bytes} bytes")
+
+        self._chunks.append(chunk)
+
+        if self.dimensions is None:
+            self._header += chunk
+            self._sniff()
+
+    def finish(self) -> bytes:
+        if self.dimensions is None:
+            self._sniff(final=True)
+
+        self._header = None
+        # com um pedaço só o join devolve o próprio objeto, sem cópia
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+    def _sniff(self, final: bool = False):
+        header = bytes(self._header)
+
+        if self.format is None:
+            if len(header) < MAGIC_LENGTH and not final:
+                return
+
+            self.format = next(
+                (fmt for magic, fmt in MAGIC_NUMBERS.items() if header.startswith(magic)),
+                None,
+            )
+
+            if self.format is None:
+                raise UnsupportedImage(
+                    f"Formato de imagem não suportado (aceitos: {', '.join(sorted(set(MAGIC_NUMBERS.values())))})"
+                )
+
+        try:
+            # Image.open só lê o cabeçalho; os pixels ficam para o python-pptx
+            with Image.open(BytesIO(header), formats=[self.format]) as im:
+                self.dimensions = im.size
+        except Exception:
+            if final or len(header) >= HEADER_LIMIT:
+                raise UnsupportedImage(f"Imagem {self.format} inválida ou truncada")
+            return
+
+        width, height = self.dimensions
+        if width > self.max_dimension or height > self.max_dimension:
+            raise ImageTooLarge(
+                f"Imagem de {width}x{height} excede o limite de {self.max_dimension}px por lado"
+            )
@@ -0,0 +1,260 @@
+from requests.adapters import HTTPAdapter
+from services import metrics
+from services.disk_cache import evict_lru, scan, write_file
+from services.image_upload import ImageAccumulator, ImageTooLarge
+from settings import (
+    LOGO_CACHE_DIR,
+    LOGO_CACHE_FRESH_SECONDS,
+    LOGO_CACHE_MAX_BYTES,
+    LOGO_FETCH_CONNECT_TIMEOUT,
+    LOGO_FETCH_POOL_SIZE,
+    LOGO_FETCH_TIMEOUT,
+    LOGO_URL_ALLOW_PRIVATE,
+)
+from urllib.parse import urljoin, urlsplit
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+import hashlib
+import ipaddress
+import json
+import logging
+import os
+import re
+import requests
+import socket
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+CACHE_KEY_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+MAX_REDIRECTS = 3
+
+
+class LogoFetchError(Exception):
+    pass
+
+
+class OriginUnavailable(LogoFetchError):
+    # falha da origem (rede, timeout, 5xx): a cópia em cache, se houver, ainda serve
+    pass
+
+
+def _allowed_address(host: str, port: int) -> str:
+    # evita que o serviço seja usado para alcançar a rede interna
+    try:
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except socket.gaierror:
+        raise LogoFetchError(f"Host de logoUrl não encontrado: {host}")
+
+    addresses = [info[4][0] for info in infos]
+    for address in addresses:
+        if not ipaddress.ip_address(address.split("%")[0]).is_global:
+            raise LogoFetchError(f"Host de logoUrl não permitido: {host}")
+
+    return addresses[0]
+
+
+class _CheckedConnection:
+    # resolve o host, confere o endereço e conecta nesse mesmo endereço: uma segunda
+    # resolução (DNS rebinding) não tem como trocar o destino depois da checagem.
+    # O TLS continua validando o certificado pelo nome do host
+    def _new_conn(self):
+        if LOGO_URL_ALLOW_PRIVATE:
+            return super()._new_conn()
+
+        dns_host = self._dns_host
+        self._dns_host = _allowed_address(dns_host, self.port)
+        try:
+            return super()._new_conn()
+        finally:
+            self._dns_host = dns_host
+
+
+class _CheckedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = type("CheckedHTTPConnection", (_CheckedConnection, HTTPConnection), {})
+
+
+class _CheckedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = type("CheckedHTTPSConnection", (_CheckedConnection, HTTPSConnection), {})
+
+
+class _CheckedAdapter(HTTPAdapter):
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CheckedHTTPConnectionPool,
+            "https": _CheckedHTTPSConnectionPool,
+        }
+
+
+class LogoFetcher:
+    # baixa o logo informado em logoUrl por um Session com pool de conexões e
+    # guarda em disco por URL. Dentro de fresh_seconds a cópia local é usada direto;
+    # depois disso é revalidada com If-None-Match/If-Modified-Since (304 = sem download)
+
+    def __init__(self, directory: str, max_bytes: int, fresh_seconds: int, pool_size: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.fresh_seconds = fresh_seconds
+        self._lock = threading.Lock()
+
+        self.session = requests.Session()
+        # sem proxy do ambiente: a conexão vai direto ao endereço conferido
+        self.session.trust_env = False
+        adapter = _CheckedAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _key_paths(self, key: str) -> tuple[str, str]:
+        return os.path.join(self.directory, f"{key}.bin"), os.path.join(self.directory, f"{key}.json")
+
+    def _paths(self, url: str) -> tuple[str, str]:
+        return self._key_paths(hashlib.sha256(url.encode()).hexdigest())
+
+    def _cached(self, url: str):
+        data_path, meta_path = self._paths(url)
+
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            with open(data_path, "rb") as f:
+                data = f.read()
+        except (FileNotFoundError, ValueError):
+            return None, None
+
+        if meta.get("url") != url or len(data) != meta.get("size"):
+            return None, None
+
+        return meta, data
+
+    def _store(self, url: str, response, data: bytes):
+        data_path, meta_path = self._paths(url)
+        os.makedirs(self.directory, exist_ok=True)
+        meta = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "size": len(data),
+            "validated": time.time(),
+        }
+
+        # dados antes do meta: um meta novo nunca aponta para dados antigos
+        write_file(data_path, data)
+        write_file(meta_path, json.dumps(meta))
+
+    def _touch(self, url: str, meta: dict):
+        data_path, meta_path = self._paths(url)
+        meta = {**meta, "validated": time.time()}
+
+        write_file(meta_path, json.dumps(meta))
+        os.utime(data_path)
+
+    def _check_url(self, url: str):
+        # o endereço é conferido na conexão (_CheckedConnection), com a porta do esquema
+        parts = urlsplit(url)
+
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise LogoFetchError(f"logoUrl inválida: {url}")
+
+    def _get(self, url: str, headers: dict, deadline: float):
+        # redirecionamentos seguidos à mão para checar a URL de cada salto
+        for _ in range(MAX_REDIRECTS + 1):
+            self._check_url(url)
+
+            timeout = (LOGO_FETCH_CONNECT_TIMEOUT, max(0.1, deadline - time.monotonic()))
+            response = self.session.get(url, headers=headers, stream=True, allow_redirects=False, timeout=timeout)
+
+            if not response.is_redirect:
+                return response
+
+            response.close()
+            url = urljoin(url, response.headers["Location"])
+
+        raise LogoFetchError("logoUrl com redirecionamentos demais")
+
+    def _download(self, response, deadline: float) -> bytes:
+        accumulator = ImageAccumulator()
+
+        # Content-Length acima do limite: recusa sem ler o corpo
+        content_length = response.headers.get("Content-Length")
+        if content_length and content_length.isdigit() and int(content_length) > accumulator.max_bytes:
+            raise ImageTooLarge(f"Imagem maior que o limite de {accumulator.max_bytes} bytes")
+
+        for chunk in response.iter_content(CHUNK_SIZE):
+            accumulator.feed(chunk)
+
+            if time.monotonic() > deadline:
+                raise OriginUnavailable(f"Tempo esgotado ao baixar logoUrl ({LOGO_FETCH_TIMEOUT}s)")
+
+        return accumulator.finish()
+
+    def fetch(self, url: str) -> bytes:
+        meta, cached = self._cached(url)
+
+        if cached is not None and time.time() - meta["validated"] < self.fresh_seconds:
+            metrics.inc("logo_fetch_total", result="hit")
+            os.utime(self._paths(url)[0])
+            return cached
+
+        headers = {}
+        if cached is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        deadline = time.monotonic() + LOGO_FETCH_TIMEOUT
+
+        try:
+            try:
+                with self._get(url, headers, deadline) as response:
+                    if response.status_code == 304 and cached is not None:
+                        metrics.inc("logo_fetch_total", result="revalidated")
+                        self._touch(url, meta)
+                        return cached
+
+                    if response.status_code >= 500:
+                        raise OriginUnavailable(f"logoUrl respondeu {response.status_code}")
+                    if response.status_code != 200:
+                        raise LogoFetchError(f"logoUrl respondeu {response.status_code}")
+
+                    data = self._download(response, deadline)
+            except requests.Timeout:
+                raise OriginUnavailable(f"Tempo esgotado ao baixar logoUrl ({LOGO_FETCH_TIMEOUT}s)")
+            except requests.RequestException as e:
+                raise OriginUnavailable(f"Falha ao baixar logoUrl: {e}")
+
+        except OriginUnavailable as e:
+            if cached is None:
+                metrics.inc("logo_fetch_total", result="error")
+                raise
+
+            # origem fora do ar: a última cópia conhecida ainda serve
+            logger.warning(f"{e}; usando o logo em cache")
+            metrics.inc("logo_fetch_total", result="stale")
+            return cached
+        except Exception:
+            metrics.inc("logo_fetch_total", result="error")
+            raise
+
+        metrics.inc("logo_fetch_total", result="miss")
+        self._store(url, response, data)
+        self.evict()
+        return data
+
+    def _remove(self, key: str):
+        for path in self._key_paths(key):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def evict(self):
+        with self._lock:
+            evict_lru(scan(self.directory, ".bin", CACHE_KEY_PATTERN), self.max_bytes, self._remove)
+
+
+logo_fetcher = LogoFetcher(LOGO_CACHE_DIR, LOGO_CACHE_MAX_BYTES, LOGO_CACHE_FRESH_SECONDS, LOGO_FETCH_POOL_SIZE)
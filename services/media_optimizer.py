@@ -0,0 +1,226 @@
+from io import BytesIO
+from PIL import Image
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import qn
+from pptx.opc.oxml import serialize_part_xml
+from settings import TEMPLATE_MEDIA_DPI
+import hashlib
+import logging
+import math
+import posixpath
+
+logger = logging.getLogger(__name__)
+
+MEDIA_PREFIX = "ppt/media/"
+EMU_PER_INCH = 914400
+
+# só formatos que o PIL regrava no mesmo formato; o resto (EMF, SVG...) só é deduplicado
+FORMATS = {".png": "PNG", ".jpeg": "JPEG", ".jpg": "JPEG"}
+
+# partes cujo XML dá para medir; imagem usada em qualquer outra não é reduzida
+SIZED_PARTS = ("ppt/slides/", "ppt/slideLayouts/", "ppt/slideMasters/")
+
+# abaixo disso a redução não compensa a perda de uma nova compressão
+MIN_DOWNSCALE = 0.9
+JPEG_QUALITY = 90
+
+
+def _rels_source(rels_name: str) -> str:
+    # ppt/slides/_rels/slide1.xml.rels -> ppt/slides/slide1.xml
+    directory, name = posixpath.split(rels_name)
+    return posixpath.join(posixpath.dirname(directory), name[:-len(".rels")])
+
+
+def _iter_rels(parts: dict[str, bytes]):
+    # (nome do .rels, rels, parte de origem, Relationship, parte alvo) das relações internas
+    for rels_name, blob in parts.items():
+        if not rels_name.endswith(".rels"):
+            continue
+
+        rels = parse_xml(blob)
+        source = _rels_source(rels_name)
+        base = posixpath.dirname(source)
+
+        for rel in rels:
+            if rel.get("TargetMode") == "External":
+                continue
+            target = posixpath.normpath(posixpath.join(base, rel.get("Target")))
+            yield rels_name, rels, source, rel, target
+
+
+def _group_scale(element) -> tuple[float, float]:
+    # grupos aninhados esticam os filhos por ext/chExt
+    sx = sy = 1.0
+
+    for group in element.iterancestors(qn("p:grpSp")):
+        xfrm = group.find(f"{qn('p:grpSpPr')}/{qn('a:xfrm')}")
+        ext = xfrm.find(qn("a:ext")) if xfrm is not None else None
+        ch_ext = xfrm.find(qn("a:chExt")) if xfrm is not None else None
+
+        if ext is not None and ch_ext is not None and int(ch_ext.get("cx")) and int(ch_ext.get("cy")):
+            sx *= int(ext.get("cx")) / int(ch_ext.get("cx"))
+            sy *= int(ext.get("cy")) / int(ch_ext.get("cy"))
+
+    return sx, sy
+
+
+def _displayed_pixels(blip, dpi: int):
+    # maior tamanho em que a imagem aparece, em pixels na resolução alvo;
+    # None quando não dá para saber (fundo, preenchimento de forma...)
+    pic = blip.getparent().getparent()
+    if pic.tag != qn("p:pic"):
+        return None
+
+    ext = pic.find(f"{qn('p:spPr')}/{qn('a:xfrm')}/{qn('a:ext')}")
+    if ext is None:
+        return None
+
+    # recorte (srcRect) em milésimos de porcento: a parte visível ocupa a caixa toda
+    crop = blip.getparent().find(qn("a:srcRect"))
+    visible_x = visible_y = 1.0
+    if crop is not None:
+        visible_x -= (int(crop.get("l", 0)) + int(crop.get("r", 0))) / 100000
+        visible_y -= (int(crop.get("t", 0)) + int(crop.get("b", 0))) / 100000
+    if visible_x <= 0 or visible_y <= 0:
+        return None
+
+    sx, sy = _group_scale(pic)
+    width = int(ext.get("cx")) * sx / visible_x / EMU_PER_INCH * dpi
+    height = int(ext.get("cy")) * sy / visible_y / EMU_PER_INCH * dpi
+
+    return math.ceil(width), math.ceil(height)
+
+
+def _display_sizes(parts: dict[str, bytes], dpi: int) -> dict[str, tuple]:
+    # imagem -> (largura, altura) máximas exibidas; None se algum uso não é medível
+    sizes = {}
+    uses = {}
+
+    for _, _, source, rel, target in _iter_rels(parts):
+        if target.startswith(MEDIA_PREFIX):
+            uses.setdefault(source, {})[rel.get("Id")] = target
+
+    for source, rIds in uses.items():
+        if not source.startswith(SIZED_PARTS):
+            for target in rIds.values():
+                sizes[target] = None
+            continue
+
+        root = parse_xml(parts[source])
+        for element in root.iter():
+            rId = element.get(qn("r:embed")) or element.get(qn("r:link"))
+            target = rIds.get(rId)
+            if target is None or (target in sizes and sizes[target] is None):
+                continue
+
+            displayed = _displayed_pixels(element, dpi) if element.tag == qn("a:blip") else None
+            if displayed is None:
+                sizes[target] = None
+            else:
+                width, height = sizes.get(target) or (0, 0)
+                sizes[target] = (max(width, displayed[0]), max(height, displayed[1]))
+
+    return sizes
+
+
+def _reencode(blob: bytes, fmt: str, displayed) -> bytes:
+    with Image.open(BytesIO(blob)) as im:
+        if im.format != fmt or getattr(im, "is_animated", False):
+            return blob
+
+        im.load()
+        params = {k: im.info[k] for k in ("icc_profile", "dpi", "transparency", "exif") if k in im.info}
+        scale = min(displayed[0] / im.width, displayed[1] / im.height, 1) if displayed else 1
+
+        if scale <= MIN_DOWNSCALE:
+            size = (max(1, math.ceil(im.width * scale)), max(1, math.ceil(im.height * scale)))
+            if im.mode == "P":
+                im = im.convert("RGBA")
+                params.pop("transparency", None)
+            im = im.resize(size, Image.LANCZOS)
+        elif fmt == "JPEG":
+            # JPEG sem redução ficaria igual ou pior ao recomprimir
+            return blob
+
+        buffer = BytesIO()
+        if fmt == "JPEG":
+            im.save(buffer, fmt, quality=JPEG_QUALITY, optimize=True, **params)
+        else:
+            # PNG: mesmos pixels, só uma compressão melhor
+            im.save(buffer, fmt, optimize=True, **params)
+
+    data = buffer.getvalue()
+    return data if len(data) < len(blob) else blob
+
+
+def _deduplicate(parts: dict[str, bytes]) -> int:
+    # imagens com o mesmo conteúdo viram uma só parte; as relações passam a apontar para ela
+    canonical = {}
+    duplicates = {}
+
+    for name in sorted(n for n in parts if n.startswith(MEDIA_PREFIX)):
+        digest = hashlib.sha1(parts[name]).digest()
+        if digest in canonical:
+            duplicates[name] = canonical[digest]
+        else:
+            canonical[digest] = name
+
+    if not duplicates:
+        return 0
+
+    changed = {}
+    for rels_name, rels, source, rel, target in _iter_rels(parts):
+        if target in duplicates:
+            rel.set("Target", posixpath.relpath(duplicates[target], posixpath.dirname(source)))
+            changed[rels_name] = rels
+
+    for rels_name, rels in changed.items():
+        parts[rels_name] = serialize_part_xml(rels)
+
+    content_types = parse_xml(parts["[Content_Types].xml"])
+    for override in list(content_types):
+        if override.get("PartName", "").lstrip("/") in duplicates:
+            content_types.remove(override)
+    parts["[Content_Types].xml"] = serialize_part_xml(content_types)
+
+    for name in duplicates:
+        del parts[name]
+
+    return len(duplicates)
+
+
+def optimize_media(parts: dict[str, bytes], dpi: int = TEMPLATE_MEDIA_DPI) -> dict[str, bytes]:
+    # roda uma vez por template: PNG recomprimido sem perda, imagens maiores que o
+    # maior tamanho exibido (em dpi) reduzidas e cópias idênticas unificadas.
+    # Todas as propostas geradas a partir do template herdam a mídia já otimizada
+    parts = dict(parts)
+    before = sum(len(blob) for name, blob in parts.items() if name.startswith(MEDIA_PREFIX))
+
+    # unifica antes de medir: a cópia que sobra é reduzida para o maior dos usos
+    removed = _deduplicate(parts)
+    sizes = _display_sizes(parts, dpi) if dpi > 0 else {}
+    reduced = 0
+
+    for name in [n for n in parts if n.startswith(MEDIA_PREFIX)]:
+        fmt = FORMATS.get(posixpath.splitext(name)[1].lower())
+        if fmt is None:
+            continue
+
+        blob = bytes(parts[name])
+        try:
+            optimized = _reencode(blob, fmt, sizes.get(name))
+        except Exception as e:
+            logger.warning(f"Imagem {name} mantida como está: {e}")
+            continue
+
+        if optimized is not blob:
+            parts[name] = optimized
+            reduced += 1
+
+    after = sum(len(blob) for name, blob in parts.items() if name.startswith(MEDIA_PREFIX))
+
+    logger.info(
+        f"Mídia do template otimizada: {before} -> {after} bytes "
+        f"({reduced} imagens regravadas, {removed} duplicadas)"
+    )
+    return parts
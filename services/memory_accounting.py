@@ -0,0 +1,160 @@
+from contextlib import contextmanager, nullcontext
+from settings import MEMORY_ACCOUNTING_ENABLED
+from services import metrics
+import gc
+import logging
+import tracemalloc
+import weakref
+
+logger = logging.getLogger(__name__)
+
+if MEMORY_ACCOUNTING_ENABLED and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+
+class MemoryReport:
+    # deltas e picos por etapa; tracemalloc é global, então requisições
+    # simultâneas aparecem somadas
+
+    def __init__(self, tipo: str):
+        self.tipo = tipo
+        self.stages = {}
+        self._tracked = []
+        self._baseline = tracemalloc.get_traced_memory()[0]
+
+    @contextmanager
+    def stage(self, name: str):
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+
+        try:
+            yield
+        finally:
+            after, peak = tracemalloc.get_traced_memory()
+            delta, stage_peak = self.stages.get(name, (0, 0))
+            self.stages[name] = (delta + after - before, max(stage_peak, peak - before))
+
+    def track(self, obj, label: str):
+        self._tracked.append((label, weakref.ref(obj)))
+
+    def publish(self):
+        for name, (delta, peak) in self.stages.items():
+            metrics.observe("proposal_stage_alloc_bytes", delta, tipo=self.tipo, stage=name)
+            metrics.observe("proposal_stage_peak_bytes", peak, tipo=self.tipo, stage=name)
+
+    def verify_released(self) -> list[str]:
+        # chamado depois da resposta: tudo que a requisição criou deve ter sumido
+        gc.collect()
+
+        leaked = [label for label, ref in self._tracked if ref() is not None]
+        for label in leaked:
+            logger.warning(f"Objeto '{label}' de {self.tipo} ainda vivo após a resposta")
+            metrics.inc("proposal_leaked_objects_total", tipo=self.tipo, object=label)
+
+        retained = tracemalloc.get_traced_memory()[0] - self._baseline
+        metrics.observe("proposal_retained_bytes", retained, tipo=self.tipo)
+        self._tracked.clear()
+        return leaked
+
+
+class _NullReport:
+
+    def stage(self, name: str):
+        return nullcontext()
+
+    def track(self, obj, label: str):
+        pass
+
+    def publish(self):
+        pass
+
+    def verify_released(self) -> list[str]:
+        return []
+
+
+NULL_REPORT = _NullReport()
+
+
+def new_report(tipo: str):
+    if not tracemalloc.is_tracing():
+        return NULL_REPORT
+
+    return MemoryReport(tipo)
+
+
+def soak(tipo: str, data: dict, logo: bytes, iterations: int, warmup: int, max_growth: int) -> bool:
+    from services.proposal_engine import ProposalGenerator
+    from services.proposal_specs import PROPOSAL_SPECS
+    from io import BytesIO
+    import copy
+
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+    spec = PROPOSAL_SPECS[tipo]
+    baseline = None
+    leaks = 0
+
+    for i in range(1, iterations + 1):
+        generator = ProposalGenerator(spec)
+        generator.render(copy.deepcopy(data), {"logo": logo}).save(BytesIO())
+
+        report = generator.memory
+        del generator
+        leaks += len(report.verify_released())
+
+        if i == warmup:
+            # caches de template e de plano já estão cheios a partir daqui
+            baseline = tracemalloc.get_traced_memory()[0]
+
+        if i % 100 == 0:
+            current = tracemalloc.get_traced_memory()[0]
+            growth = current - baseline if baseline is not None else 0
+            print(f"{i}/{iterations}: {current / 1024:.0f} KiB rastreados, crescimento {growth / 1024:.0f} KiB")
+
+    gc.collect()
+    growth = tracemalloc.get_traced_memory()[0] - (baseline or 0)
+    print(f"Crescimento após o aquecimento: {growth / 1024:.0f} KiB, objetos vazados: {leaks}")
+
+    return leaks == 0 and growth <= max_growth
+
+
+def main(argv=None):
+    from services.proposal_specs import parse_payload
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(
+        description="Soak test: gera a mesma proposta milhares de vezes e falha se a memória retida crescer."
+    )
+    parser.add_argument("payload", help="arquivo JSON com o payload (tipoProposta define o spec)")
+    parser.add_argument("logo", help="imagem usada como logo")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--max-growth-kib", type=int, default=1024)
+    args = parser.parse_args(argv)
+
+    with open(args.payload, "rb") as f:
+        data = parse_payload(f.read())
+    with open(args.logo, "rb") as f:
+        logo = f.read()
+
+    ok = soak(
+        data["tipoProposta"],
+        data,
+        logo,
+        args.iterations,
+        min(args.warmup, args.iterations),
+        args.max_growth_kib * 1024,
+    )
+
+    if not ok:
+        print("[ERRO] memória retida cresceu ou objetos não foram liberados", file=sys.stderr)
+        return 1
+
+    print("[OK] sem crescimento de memória retida")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
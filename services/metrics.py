@@ -0,0 +1,59 @@
+import threading
+
+_lock = threading.Lock()
+_counters = {}
+_summaries = {}
+
+
+def _key(name: str, labels: dict):
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name: str, value: float = 1, **labels):
+    with _lock:
+        key = _key(name, labels)
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name: str, value: float, **labels):
+    with _lock:
+        key = _key(name, labels)
+        count, total, maximum = _summaries.get(key, (0, 0, value))
+        _summaries[key] = (count + 1, total + value, max(maximum, value))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def render() -> str:
+    # formato texto do Prometheus; resumos saem como _count, _sum e _max
+    lines = []
+
+    with _lock:
+        counters = sorted(_counters.items())
+        summaries = sorted(_summaries.items())
+
+    typed = set()
+
+    for (name, labels), value in counters:
+        if name not in typed:
+            lines.append(f"# TYPE {name} counter")
+            typed.add(name)
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+
+    for (name, labels), (count, total, maximum) in summaries:
+        if name not in typed:
+            lines.append(f"# TYPE {name} summary")
+            typed.add(name)
+        lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+        lines.append(f"{name}_max{_format_labels(labels)} {maximum}")
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,362 @@
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from services.disk_cache import evict_lru, scan, write_file
+from services.package_delta import DELTA_EXT, base_key, package_segments, rebuild_package, split_package, write_base
+from settings import OUTPUT_DELTA, OUTPUT_DIR, OUTPUT_MAX_BYTES, OUTPUT_SCAN_SECONDS, OUTPUT_TTL_SECONDS
+import json
+import logging
+import hashlib
+import os
+import re
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+FILE_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+BASE_KEY_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+# base (ou blob) sem proposta nenhuma só é removida depois disso: um worker pode
+# estar gravando uma proposta que ainda vai apontar para ela
+BASE_GRACE_SECONDS = 300
+BLOB_EXT = ".bin"
+
+
+@dataclass(frozen=True)
+class StoredFile:
+    id: str
+    path: str
+    filename: str
+    size: int
+    created: float
+    # gravada como delta do template: base e ordem dos membros para remontar o .pptx
+    base: str = None
+    members: tuple = ()
+
+
+class OutputStore:
+
+    def __init__(self, directory: str, max_bytes: int, ttl_seconds: int, delta: bool = False, scan_seconds: float = 0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.delta = delta
+        # a limpeza usa um índice em memória; o diretório só é relido (para ver o
+        # que outros workers gravaram ou removeram) a cada scan_seconds
+        self.scan_seconds = scan_seconds
+        self._lock = threading.Lock()
+        self._base_keys = {}
+        self._index = {}
+        self._shared = {}
+        self._scanned = None
+
+    def _meta_path(self, file_id: str) -> str:
+        return os.path.join(self.directory, f"{file_id}.json")
+
+    def _data_path(self, file_id: str, meta: dict) -> str:
+        ext = DELTA_EXT if meta.get("base") else os.path.splitext(meta["filename"])[1]
+        return os.path.join(self.directory, f"{file_id}{ext}")
+
+    def _base_path(self, key: str) -> str:
+        return os.path.join(self.directory, ".bases", f"{key}.zip")
+
+    def _ensure_base(self, template) -> str:
+        # uma base por versão do template, compartilhada por todas as propostas dela
+        cache_key = (template.path, template.fingerprint)
+        key = self._base_keys.get(cache_key)
+        if key is None:
+            key = self._base_keys[cache_key] = base_key(template.parts)
+
+        path = self._base_path(key)
+        if os.path.exists(path):
+            # mtime marca o último uso, para a carência da remoção
+            os.utime(path)
+        else:
+            logger.info(f"Gravando a base do template {template.path} ({key[:12]})")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_base(template.parts, path)
+
+        return key
+
+    def _blob_path(self, key: str) -> str:
+        return os.path.join(self.directory, ".blobs", f"{key}{BLOB_EXT}")
+
+    def _put_blob(self, data: bytes) -> str:
+        # endereçado pelo conteúdo: o mesmo logo em várias propostas fica em disco uma vez
+        key = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(key)
+
+        if os.path.exists(path):
+            os.utime(path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_file(path, data)
+
+        return key
+
+    def _state_path(self, file_id: str) -> str:
+        return os.path.join(self.directory, f"{file_id}.state")
+
+    def write(self, writer, filename: str, state: dict = None, blobs: dict = None, template=None) -> StoredFile:
+        # writer(path) grava o arquivo; ele só aparece no store depois do rename.
+        # state (opcional, JSON) fica ao lado para a regeneração incremental, e os
+        # blobs (nome -> bytes) numa área compartilhada, referenciados pelo hash. Com
+        # o template de origem, um .pptx é guardado só como a diferença para ele
+        file_id = uuid.uuid4().hex
+        meta = {"filename": filename}
+        tmp_dir = os.path.join(self.directory, ".tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+
+        tmp_path = os.path.join(tmp_dir, f"{file_id}{os.path.splitext(filename)[1]}")
+        tmp_delta = os.path.join(tmp_dir, f"{file_id}{DELTA_EXT}")
+        tmp_meta = os.path.join(tmp_dir, f"{file_id}.json")
+        tmp_state = os.path.join(tmp_dir, f"{file_id}.state")
+
+        try:
+            writer(tmp_path)
+
+            if self.delta and template is not None and filename.endswith(".pptx"):
+                key = self._ensure_base(template)
+                members = split_package(tmp_path, self._base_path(key), tmp_delta)
+                meta.update(base=key, members=members, package_size=os.path.getsize(tmp_path))
+                os.replace(tmp_delta, tmp_path)
+
+            path = self._data_path(file_id, meta)
+            size = os.path.getsize(tmp_path)
+            created = time.time()
+            state_size = 0
+
+            if state is not None:
+                # JSON e não pickle: um diretório de saída gravável não vira execução de código
+                with open(tmp_state, "w") as f:
+                    json.dump(state, f)
+                state_size = os.path.getsize(tmp_state)
+
+            if blobs:
+                meta["blobs"] = {name: self._put_blob(data) for name, data in blobs.items()}
+
+            meta.update(size=size, state_size=state_size, created=created)
+            with open(tmp_meta, "w") as f:
+                json.dump(meta, f)
+
+            os.replace(tmp_path, path)
+            if state is not None:
+                os.replace(tmp_state, self._state_path(file_id))
+            os.replace(tmp_meta, self._meta_path(file_id))
+        except BaseException:
+            for leftover in (tmp_path, tmp_delta, tmp_meta, tmp_state):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+            raise
+
+        self._add(file_id, meta)
+        self.evict(keep=file_id)
+        return self._stored(file_id, meta)
+
+    def _stored(self, file_id: str, meta: dict) -> StoredFile:
+        return StoredFile(
+            file_id,
+            self._data_path(file_id, meta),
+            meta["filename"],
+            meta["size"],
+            meta["created"],
+            self._base_path(meta["base"]) if meta.get("base") else None,
+            tuple(meta.get("members", ())),
+        )
+
+    def get(self, file_id: str):
+        if not FILE_ID_PATTERN.match(file_id):
+            return None
+
+        try:
+            with open(self._meta_path(file_id)) as f:
+                meta = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        if time.time() - meta["created"] > self.ttl_seconds:
+            with self._lock:
+                self._remove(file_id, meta)
+                self._index.pop(file_id, None)
+            return None
+
+        stored = self._stored(file_id, meta)
+        now = time.time_ns()
+
+        try:
+            # atime marca o último acesso (LRU); o mtime fica intacto para o ETag
+            os.utime(stored.path, ns=(now, os.stat(stored.path).st_mtime_ns))
+        except FileNotFoundError:
+            return None
+
+        entry = self._index.get(file_id)
+        if entry is not None:
+            entry["atime"] = now / 1e9
+
+        if stored.base and not os.path.exists(stored.base):
+            return None
+
+        return stored
+
+    def segments(self, stored: StoredFile):
+        # o .pptx de uma proposta guardada como delta, para servir em streaming
+        return package_segments(stored.base, stored.path, stored.members)
+
+    @contextmanager
+    def materialized(self, stored: StoredFile):
+        # caminho de um arquivo completo: o próprio, ou o .pptx remontado num
+        # temporário que some ao sair do bloco
+        if stored.base is None:
+            yield stored.path
+            return
+
+        tmp_dir = os.path.join(self.directory, ".tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        path = os.path.join(tmp_dir, f"{stored.id}.{uuid.uuid4().hex[:8]}{os.path.splitext(stored.filename)[1]}")
+
+        try:
+            rebuild_package(stored.base, stored.path, stored.members, path)
+            yield path
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def load_state(self, file_id: str):
+        # (state, blobs) gravados com a proposta; só para ids já validados por get()
+        try:
+            with open(self._meta_path(file_id)) as f:
+                meta = json.load(f)
+            with open(self._state_path(file_id)) as f:
+                state = json.load(f)
+
+            blobs = {}
+            for name, key in meta.get("blobs", {}).items():
+                with open(self._blob_path(key), "rb") as f:
+                    blobs[name] = f.read()
+        except (FileNotFoundError, ValueError):
+            return None
+
+        return state, blobs
+
+    def _remove(self, file_id: str, meta: dict):
+        for path in (self._data_path(file_id, meta), self._state_path(file_id), self._meta_path(file_id)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _add(self, file_id: str, meta: dict):
+        with self._lock:
+            self._index[file_id] = _index_entry(meta, time.time())
+
+            for key in _shared_keys(meta):
+                if key not in self._shared:
+                    path = self._base_path(key) if key == meta.get("base") else self._blob_path(key)
+                    try:
+                        self._shared[key] = (os.path.getsize(path), path)
+                    except FileNotFoundError:
+                        pass
+
+    def _scan(self):
+        # relê os sidecars do diretório inteiro; chamado com o lock
+        index = {}
+
+        for name in os.listdir(self.directory):
+            file_id, ext = os.path.splitext(name)
+            if ext != ".json" or not FILE_ID_PATTERN.match(file_id):
+                continue
+
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    meta = json.load(f)
+                index[file_id] = _index_entry(meta, os.stat(self._data_path(file_id, meta)).st_atime)
+            except (FileNotFoundError, ValueError):
+                continue
+
+        shared = {
+            key: (size, self._base_path(key))
+            for _, size, key in scan(os.path.join(self.directory, ".bases"), ".zip", BASE_KEY_PATTERN)
+        }
+        shared.update(
+            (key, (size, self._blob_path(key)))
+            for _, size, key in scan(os.path.join(self.directory, ".blobs"), BLOB_EXT, BASE_KEY_PATTERN)
+        )
+
+        self._index = index
+        self._shared = shared
+        self._scanned = time.monotonic()
+
+    def evict(self, keep: str = None):
+        with self._lock:
+            if self._scanned is None or time.monotonic() - self._scanned >= self.scan_seconds:
+                self._scan()
+
+            now = time.time()
+            index = self._index
+            entries = []
+
+            for file_id, meta in list(index.items()):
+                if now - meta["created"] > self.ttl_seconds:
+                    logger.info(f"Removendo proposta expirada {file_id}")
+                    self._remove(file_id, meta)
+                    del index[file_id]
+                    continue
+
+                entries.append((meta["atime"], meta["size"] + meta.get("state_size", 0), file_id))
+
+            # bases e blobs contam uma vez no orçamento, enquanto alguma proposta usar
+            references = Counter()
+            for meta in index.values():
+                references.update(_shared_keys(meta))
+
+            def remove(file_id):
+                meta = index.pop(file_id)
+                logger.info(f"Removendo proposta {file_id} para liberar espaço")
+                self._remove(file_id, meta)
+
+                freed = 0
+                for key in _shared_keys(meta):
+                    references[key] -= 1
+                    if not references[key]:
+                        freed += self._shared.get(key, (0, None))[0]
+                return freed
+
+            total = sum(size for _, size, _ in entries)
+            total += sum(size for key, (size, _) in self._shared.items() if references[key])
+            if total > self.max_bytes:
+                evict_lru(entries, self.max_bytes, remove, total=total, keep=keep)
+
+            for key, (_, path) in list(self._shared.items()):
+                if not references[key] and self._remove_unused(path, now):
+                    del self._shared[key]
+
+    def _remove_unused(self, path: str, now: float) -> bool:
+        # True se o arquivo não existe mais
+        try:
+            if now - os.stat(path).st_mtime <= BASE_GRACE_SECONDS:
+                return False
+            logger.info(f"Removendo {path} sem uso")
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        return True
+
+
+def _index_entry(meta: dict, atime: float) -> dict:
+    # só o que a limpeza usa: a lista de membros fica no sidecar
+    entry = {key: meta[key] for key in ("filename", "size", "state_size", "created", "base", "blobs") if key in meta}
+    entry["atime"] = atime
+    return entry
+
+
+def _shared_keys(meta: dict) -> list[str]:
+    # base e blobs de uma proposta, que outras propostas podem compartilhar
+    keys = list(meta.get("blobs", {}).values())
+    if meta.get("base"):
+        keys.append(meta["base"])
+    return keys
+
+
+output_store = OutputStore(OUTPUT_DIR, OUTPUT_MAX_BYTES, OUTPUT_TTL_SECONDS, OUTPUT_DELTA, OUTPUT_SCAN_SECONDS)
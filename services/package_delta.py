@@ -0,0 +1,74 @@
+from services.disk_cache import replacing
+from services.package_io import copy_zip_entry, iter_segments, write_package_zip, zip_segments
+import hashlib
+import zipfile
+
+# a maior parte de uma proposta são partes do template que a geração não toca
+# (mestres, layouts, temas, mídia). Cada versão do template vira uma "base": um zip
+# com as partes já comprimidas, guardado uma vez. A proposta guarda só as entradas
+# que diferem da base e a ordem dos membros; o .pptx é remontado copiando as
+# entradas comprimidas dos dois zips, sem descomprimir nada
+
+DELTA_EXT = ".delta"
+
+
+def base_key(parts) -> str:
+    # endereçado pelo conteúdo: o mesmo template otimizado dá a mesma base em todos os workers
+    digest = hashlib.sha256()
+
+    for name, blob in parts.items():
+        digest.update(name.encode())
+        digest.update(b"\0")
+        digest.update(hashlib.sha256(blob).digest())
+
+    return digest.hexdigest()
+
+
+def write_base(parts, path: str):
+    with replacing(path) as tmp_path:
+        write_package_zip(parts, tmp_path)
+
+
+def split_package(package_path: str, base_path: str, delta_path: str) -> list[str]:
+    # grava em delta_path só as entradas do pacote que a base não tem igual
+    # (copiadas já comprimidas) e devolve a ordem dos membros do pacote
+    members = []
+
+    with zipfile.ZipFile(package_path, "r") as package, \
+            zipfile.ZipFile(base_path, "r") as base, \
+            zipfile.ZipFile(delta_path, "w", zipfile.ZIP_DEFLATED) as delta:
+        for info in package.infolist():
+            members.append(info.filename)
+            base_info = base.NameToInfo.get(info.filename)
+
+            # CRC e tamanho filtram; a comparação do conteúdo decide
+            if (
+                base_info is not None
+                and base_info.CRC == info.CRC
+                and base_info.file_size == info.file_size
+                and base.read(base_info) == package.read(info)
+            ):
+                continue
+
+            copy_zip_entry(delta, package, info)
+
+    return members
+
+
+def package_segments(base_path: str, delta_path: str, members: list[str]) -> tuple[list, int]:
+    # o .pptx remontado, como segmentos de zip_segments: cada membro sai do delta
+    # se estiver lá, senão da base
+    with zipfile.ZipFile(base_path, "r") as base, zipfile.ZipFile(delta_path, "r") as delta:
+        entries = [
+            (delta, delta.NameToInfo[name]) if name in delta.NameToInfo else (base, base.getinfo(name))
+            for name in members
+        ]
+        return zip_segments(entries)
+
+
+def rebuild_package(base_path: str, delta_path: str, members: list[str], target_path: str):
+    segments, _ = package_segments(base_path, delta_path, members)
+
+    with open(target_path, "wb") as f:
+        for chunk in iter_segments(segments):
+            f.write(chunk)
@@ -0,0 +1,395 @@
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from pptx.package import Package
+from pptx.slide import Slides
+from pptx.opc.package import PartFactory, XmlPart, _PackageLoader
+from pptx.opc.oxml import serialize_part_xml
+from pptx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI
+from pptx.opc.serialized import PackageReader, PackageWriter, _ContentTypesItem
+from pptx.opc.constants import CONTENT_TYPE as CT
+from pptx.oxml import parse_xml
+from pptx.util import lazyproperty
+from settings import SAVE_WORKERS
+from io import BytesIO
+import struct
+import time
+import zipfile
+import zlib
+
+# assinatura + campos fixos do cabeçalho local de uma entrada do zip
+LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+
+# serializa e comprime as partes em paralelo no save (lxml e zlib soltam o GIL)
+_save_executor = ThreadPoolExecutor(max_workers=SAVE_WORKERS, thread_name_prefix="save") if SAVE_WORKERS > 1 else None
+
+
+def read_package_parts(pkg_file) -> dict[str, bytes]:
+    with zipfile.ZipFile(pkg_file, "r") as z:
+        return {name: z.read(name) for name in z.namelist()}
+
+
+def write_package_parts(package) -> dict[str, bytes]:
+    # o inverso de open_presentation_from_parts: serializa cada parte sem montar o zip;
+    # partes binárias (imagens) mantêm o mesmo blob, sem cópia
+    parts = {}
+    _PartsWriter.write(parts, package._rels, tuple(package.iter_parts()))
+    return parts
+
+
+def _raw_offset(source: zipfile.ZipFile, info: zipfile.ZipInfo) -> int:
+    # onde começam os dados comprimidos da entrada, logo depois do cabeçalho local
+    source.fp.seek(info.header_offset)
+    header = LOCAL_HEADER.unpack(source.fp.read(LOCAL_HEADER.size))
+    name_length, extra_length = header[-2], header[-1]
+    return info.header_offset + LOCAL_HEADER.size + name_length + extra_length
+
+
+def _copied_info(info: zipfile.ZipInfo) -> zipfile.ZipInfo:
+    copied = zipfile.ZipInfo(info.filename, info.date_time)
+    copied.compress_type = info.compress_type
+    copied.CRC = info.CRC
+    copied.compress_size = info.compress_size
+    copied.file_size = info.file_size
+    copied.external_attr = info.external_attr
+    copied.create_system = info.create_system
+    return copied
+
+
+def copy_zip_entry(target: zipfile.ZipFile, source: zipfile.ZipFile, info: zipfile.ZipInfo):
+    # copia a entrada como está (já comprimida): sem descomprimir nem recomprimir
+    source.fp.seek(_raw_offset(source, info))
+    raw = source.fp.read(info.compress_size)
+
+    _append_entry(target, _copied_info(info), raw)
+
+
+class _CentralDirectory:
+    # recebe só o diretório central do zip; tell() conta a partir de onde ele
+    # começa no arquivo montado, para os offsets saírem certos
+    def __init__(self, start: int):
+        self.start = start
+        self.buffer = BytesIO()
+
+    def tell(self):
+        return self.start + self.buffer.tell()
+
+    def write(self, data):
+        return self.buffer.write(data)
+
+    def flush(self):
+        pass
+
+
+def zip_segments(entries: list[tuple[zipfile.ZipFile, zipfile.ZipInfo]]) -> tuple[list, int]:
+    # descreve o zip com essas entradas (de um ou mais zips de origem), sem montá-lo:
+    # bytes (cabeçalhos e diretório central) ou (caminho, offset, tamanho) dos dados
+    # comprimidos na origem. Devolve os segmentos e o tamanho total
+    segments = []
+    infos = []
+    offset = 0
+
+    for source, info in entries:
+        copied = _copied_info(info)
+        copied.header_offset = offset
+        header = copied.FileHeader(copied.file_size * 1.05 > zipfile.ZIP64_LIMIT)
+
+        segments.append(header)
+        segments.append((source.filename, _raw_offset(source, info), info.compress_size))
+        infos.append(copied)
+        offset += len(header) + info.compress_size
+
+    directory = _CentralDirectory(offset)
+    with zipfile.ZipFile(directory, "w") as z:
+        z.filelist = infos
+
+    central = directory.buffer.getvalue()
+    segments.append(central)
+    return segments, offset + len(central)
+
+
+def iter_segments(segments: list, start: int = 0, count: int = None, chunk_size: int = 64 * 1024):
+    # bytes [start, start + count) do zip descrito por zip_segments, em pedaços
+    remaining = float("inf") if count is None else count
+    position = 0
+
+    for segment in segments:
+        length = len(segment) if isinstance(segment, bytes) else segment[2]
+        skip = max(start - position, 0)
+        position += length
+
+        if skip >= length:
+            continue
+        if remaining <= 0:
+            break
+
+        if isinstance(segment, bytes):
+            chunk = segment[skip:skip + min(length - skip, remaining)]
+            remaining -= len(chunk)
+            yield chunk
+            continue
+
+        path, offset, _ = segment
+        with open(path, "rb") as f:
+            f.seek(offset + skip)
+            left = min(length - skip, remaining)
+
+            while left > 0:
+                chunk = f.read(min(chunk_size, left))
+                if not chunk:
+                    raise ValueError(f"Arquivo {path} truncado")
+                left -= len(chunk)
+                remaining -= len(chunk)
+                yield chunk
+
+
+def _append_entry(target: zipfile.ZipFile, info: zipfile.ZipInfo, raw: bytes):
+    # entrada já comprimida: cabeçalho local com tamanhos e CRC, depois os dados
+    info.header_offset = target.fp.tell()
+    target.fp.write(info.FileHeader(info.file_size * 1.05 > zipfile.ZIP64_LIMIT))
+    target.fp.write(raw)
+    target.start_dir = target.fp.tell()
+    target.filelist.append(info)
+    target.NameToInfo[info.filename] = info
+    target._didModify = True
+
+
+def _deflate(blob, static=None) -> tuple[int, int, bytes]:
+    # o mesmo deflate do ZipFile.writestr com ZIP_DEFLATED e nível padrão.
+    # static: (blob do template, entrada já comprimida); parte igual à do
+    # template reaproveita a entrada em vez de comprimir de novo
+    if callable(blob):
+        blob = blob()
+    if static is not None:
+        source, deflated = static
+        if blob is source or (len(blob) == len(source) and blob == source):
+            return deflated
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    return len(blob), zlib.crc32(blob), compressor.compress(blob) + compressor.flush()
+
+
+def _deflated(blobs: list, statics: list = None):
+    # resultados na ordem de entrada; com o pool, os próximos já comprimem
+    # enquanto o anterior é gravado
+    statics = statics or [None] * len(blobs)
+
+    if _save_executor is None:
+        return map(_deflate, blobs, statics)
+
+    jobs = [_save_executor.submit(_deflate, blob, static) for blob, static in zip(blobs, statics)]
+    return (job.result() for job in jobs)
+
+
+def deflate_parts(parts: Mapping[str, bytes]) -> dict[str, tuple[int, int, bytes]]:
+    # {membername: (tamanho, crc, dados comprimidos)} de cada parte, como no zip
+    return dict(zip(parts, _deflated(list(parts.values()))))
+
+
+def _append_deflated(target: zipfile.ZipFile, name: str, deflated: tuple[int, int, bytes]):
+    # mesmos metadados que o writestr daria à entrada
+    size, crc, raw = deflated
+    info = zipfile.ZipInfo(name, time.localtime(time.time())[:6])
+    info.compress_type = zipfile.ZIP_DEFLATED
+    info.external_attr = 0o600 << 16
+    info.file_size = size
+    info.compress_size = len(raw)
+    info.CRC = crc
+    _append_entry(target, info, raw)
+
+
+def _package_members(package) -> list[tuple[str, object]]:
+    # (membername, blob) na ordem do PackageWriter; o blob vai como função para
+    # que a serialização do XML também rode no pool
+    parts = tuple(package.iter_parts())
+    members = [
+        (CONTENT_TYPES_URI.membername, lambda: serialize_part_xml(_ContentTypesItem.xml_for(parts))),
+        (PACKAGE_URI.rels_uri.membername, lambda: package._rels.xml),
+    ]
+
+    for part in parts:
+        members.append((part.partname.membername, lambda part=part: part.blob))
+        if part._rels:
+            members.append((part.partname.rels_uri.membername, lambda part=part: part.rels.xml))
+
+    return members
+
+
+def write_package_zip(parts: Mapping[str, bytes], pkg_file):
+    # {membername: blob} num zip, na ordem do dict, com o deflate do pool
+    names = list(parts)
+
+    with zipfile.ZipFile(pkg_file, "w", zipfile.ZIP_DEFLATED) as target:
+        for name, deflated in zip(names, _deflated([parts[name] for name in names])):
+            _append_deflated(target, name, deflated)
+
+
+def save_presentation(prs, pkg_file, template=None):
+    # substitui prs.save: mesmo zip, byte a byte, com as partes serializadas e
+    # comprimidas em paralelo e gravadas em ordem. Com o template de origem, as
+    # partes que a geração não alterou saem das entradas já comprimidas dele
+    members = _package_members(prs.part.package)
+    statics = [template.static_entry(name) for name, _ in members] if template is not None else None
+
+    with zipfile.ZipFile(pkg_file, "w", zipfile.ZIP_DEFLATED) as target:
+        for (name, _), deflated in zip(members, _deflated([blob for _, blob in members], statics)):
+            _append_deflated(target, name, deflated)
+
+
+def write_package_incremental(parts: Mapping[str, bytes], previous: Mapping[str, bytes], source_path: str, target_path: str) -> list[str]:
+    # grava o pacote reaproveitando as entradas do zip anterior que não mudaram;
+    # só as partes alteradas passam pelo deflate. Devolve as partes regravadas
+    rewritten = [name for name, blob in parts.items() if name not in previous or previous[name] != blob]
+    deflated = dict(zip(rewritten, _deflated([parts[name] for name in rewritten])))
+
+    with zipfile.ZipFile(source_path, "r") as source, \
+            zipfile.ZipFile(target_path, "w", zipfile.ZIP_DEFLATED) as target:
+        for name in parts:
+            if name in deflated:
+                _append_deflated(target, name, deflated[name])
+            else:
+                copy_zip_entry(target, source, source.getinfo(name))
+
+    return rewritten
+
+
+def open_presentation_from_parts(parts: Mapping[str, bytes], rename_slides: bool = True):
+    # abre a apresentação direto de {membername: bytes}, sem passar pelo zip. As
+    # partes XML só são parseadas quando alguém lê o elemento (ex.: as shapes de
+    # um slide); as que ninguém tocou voltam para o save com os bytes originais
+    presentation_part = _PartsPackage.open(parts).main_document_part
+
+    if presentation_part.content_type not in (CT.PML_PRESENTATION_MAIN, CT.PML_PRES_MACRO_MAIN):
+        raise ValueError(
+            f"Pacote não é um PowerPoint, content type é '{presentation_part.content_type}'"
+        )
+
+    prs = presentation_part.presentation
+
+    if not rename_slides:
+        # cópia de uma apresentação já editada: o primeiro acesso a prs.slides
+        # renumeraria as partes e colidiria com slides já removidos da lista
+        prs.__dict__["slides"] = Slides(prs._element.get_or_add_sldIdLst(), prs)
+
+    return prs
+
+
+class _MemberBlobs(Mapping):
+
+    def __init__(self, parts: Mapping[str, bytes]):
+        self._parts = parts
+
+    def __contains__(self, pack_uri):
+        return pack_uri.membername in self._parts
+
+    def __getitem__(self, pack_uri):
+        try:
+            return self._parts[pack_uri.membername]
+        except KeyError:
+            raise KeyError(f"no member '{pack_uri}' in package")
+
+    def __iter__(self):
+        return iter(self._parts)
+
+    def __len__(self):
+        return len(self._parts)
+
+
+class _PartsReader(PackageReader):
+
+    @lazyproperty
+    def _blob_reader(self):
+        return _MemberBlobs(self._pkg_file)
+
+
+class _LazyXmlPart:
+    # mixin das partes XML: _element é parseado no primeiro acesso e, até lá,
+    # blob devolve os bytes lidos do pacote (sem serializar de novo)
+    _raw = None
+    _parsed = None
+
+    @property
+    def _element(self):
+        if self._parsed is None and self._raw is not None:
+            self._parsed = parse_xml(self._raw)
+            self._raw = None
+        return self._parsed
+
+    @_element.setter
+    def _element(self, element):
+        self._parsed = element
+        if element is not None:
+            self._raw = None
+
+    @property
+    def blob(self):
+        if self._raw is not None:
+            return self._raw
+        return super().blob
+
+
+_lazy_classes = {}
+
+
+def _lazy_part_class(part_class: type) -> type:
+    lazy_class = _lazy_classes.get(part_class)
+    if lazy_class is None:
+        lazy_class = _lazy_classes[part_class] = type(part_class.__name__, (_LazyXmlPart, part_class), {})
+    return lazy_class
+
+
+class _PartsPackageLoader(_PackageLoader):
+
+    @lazyproperty
+    def _package_reader(self):
+        return _PartsReader(self._pkg_file)
+
+    @lazyproperty
+    def _parts(self):
+        # igual ao _PackageLoader._parts, mas as partes XML não são parseadas aqui
+        content_types = self._content_types
+        package = self._package
+        package_reader = self._package_reader
+        parts = {}
+
+        for partname in self._xml_rels:
+            if partname == "/" or partname not in package_reader:
+                continue
+
+            content_type = content_types[partname]
+            part_class = PartFactory._part_cls_for(content_type)
+            blob = package_reader[partname]
+
+            if issubclass(part_class, XmlPart):
+                part = _lazy_part_class(part_class)(partname, content_type, package, None)
+                part._raw = blob
+            else:
+                part = part_class.load(partname, content_type, package, blob)
+
+            parts[partname] = part
+
+        return parts
+
+
+class _PartsPackage(Package):
+
+    def _load(self):
+        pkg_xml_rels, parts = _PartsPackageLoader.load(self._pkg_file, self)
+        self._rels.load_from_xml(PACKAGE_URI, pkg_xml_rels, parts)
+        return self
+
+
+class _MemberWriter:
+
+    def __init__(self, parts: dict):
+        self._parts = parts
+
+    def write(self, pack_uri, blob):
+        self._parts[pack_uri.membername] = blob
+
+
+class _PartsWriter(PackageWriter):
+
+    def _write(self):
+        writer = _MemberWriter(self._pkg_file)
+        self._write_content_types_stream(writer)
+        self._write_pkg_rels(writer)
+        self._write_parts(writer)
@@ -0,0 +1,158 @@
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from settings import (
+    PROFILING_ENABLED,
+    PROFILING_SAMPLE_RATE,
+    PROFILING_INTERVAL,
+    PROFILING_DIR,
+    PROFILING_KEEP,
+)
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+PROFILE_NAME_PATTERN = re.compile(r"^(\d+)_([a-z0-9-]+)_(\d+)b\.collapsed$")
+
+
+def is_available() -> bool:
+    return PROFILING_ENABLED or PROFILING_SAMPLE_RATE > 0
+
+
+def should_profile(headers) -> bool:
+    if PROFILING_ENABLED and headers.get(PROFILE_HEADER) == "1":
+        return True
+
+    return PROFILING_SAMPLE_RATE > 0 and random.random() < PROFILING_SAMPLE_RATE
+
+
+class SamplingProfiler:
+    # amostra a pilha de uma thread em intervalos fixos, sem instrumentar o código
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                frame = frame.f_back
+
+            self.samples[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        # formato "a;b;c N", aceito pelo speedscope e pelo flamegraph.pl
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+def _slug(value: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", str(value).lower()).strip("-") or "desconhecido"
+
+
+def _prune():
+    # PROFILING_KEEP=0 não guarda nenhum
+    names = sorted(n for n in os.listdir(PROFILING_DIR) if PROFILE_NAME_PATTERN.match(n))
+
+    for name in names[:max(len(names) - PROFILING_KEEP, 0)]:
+        try:
+            os.remove(os.path.join(PROFILING_DIR, name))
+        except OSError as e:
+            # outro worker pode ter removido antes
+            logger.warning(f"Não foi possível remover o profile {name}: {e}")
+
+
+def _save(profiler, tipo_proposta: str, payload_size: int) -> str:
+    os.makedirs(PROFILING_DIR, exist_ok=True)
+    name = None
+
+    if PROFILING_KEEP > 0:
+        name = f"{time.time_ns()}_{_slug(tipo_proposta)}_{payload_size}b.collapsed"
+        with open(os.path.join(PROFILING_DIR, name), "w") as f:
+            f.write(profiler.collapsed())
+
+    _prune()
+    return name
+
+
+@contextmanager
+def _profile(tipo_proposta: str, payload_size: int, result: dict):
+    profiler = SamplingProfiler(threading.get_ident(), PROFILING_INTERVAL)
+    profiler.start()
+
+    try:
+        yield result
+    finally:
+        profiler.stop()
+
+        # o profile é diagnóstico: falhar ao gravá-lo nunca derruba a requisição
+        try:
+            name = _save(profiler, tipo_proposta, payload_size)
+        except OSError as e:
+            logger.error(f"Não foi possível salvar o profile: {e}")
+            name = None
+
+        if name is not None:
+            result["profile"] = name
+            logger.info(f"Profile salvo em {PROFILING_DIR}/{name} ({sum(profiler.samples.values())} amostras)")
+
+
+def profile_request(headers, tipo_proposta: str, payload_size: int):
+    # desligado: só o custo de checar o header
+    if not should_profile(headers):
+        return nullcontext({})
+
+    return _profile(tipo_proposta, payload_size, {})
+
+
+def list_profiles() -> list[dict]:
+    if not os.path.isdir(PROFILING_DIR):
+        return []
+
+    profiles = []
+
+    for name in sorted(os.listdir(PROFILING_DIR), reverse=True):
+        match = PROFILE_NAME_PATTERN.match(name)
+        if not match:
+            continue
+
+        created_ns, tipo, payload_size = match.groups()
+        profiles.append({
+            "name": name,
+            "tipoProposta": tipo,
+            "payloadSize": int(payload_size),
+            "created": int(created_ns) / 1e9,
+            "size": os.path.getsize(os.path.join(PROFILING_DIR, name)),
+        })
+
+    return profiles
+
+
+def profile_path(name: str):
+    if not PROFILE_NAME_PATTERN.match(name):
+        return None
+
+    path = os.path.join(PROFILING_DIR, name)
+    return path if os.path.exists(path) else None
@@ -0,0 +1,953 @@
+from dataclasses import dataclass
+from io import BytesIO
+from copy import deepcopy
+from pptx.util import Pt
+from pptx.enum.text import PP_ALIGN
+from pptx.dml.color import RGBColor
+from pptx.enum.shapes import MSO_SHAPE
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import qn
+from pptx.oxml.xmlchemy import OxmlElement
+from lxml import etree
+from services import template_store
+from services.package_io import (
+    open_presentation_from_parts,
+    read_package_parts,
+    save_presentation,
+    write_package_incremental,
+    write_package_parts,
+)
+from services.output_store import output_store, StoredFile
+from services import memory_accounting
+from services.memory_accounting import NULL_REPORT
+import logging
+import math
+import os
+import posixpath
+import zipfile
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+def lookup(data: dict, path: str, default=_MISSING):
+    # "cliente.briefing.timeLine" -> data["cliente"]["briefing"]["timeLine"]
+    *parents, key = path.split(".")
+
+    for parent in parents:
+        data = data[parent]
+
+    if default is _MISSING:
+        return data[key]
+
+    return data.get(key, default)
+
+
+class ProposalContext:
+
+    def __init__(self, prs, data: dict, images: dict[str, bytes], removals: dict = None):
+        self.prs = prs
+        self.data = data
+        self.images = images
+        # posição do slide no template -> slides removidos/criados pelas operações dela;
+        # é o que a regeneração incremental precisa para refazer só uma posição
+        self.removed = {position: set(ids) for position, ids in (removals or {}).items()}
+        self.created = {}
+        self.order = []
+        self.rIds = []
+        self.position = None
+
+    @property
+    def pending_removals(self) -> dict[int, set[int]]:
+        return {position: set(ids) for position, ids in self.removed.items()}
+
+    def remove_slide(self, slide):
+        self.removed.setdefault(self.position, set()).add(slide.slide_id)
+
+    def apply_removals(self):
+        slides = self.prs.slides._sldIdLst
+        to_remove = set().union(*self.removed.values())
+
+        for sld in list(slides):
+            if int(sld.get("id")) in to_remove:
+                slides.remove(sld)
+
+
+class Operation:
+
+    # com first_only a operação só atua no primeiro slide que casar
+    first_only = False
+
+    @property
+    def required_shapes(self) -> set[str]:
+        return set()
+
+    @property
+    def required_tokens(self) -> set[str]:
+        return set()
+
+    @property
+    def required_layouts(self) -> set[str]:
+        return set()
+
+    @property
+    def fields(self) -> set[str]:
+        # caminhos do payload que a operação lê; decide o que é comum entre variantes
+        return set()
+
+    def binds(self, position: int, slide_index: dict) -> bool:
+        return bool(self.required_shapes & set(slide_index["shapes"]))
+
+    def validate(self, index: dict) -> list[str]:
+        problems = []
+
+        shapes = {name for slide in index["slides"] for name in slide["shapes"]}
+        tokens = {token for slide in index["slides"] for token in slide["tokens"]}
+        layouts = {name.lower() for name in index["layouts"]}
+
+        for name in sorted(self.required_shapes - shapes):
+            problems.append(f"shape '{name}' não encontrado")
+
+        for token in sorted(self.required_tokens - tokens):
+            problems.append(f"token '{token}' não encontrado em nenhum run de texto")
+
+        for layout in sorted(self.required_layouts - layouts):
+            problems.append(f"layout '{layout}' não encontrado")
+
+        return problems
+
+    def apply(self, ctx: ProposalContext, slide):
+        raise NotImplementedError
+
+
+@dataclass(frozen=True)
+class ReplaceImage(Operation):
+    shape: str
+    image: str
+    slide: int = 0
+    # campo do payload de onde a imagem vem, quando vem (ex.: logoUrl)
+    field: str = None
+
+    @property
+    def required_shapes(self):
+        return {self.shape}
+
+    @property
+    def fields(self):
+        return {self.field} if self.field else set()
+
+    def binds(self, position, slide_index):
+        return position == self.slide and self.shape in slide_index["shapes"]
+
+    def validate(self, index):
+        problems = super().validate(index)
+
+        slides = index["slides"]
+        if len(slides) <= self.slide or self.shape not in slides[self.slide]["shapes"]:
+            problems.append(f"shape '{self.shape}' precisa estar no slide {self.slide + 1}")
+
+        return problems
+
+    def apply(self, ctx, slide):
+        logger.info(f"Iniciando a atualização da imagem {self.shape}...")
+
+        image_stream = BytesIO(ctx.images[self.image])
+
+        for shape in [s for s in slide.shapes if s.name == self.shape]:
+            left = shape.left
+            top = shape.top
+            width = shape.width
+            height = shape.height
+
+            slide.shapes._spTree.remove(shape._element)
+
+            slide.shapes.add_picture(
+                image_stream,
+                left,
+                top,
+                width=width,
+                height=height
+            )
+
+
+@dataclass(frozen=True)
+class SubstituteTokens(Operation):
+    # {"<NOME_EMPRESA>": "cliente.nome"}
+    tokens: dict[str, str]
+
+    def __hash__(self):
+        return hash(tuple(self.tokens.items()))
+
+    @property
+    def required_tokens(self):
+        return set(self.tokens)
+
+    @property
+    def fields(self):
+        return set(self.tokens.values())
+
+    def binds(self, position, slide_index):
+        return bool(self.required_tokens & set(slide_index["tokens"]))
+
+    def apply(self, ctx, slide):
+        values = {token: str(lookup(ctx.data, path)) for token, path in self.tokens.items()}
+
+        for shape in slide.shapes:
+            if shape.has_text_frame:
+                for paragraph in shape.text_frame.paragraphs:
+                    for run in paragraph.runs:
+                        for token, value in values.items():
+                            if token in run.text:
+                                run.text = run.text.replace(token, value)
+
+
+@dataclass(frozen=True)
+class SelectVariantSlides(Operation):
+    # mantém só o slide da variante escolhida, ex.: adequatePlan "gold" -> GOLD_PLAN
+    variants: frozenset[str]
+    field: str
+    suffix: str = ""
+
+    @property
+    def required_shapes(self):
+        return set(self.variants)
+
+    @property
+    def fields(self):
+        return {self.field}
+
+    def apply(self, ctx, slide):
+        selected = lookup(ctx.data, self.field, None)
+
+        if not selected:
+            return
+
+        selected = selected.upper() + self.suffix
+
+        for shape in slide.shapes:
+            if shape.name in self.variants and shape.name != selected:
+                ctx.remove_slide(slide)
+                break
+
+
+@dataclass(frozen=True)
+class AllocateSlides(Operation):
+    # {"COMPOSICAO_PO": "po"}: slide removido quando a alocação é "0",
+    # senão o token recebe a alocação com o sufixo
+    shapes: dict[str, str]
+    field: str
+    token: str
+    suffix: str = ""
+
+    def __hash__(self):
+        return hash((tuple(self.shapes.items()), self.field, self.token, self.suffix))
+
+    @property
+    def required_shapes(self):
+        return set(self.shapes)
+
+    @property
+    def required_tokens(self):
+        return {self.token}
+
+    @property
+    def fields(self):
+        return {self.field}
+
+    def apply(self, ctx, slide):
+        allocations = lookup(ctx.data, self.field)
+
+        for shape in slide.shapes:
+            if shape.name not in self.shapes:
+                continue
+
+            allocation = allocations.get(self.shapes[shape.name], "0")
+
+            if allocation == "0" or allocation is None:
+                ctx.remove_slide(slide)
+                continue
+
+            for text_shape in slide.shapes:
+                if text_shape.has_text_frame:
+                    for paragraph in text_shape.text_frame.paragraphs:
+                        for run in paragraph.runs:
+                            if self.token in run.text:
+                                run.text = run.text.replace(
+                                    self.token,
+                                    f"{allocation}{self.suffix}"
+                                )
+
+
+@dataclass(frozen=True)
+class PaginateText(Operation):
+    anchor: str
+    title_shape: str
+    body_shape: str
+    title_field: str
+    body_field: str
+    image_shapes: frozenset[str] = frozenset()
+    limit: int = 500
+    first_only = True
+
+    @property
+    def required_shapes(self):
+        return {self.anchor, self.title_shape, self.body_shape, *self.image_shapes}
+
+    @property
+    def required_layouts(self):
+        return {"blank"}
+
+    @property
+    def fields(self):
+        return {self.title_field, self.body_field}
+
+    def binds(self, position, slide_index):
+        return self.anchor in slide_index["shapes"]
+
+    def _chunk(self, details: list[str]):
+        chunks = []
+        current_chunk = ""
+
+        for detail in details:
+            formatted = f"{detail.strip()}\n"
+
+            if len(current_chunk) + len(formatted) > self.limit:
+                chunks.append(current_chunk.strip())
+                current_chunk = formatted
+            else:
+                current_chunk += formatted
+
+        if current_chunk:
+            chunks.append(current_chunk.strip())
+
+        return chunks
+
+    def _duplicate_slide(self, prs, slide):
+        slide_layout = next(
+            layout for layout in prs.slide_layouts
+            if layout.name.lower() == "blank"
+        )
+
+        new_slide = prs.slides.add_slide(slide_layout)
+
+        # remover placeholders herdados
+        for shape in list(new_slide.shapes):
+            if shape.is_placeholder:
+                sp = shape._element
+                sp.getparent().remove(sp)
+
+        rectangle_shapes = {self.anchor, self.title_shape, self.body_shape}
+
+        for shape in slide.shapes:
+            # 🔹 Imagens: reaproveita a parte de imagem do slide original (só uma
+            # nova relação, sem reler nem re-hashear o blob)
+            if shape.name in self.image_shapes:
+                image_part = slide.part.related_part(shape._element.blip_rId)
+                rId = new_slide.part.relate_to(image_part, RT.IMAGE)
+
+                new_element = deepcopy(shape._element)
+                new_element.blipFill.blip.rEmbed = rId
+                new_slide.shapes._spTree.insert_element_before(new_element, 'p:extLst')
+
+            # 🔹 Retângulos vazios
+            elif shape.name in rectangle_shapes:
+                # Clonar o shape original inteiro com todas as propriedades
+                new_element = deepcopy(shape._element)
+                new_slide.shapes._spTree.insert_element_before(new_element, 'p:extLst')
+
+                if shape.name != self.anchor:
+                    # Encontrar o shape adicionado e limpar seu texto
+                    for new_shape in new_slide.shapes:
+                        if new_shape.name == shape.name:
+                            new_shape.text_frame.clear()
+                            break
+
+        # 🔹 Reordenar slide
+        slide_id_list = prs.slides._sldIdLst
+
+        for idx, sldId in enumerate(slide_id_list):
+            if sldId.id == slide.slide_id:
+                original_index = idx
+                break
+
+        new_sldId = slide_id_list[-1]
+        slide_id_list.remove(new_sldId)
+        slide_id_list.insert(original_index + 1, new_sldId)
+
+        return new_slide
+
+    def apply(self, ctx, slide):
+        logger.info(f"Iniciando a atualização dos slides de escopo...")
+
+        main_goal = lookup(ctx.data, self.title_field, None)
+        briefing_details = lookup(ctx.data, self.body_field, None)
+
+        if not briefing_details:
+            return
+
+        chunks = self._chunk(briefing_details)
+
+        slides_to_fill = [slide]
+
+        for _ in range(len(chunks) - 1):
+            duplicated = self._duplicate_slide(ctx.prs, slide)
+            slides_to_fill.append(duplicated)
+
+        for slide, chunk in zip(slides_to_fill, chunks):
+
+            for shape in slide.shapes:
+                if shape.name == self.title_shape:
+                    text_frame = shape.text_frame
+                    text_frame.clear()
+
+                    p = text_frame.paragraphs[0]
+                    p.alignment = PP_ALIGN.LEFT
+                    run = p.add_run()
+                    run.text = f"🎯 Objetivo Geral: {main_goal}"
+                    run.font.name = "Lexend"
+                    run.font.size = Pt(22)
+                    run.font.color.rgb = RGBColor(0, 0, 0)
+
+                if shape.name == self.body_shape:
+                    text_frame = shape.text_frame
+                    text_frame.clear()
+
+                    lines = [l.strip().lstrip("-").strip()
+                     for l in chunk.split("\n") if l.strip()]
+
+                    if not lines:
+                        continue
+
+                    first_p = text_frame.paragraphs[0]
+                    first_p.text = f"• {lines[0]}"
+                    first_p.level = 0
+                    first_p.alignment = PP_ALIGN.LEFT
+                    first_p.runs[0].font.name = "Lexend"
+                    first_p.runs[0].font.size = Pt(18)
+                    first_p.runs[0].font.color.rgb = RGBColor(0, 0, 0)
+
+                    space_p = text_frame.add_paragraph()
+                    space_p.text = ""
+
+                    for line in lines[1:]:
+                        p = text_frame.add_paragraph()
+                        p.text = f"• {line}"
+                        p.level = 0
+                        p.alignment = PP_ALIGN.LEFT
+                        p.runs[0].font.name = "Lexend"
+                        p.runs[0].font.size = Pt(18)
+                        p.runs[0].font.color.rgb = RGBColor(0, 0, 0)
+
+                        # Parágrafo vazio entre linhas
+                        space_p = text_frame.add_paragraph()
+                        space_p.text = ""
+
+
+@dataclass(frozen=True)
+class DrawTimeline(Operation):
+    shape: str
+    field: str
+    # (chave do payload, cor da barra), na ordem das linhas da tabela
+    stages: tuple[tuple[str, RGBColor], ...]
+    min_weeks: int = 6
+    first_only = True
+
+    @property
+    def required_shapes(self):
+        return {self.shape}
+
+    @property
+    def fields(self):
+        return {self.field}
+
+    def _remove_old_bars(self, slide):
+        shapes_to_remove = []
+
+        for shape in slide.shapes:
+            if shape.name.startswith("BAR_"):
+                shapes_to_remove.append(shape)
+
+        for shape in shapes_to_remove:
+            sp = shape._element
+            sp.getparent().remove(sp)
+
+    def apply(self, ctx, slide):
+        logger.info("Construindo timeline estilo Gantt...")
+
+        timeline_data = lookup(ctx.data, self.field)
+
+        table_shape = next(s for s in slide.shapes if s.name == self.shape)
+        table = table_shape.table
+
+        # remover barras antigas
+        self._remove_old_bars(slide)
+
+        # total semanas (considerando fração)
+        total_semanas = sum(
+            float(timeline_data.get(k, 0) or 0) for k, _ in self.stages
+        )
+
+        total_semanas = max(math.ceil(total_semanas), self.min_weeks)
+
+        # cabeçalho
+        for col in range(1, total_semanas + 1):
+            cell = table.cell(0, col)
+            cell.text = f"SEM {col}"
+
+            p = cell.text_frame.paragraphs[0]
+            p.alignment = PP_ALIGN.CENTER
+
+            run = p.runs[0]
+            run.font.name = "Roboto"
+            run.font.size = Pt(16)
+            run.font.italic = True
+            run.font.color.rgb = RGBColor(120, 120, 120)
+
+        coluna_atual = 1.0  # agora é float
+
+        for row_idx, (key, cor) in enumerate(self.stages, start=1):
+
+            duracao = float(timeline_data.get(key, 0) or 0)
+
+            if duracao <= 0:
+                continue
+
+            # posição base
+            left = table_shape.left
+            top = table_shape.top
+
+            # deslocamento horizontal (parte inteira)
+            col_inteira = int(coluna_atual)
+
+            for c in range(col_inteira):
+                left += table.columns[c].width
+
+            # parte fracionada inicial
+            fracao_inicio = coluna_atual - col_inteira
+            if fracao_inicio > 0:
+                left += table.columns[col_inteira].width * fracao_inicio
+
+            # deslocamento vertical
+            for r in range(row_idx):
+                top += table.rows[r].height
+
+            # largura considerando fração
+            largura_total = 0
+
+            parte_inteira = int(duracao)
+            fracao = duracao - parte_inteira
+
+            # somar colunas inteiras
+            for i in range(parte_inteira):
+                largura_total += table.columns[col_inteira + i].width
+
+            # parte fracionada final
+            if fracao > 0:
+                largura_total += table.columns[col_inteira + parte_inteira].width * fracao
+
+            altura = table.rows[row_idx].height
+
+            padding_h = Pt(6)
+            padding_v = Pt(4)
+
+            barra = slide.shapes.add_shape(
+                MSO_SHAPE.ROUNDED_RECTANGLE,
+                left + padding_h,
+                top + padding_v,
+                largura_total - (padding_h * 2),
+                altura - (padding_v * 2),
+            )
+
+            barra.name = f"BAR_{key}"
+
+            barra.fill.solid()
+            barra.fill.fore_color.rgb = cor
+            barra.line.fill.background()
+            barra.adjustments[0] = 0.3
+
+            coluna_atual += duracao
+
+
+@dataclass(frozen=True)
+class ProposalSpec:
+    tipo: str
+    template_path: str
+    output_name: str
+    operations: tuple[Operation, ...]
+    images: tuple[str, ...] = ("logo",)
+
+    def validate(self, index: dict) -> list[str]:
+        problems = []
+
+        for operation in self.operations:
+            for problem in operation.validate(index):
+                if problem not in problems:
+                    problems.append(problem)
+
+        return problems
+
+
+class ExecutionPlan:
+
+    def __init__(self, steps: list[tuple[int, list[Operation]]]):
+        self.steps = steps
+
+    @classmethod
+    def compile(cls, spec: ProposalSpec, index: dict):
+        bound = {}
+        done = set()
+
+        # uma passada pelo índice decide quais operações tocam cada slide
+        for position, slide_index in enumerate(index["slides"]):
+            for operation in spec.operations:
+                if operation.first_only and operation in done:
+                    continue
+
+                if operation.binds(position, slide_index):
+                    bound.setdefault(position, []).append(operation)
+                    done.add(operation)
+
+        for operation in spec.operations:
+            if operation not in done:
+                logger.warning(f"{type(operation).__name__} não encontrou slide no template de {spec.tipo}.")
+
+        return cls(sorted(bound.items()))
+
+    def only(self, positions: set[int]):
+        return ExecutionPlan([(position, ops) for position, ops in self.steps if position in positions])
+
+    def affected_by(self, changed: set[str]) -> set[int]:
+        # posições com alguma operação que lê um campo alterado (ou um pai/filho dele)
+        def overlaps(field):
+            return any(
+                path == field or path.startswith(f"{field}.") or field.startswith(f"{path}.")
+                for path in changed
+            )
+
+        return {
+            position for position, operations in self.steps
+            if any(overlaps(field) for operation in operations for field in operation.fields)
+        }
+
+    def split(self, shared: set[Operation]):
+        # (operações comuns, operações por variante), mantendo a ordem de cada slide
+        def keep(predicate):
+            steps = []
+            for position, operations in self.steps:
+                selected = [op for op in operations if predicate(op)]
+                if selected:
+                    steps.append((position, selected))
+            return ExecutionPlan(steps)
+
+        return keep(lambda op: op in shared), keep(lambda op: op not in shared)
+
+    def execute(self, ctx: ProposalContext, memory=NULL_REPORT, rIds: list[str] = None, defer_removals=False):
+        prs = ctx.prs
+        # rIds na ordem do template; slides duplicados durante a execução não mudam
+        # as posições já resolvidas
+        if rIds is None:
+            rIds = slide_rIds(prs)
+
+        ctx.rIds = rIds
+        sldIdLst = prs.slides._sldIdLst
+
+        for position, operations in self.steps:
+            slide = prs.part.related_slide(rIds[position])
+            ctx.position = position
+            before = {sldId.rId for sldId in sldIdLst}
+
+            for operation in operations:
+                with memory.stage(type(operation).__name__):
+                    operation.apply(ctx, slide)
+
+            created = [sldId.rId for sldId in sldIdLst if sldId.rId not in before]
+            if created:
+                ctx.created[position] = created
+
+        ctx.position = None
+        ctx.order = [(int(sldId.get("id")), sldId.rId) for sldId in sldIdLst]
+
+        if not defer_removals:
+            ctx.apply_removals()
+
+
+def slide_rIds(prs) -> list[str]:
+    return [sldId.rId for sldId in prs.slides._sldIdLst]
+
+
+def _resolve(data: dict, path: str):
+    try:
+        return lookup(data, path, None)
+    except (KeyError, TypeError, AttributeError):
+        return None
+
+
+_plan_cache = {}
+
+
+def plan_for(spec: ProposalSpec, template) -> ExecutionPlan:
+    key = (spec, template.sha256)
+    plan = _plan_cache.get(key)
+    if plan is None:
+        plan = _plan_cache[key] = ExecutionPlan.compile(spec, template.index)
+
+    return plan
+
+
+def load_template_with_plan(spec: ProposalSpec):
+    template = template_store.checkout(spec.template_path)
+    return template, template.open_presentation(), plan_for(spec, template)
+
+
+class ProposalGenerator:
+
+    def __init__(self, spec: ProposalSpec):
+        self.spec = spec
+        self.memory = memory_accounting.new_report(spec.tipo)
+
+        with self.memory.stage("template"):
+            self.template, self.prs, self.plan = load_template_with_plan(spec)
+            self.template_sha256 = self.template.sha256
+
+    def _execute(self, data: dict, images: dict[str, bytes]) -> ProposalContext:
+        ctx = ProposalContext(self.prs, data, images)
+        self.plan.execute(ctx, self.memory)
+
+        self.memory.track(ctx, "context")
+        self.memory.track(self.prs, "presentation")
+        self.memory.track(self.prs.part.package, "package")
+        return ctx
+
+    def render(self, data: dict, images: dict[str, bytes]):
+        return self._execute(data, images).prs
+
+    def generate(self, data: dict, logo: bytes) -> StoredFile:
+        ctx = self._execute(data, {"logo": logo})
+        state = proposal_state(self.spec, self.template_sha256, ctx)
+
+        with self.memory.stage("save"):
+            stored = output_store.write(
+                lambda path: save_presentation(self.prs, path, self.template),
+                self.spec.output_name,
+                state=state,
+                blobs=ctx.images,
+                template=self.template,
+            )
+
+        # salvo, a apresentação não serve mais: solta já, senão a conferência de
+        # vazamento vê viva a que o gerador ainda segura
+        self.prs = None
+        self.memory.publish()
+        return stored
+
+    def generate_variants(self, variants: list[dict], logo: bytes) -> StoredFile:
+        # variants: [{"label": ..., "data": payload completo}]; as operações cujos
+        # campos são iguais em todas rodam uma vez na base, que depois é copiada
+        payloads = [variant["data"] for variant in variants]
+        shared = {
+            op for op in self.spec.operations
+            if all(
+                len({repr(_resolve(data, path)) for data in payloads}) == 1
+                for path in op.fields
+            )
+        }
+        shared_plan, variant_plan = self.plan.split(shared)
+
+        logger.info(
+            f"Gerando {len(variants)} variantes: {len(shared)} operações comuns, "
+            f"{len(self.spec.operations) - len(shared)} por variante"
+        )
+
+        images = {"logo": logo}
+        rIds = slide_rIds(self.prs)
+
+        base_ctx = ProposalContext(self.prs, payloads[0], images)
+        # remoções da base só no fim de cada variante, como numa passada única:
+        # removidas antes, mudariam a numeração dos slides duplicados depois
+        shared_plan.execute(base_ctx, self.memory, rIds, defer_removals=True)
+        removals = base_ctx.pending_removals
+
+        with self.memory.stage("fork"):
+            base_parts = write_package_parts(self.prs.part.package)
+
+        self.memory.track(base_ctx, "context")
+        self.memory.track(self.prs, "presentation")
+        del base_ctx
+        self.prs = None
+
+        def write_archive(f):
+            with zipfile.ZipFile(f, "w", zipfile.ZIP_STORED) as archive:
+                for variant in variants:
+                    prs = open_presentation_from_parts(base_parts, rename_slides=False)
+                    ctx = ProposalContext(prs, variant["data"], images, removals)
+                    variant_plan.execute(ctx, self.memory, rIds)
+
+                    # .pptx já é comprimido: entra no zip sem recomprimir
+                    with archive.open(f"{variant['label']}.pptx", "w") as entry:
+                        save_presentation(prs, entry, self.template)
+
+                    self.memory.track(prs, f"variant {variant['label']}")
+
+        stem = os.path.splitext(self.spec.output_name)[0]
+
+        with self.memory.stage("save"):
+            stored = output_store.write(write_archive, f"{stem}_variantes.zip")
+
+        self.memory.publish()
+        return stored
+
+
+STATE_VERSION = 2
+
+
+def proposal_state(spec: ProposalSpec, template_sha256: str, ctx: ProposalContext) -> dict:
+    # o suficiente para refazer só as posições afetadas por uma alteração do payload;
+    # gravado como JSON, as imagens vão à parte (blobs do output_store)
+    return {
+        "version": STATE_VERSION,
+        "tipo": spec.tipo,
+        "template": template_sha256,
+        "data": ctx.data,
+        "rIds": ctx.rIds,
+        "order": ctx.order,
+        "created": ctx.created,
+        "removed": {position: sorted(ids) for position, ids in ctx.removed.items()},
+    }
+
+
+def _positions(saved: dict) -> dict:
+    # o JSON guarda as posições como texto
+    return {int(position): value for position, value in saved.items()}
+
+
+def changed_paths(old, new, prefix: str = "") -> set[str]:
+    if isinstance(old, dict) and isinstance(new, dict):
+        changed = set()
+        for key in old.keys() | new.keys():
+            changed |= changed_paths(old.get(key, _MISSING), new.get(key, _MISSING), f"{prefix}{key}.")
+        return changed
+
+    return set() if old == new else {prefix.rstrip(".")}
+
+
+_template_slides_cache = {}
+
+
+def _template_slides(template) -> dict[str, str]:
+    # rId do presentation.xml -> membro do slide no template
+    slides = _template_slides_cache.get(template.sha256)
+    if slides is not None:
+        return slides
+
+    def targets(rels_member, base):
+        rels = etree.fromstring(bytes(template.parts[rels_member]))
+        return {
+            rel.get("Id"): (rel.get("Type"), posixpath.normpath(posixpath.join(base, rel.get("Target"))).lstrip("/"))
+            for rel in rels
+        }
+
+    main = next(target for kind, target in targets("_rels/.rels", "").values() if kind == RT.OFFICE_DOCUMENT)
+    base, name = posixpath.split(main)
+    slides = {
+        rId: target
+        for rId, (kind, target) in targets(f"{base}/_rels/{name}.rels", base).items()
+        if kind == RT.SLIDE
+    }
+
+    _template_slides_cache.clear()
+    _template_slides_cache[template.sha256] = slides
+    return slides
+
+
+def _restore_slide_order(prs, order: list[tuple[int, str]]):
+    # volta a lista de slides ao estado anterior às remoções; as partes removidas
+    # continuam no pacote, só o sldId sai da lista
+    sldIdLst = prs.slides._sldIdLst
+    existing = {sldId.rId: sldId for sldId in sldIdLst}
+
+    for sldId in list(sldIdLst):
+        sldIdLst.remove(sldId)
+
+    for slide_id, rId in order:
+        sldId = existing.get(rId)
+        if sldId is None:
+            sldId = OxmlElement("p:sldId")
+            sldId.set("id", str(slide_id))
+            sldId.set(qn("r:id"), rId)
+        sldIdLst.append(sldId)
+
+
+def _reset_slide(slide_part, template, member: str):
+    # a posição volta ao XML e às relações do template: o que as operações tinham
+    # relacionado (ex.: a imagem do logo) sai junto e deixa de ir para o pacote
+    slide_part._element = parse_xml(bytes(template.parts[member]))
+
+    directory, name = posixpath.split(member)
+    template_rels = etree.fromstring(bytes(template.parts[f"{directory}/_rels/{name}.rels"]))
+    kept = {rel.get("Id") for rel in template_rels}
+
+    for rel in list(slide_part.rels):
+        if rel.rId not in kept:
+            slide_part.drop_rel(rel.rId)
+
+
+def _drop_slide(prs, rId: str):
+    sldIdLst = prs.slides._sldIdLst
+
+    for sldId in list(sldIdLst):
+        if sldId.rId == rId:
+            sldIdLst.remove(sldId)
+
+    prs.part.drop_rel(rId)
+
+
+def update_proposal(spec: ProposalSpec, stored: StoredFile, state: dict, data: dict, images: dict) -> StoredFile:
+    # images: as salvas com a proposta, com o logo novo quando o PATCH troca o logoUrl
+    template = template_store.checkout(spec.template_path)
+    plan = plan_for(spec, template)
+    logo = images["logo"]
+
+    if state["version"] != STATE_VERSION or state["template"] != template.sha256:
+        logger.info("Template mudou desde a geração, regenerando a proposta inteira...")
+        return ProposalGenerator(spec).generate(data, logo)
+
+    positions = plan.affected_by(changed_paths(state["data"], data))
+    rIds = state["rIds"]
+    created = _positions(state["created"])
+    removed = _positions(state["removed"])
+
+    logger.info(f"Regenerando {len(positions)} de {len(plan.steps)} posições do template...")
+
+    # proposta guardada como delta: remontada num temporário enquanto é atualizada
+    with output_store.materialized(stored) as previous_path:
+        previous = read_package_parts(previous_path)
+        prs = open_presentation_from_parts(previous, rename_slides=False)
+        _restore_slide_order(prs, state["order"])
+
+        template_slides = _template_slides(template)
+
+        for position in positions:
+            for rId in created.get(position, ()):
+                _drop_slide(prs, rId)
+
+            # a posição volta ao template e todas as operações dela rodam de novo
+            _reset_slide(prs.part.related_part(rIds[position]), template, template_slides[rIds[position]])
+
+        ctx = ProposalContext(
+            prs,
+            data,
+            images,
+            {p: ids for p, ids in removed.items() if p not in positions},
+        )
+        ctx.created = {p: slides for p, slides in created.items() if p not in positions}
+        plan.only(positions).execute(ctx, rIds=rIds)
+
+        def write(path):
+            rewritten = write_package_incremental(write_package_parts(prs.part.package), previous, previous_path, path)
+            logger.info(f"{len(rewritten)} partes regravadas, o resto copiado do arquivo anterior")
+
+        return output_store.write(
+            write, spec.output_name, state=proposal_state(spec, template.sha256, ctx), blobs=images, template=template
+        )
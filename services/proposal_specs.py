@@ -0,0 +1,271 @@
+from enum import Enum
+from typing import Annotated, Literal, Optional, Union
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field, HttpUrl, TypeAdapter, ValidationError
+from pptx.dml.color import RGBColor
+from services.proposal_engine import (
+    ProposalSpec,
+    ReplaceImage,
+    SubstituteTokens,
+    SelectVariantSlides,
+    AllocateSlides,
+    PaginateText,
+    DrawTimeline,
+)
+import settings
+
+class PLANS(Enum):
+    STARTER_PLAN = "starter"
+    SILVER_PLAN = "silver"
+    GOLD_PLAN = "gold"
+    DIAMOND_PLAN = "diamond"
+
+def _empty_as_zero(value):
+    return value or 0
+
+
+def _lower(value):
+    return value.lower() if isinstance(value, str) else value
+
+
+# semanas de cada etapa; "" e null contam como zero, igual ao desenho da timeline
+Weeks = Annotated[float, BeforeValidator(_empty_as_zero), Field(ge=0)]
+
+# alocação do squad em horas; "0" ou null removem o slide do papel
+Allocation = Optional[str]
+
+
+class Payload(BaseModel):
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
+
+class Timeline(Payload):
+    flowDrawing: Weeks = 0
+    drawingHomologation: Weeks = 0
+    development: Weeks = 0
+    qaHomologation: Weeks = 0
+    clientHomologation: Weeks = 0
+
+
+class SustentationBriefing(Payload):
+    adequatePlan: Annotated[Optional[PLANS], BeforeValidator(_lower)] = None
+
+
+class AdequatePlanPayload(SustentationBriefing):
+    mainGoal: Optional[str] = None
+    briefingDetails: Optional[list[str]] = None
+    timeLine: Timeline
+
+
+class SquadBriefing(Payload):
+    po: Allocation = "0"
+    dev: Allocation = "0"
+    ux: Allocation = "0"
+    curador: Allocation = "0"
+    dados: Allocation = "0"
+
+
+class SquadClient(Payload):
+    nome: str
+    briefing: SquadBriefing
+
+
+class SustentationClient(Payload):
+    nome: Optional[str] = None
+    briefing: SustentationBriefing
+
+
+class Client(Payload):
+    nome: Optional[str] = None
+    briefing: AdequatePlanPayload
+
+
+class Variant(Payload):
+    # sobrescreve partes do payload base, ex.: {"cliente": {"briefing": {"adequatePlan": "gold"}}}
+    label: Optional[Annotated[str, Field(pattern=r"^[\w\- ]{1,64}$")]] = None
+    overrides: dict = {}
+
+
+class ProposalData(Payload):
+    # alternativa ao upload do logo: baixado pelo serviço (services/logo_fetcher.py)
+    logoUrl: Optional[HttpUrl] = None
+    variants: Optional[Annotated[list[Variant], Field(min_length=1, max_length=settings.VARIANTS_MAX)]] = None
+
+
+class SquadData(ProposalData):
+    tipoProposta: Literal["SQUAD"]
+    cliente: SquadClient
+
+
+class SustentationData(ProposalData):
+    tipoProposta: Literal["SUSTENTACAO"]
+    cliente: SustentationClient
+
+
+class ServiceData(ProposalData):
+    tipoProposta: Literal["CONSTRUCAO", "AI AGENT/SUSTENTACAO"]
+    cliente: Client
+
+
+ProposalPayload = Annotated[
+    Union[SquadData, SustentationData, ServiceData],
+    Field(discriminator="tipoProposta"),
+]
+
+PAYLOAD_ADAPTER = TypeAdapter(ProposalPayload)
+
+
+def _merge(base: dict, overrides: dict) -> dict:
+    merged = dict(base)
+
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+
+    return merged
+
+
+def _validate_merged(data: dict, overrides: dict, loc: tuple):
+    # a sobrescrita não troca o tipo da proposta; erros saem localizados em loc
+    merged = _merge(data, overrides)
+    merged["tipoProposta"] = data["tipoProposta"]
+
+    try:
+        return PAYLOAD_ADAPTER.validate_python(merged)
+    except ValidationError as e:
+        raise ValidationError.from_exception_data(
+            e.title,
+            [
+                {"type": error["type"], "loc": (*loc, *error["loc"]), "input": error["input"]}
+                | ({"ctx": error["ctx"]} if "ctx" in error else {})
+                for error in e.errors(include_url=False)
+            ],
+        )
+
+
+def _expand_variants(data: dict, variants: list[Variant]) -> list[dict]:
+    expanded = []
+    labels = set()
+
+    for i, variant in enumerate(variants):
+        # o logo é um só para todas as variantes
+        if "logoUrl" in variant.overrides:
+            raise ValidationError.from_exception_data(
+                "Variant",
+                [{"type": "extra_forbidden", "loc": ("variants", i, "overrides", "logoUrl"), "input": variant.overrides["logoUrl"]}],
+            )
+
+        payload = _validate_merged(data, variant.overrides, ("variants", i, "overrides"))
+
+        label = base = variant.label or f"variante_{i + 1}"
+        # o sufixo pode colidir com um rótulo dado ou gerado: conta até ficar único
+        n = i + 1
+        while label in labels:
+            label = f"{base}_{n}"
+            n += 1
+        labels.add(label)
+
+        expanded.append({"label": label, "data": payload.model_dump(mode="json", exclude={"variants"})})
+
+    return expanded
+
+
+PATCH_ADAPTER = TypeAdapter(dict)
+
+
+def patch_payload(data: dict, raw: str | bytes) -> dict:
+    # payload parcial do PATCH aplicado sobre o payload salvo da proposta
+    patch = PATCH_ADAPTER.validate_json(raw)
+
+    if "variants" in patch:
+        raise ValidationError.from_exception_data(
+            "ProposalPatch",
+            [{"type": "extra_forbidden", "loc": ("variants",), "input": patch["variants"]}],
+        )
+
+    return _validate_merged(data, patch, ()).model_dump(mode="json", exclude={"variants"})
+
+
+def parse_payload(raw: str | bytes) -> dict:
+    # valida direto dos bytes (parser JSON do pydantic-core) e devolve o dict
+    # que as operações leem; levanta ValidationError antes de qualquer template
+    payload = PAYLOAD_ADAPTER.validate_json(raw)
+    data = payload.model_dump(mode="json", exclude={"variants"})
+
+    if payload.variants:
+        data["variants"] = _expand_variants(data, payload.variants)
+
+    return data
+
+
+UPDATE_LOGO = ReplaceImage(shape="CLIENT_LOGO", image="logo", field="logoUrl")
+
+SUSTENTATION_PLAN = SelectVariantSlides(
+    variants=frozenset(plan.name for plan in PLANS),
+    field="cliente.briefing.adequatePlan",
+    suffix="_PLAN",
+)
+
+PROJECT_SCOPE = PaginateText(
+    anchor="SCOPE",
+    title_shape="SCOPE_MAIN_GOAL",
+    body_shape="SCOPE_DETAILS",
+    title_field="cliente.briefing.mainGoal",
+    body_field="cliente.briefing.briefingDetails",
+    image_shapes=frozenset({"PINK_IMAGE", "DIGITALBOT_LOGO"}),
+)
+
+PROJECT_TIMELINE = DrawTimeline(
+    shape="GRAPH_SHAPE",
+    field="cliente.briefing.timeLine",
+    stages=(
+        ("flowDrawing", RGBColor(31, 73, 125)),
+        ("drawingHomologation", RGBColor(255, 51, 153)),
+        ("development", RGBColor(128, 110, 180)),
+        ("qaHomologation", RGBColor(0, 0, 255)),
+        ("clientHomologation", RGBColor(0, 176, 240)),
+    ),
+)
+
+PROPOSAL_SPECS = {
+    "SQUAD": ProposalSpec(
+        tipo="SQUAD",
+        template_path="templates/squad.pptx",
+        output_name="proposta_squad.pptx",
+        operations=(
+            UPDATE_LOGO,
+            SubstituteTokens(tokens={"<NOME_EMPRESA>": "cliente.nome"}),
+            AllocateSlides(
+                shapes={
+                    "COMPOSICAO_PO": "po",
+                    "COMPOSICAO_DEV": "dev",
+                    "COMPOSICAO_UX": "ux",
+                    "COMPOSICAO_CURADOR": "curador",
+                    "COMPOSICAO_ANALISTA": "dados",
+                },
+                field="cliente.briefing",
+                token="<HRS>",
+                suffix="H",
+            ),
+        ),
+    ),
+    "SUSTENTACAO": ProposalSpec(
+        tipo="SUSTENTACAO",
+        template_path="templates/sustentacao.pptx",
+        output_name="proposta_sustentacao.pptx",
+        operations=(UPDATE_LOGO, SUSTENTATION_PLAN),
+    ),
+    "AI AGENT/SUSTENTACAO": ProposalSpec(
+        tipo="AI AGENT/SUSTENTACAO",
+        template_path="templates/ai-agent-e-sustentacao.pptx",
+        output_name="proposta_agent_sustentacao.pptx",
+        operations=(UPDATE_LOGO, PROJECT_SCOPE, PROJECT_TIMELINE, SUSTENTATION_PLAN),
+    ),
+    "CONSTRUCAO": ProposalSpec(
+        tipo="CONSTRUCAO",
+        template_path="templates/construcao.pptx",
+        output_name="proposta_construcao.pptx",
+        operations=(UPDATE_LOGO, PROJECT_SCOPE, PROJECT_TIMELINE, SUSTENTATION_PLAN),
+    ),
+}
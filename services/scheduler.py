@@ -0,0 +1,150 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from services import metrics
+from settings import SCHEDULER_DEFAULT_LANE, SCHEDULER_LANES, SCHEDULER_MAX_RUNNING
+import asyncio
+import heapq
+import itertools
+import logging
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+
+    def __init__(self, tipo: str):
+        self.tipo = tipo
+        super().__init__(f"Fila de {tipo} cheia")
+
+
+@dataclass(frozen=True)
+class LaneConfig:
+    workers: int
+    priority: int
+    queue: int
+
+
+class _Lane:
+
+    def __init__(self, name: str, config: LaneConfig):
+        self.name = name
+        self.config = config
+        self.executor = ThreadPoolExecutor(
+            max_workers=config.workers,
+            thread_name_prefix=f"proposta-{re.sub(r'[^a-z0-9]+', '-', name.lower())}",
+        )
+        self.waiting = 0
+        self.admitted = 0
+
+
+class ProposalScheduler:
+    # um pool de threads e uma fila por tipoProposta; um limite global de gerações
+    # simultâneas é repartido por prioridade, respeitando o teto de cada tipo
+
+    def __init__(self, max_running: int, lanes: dict[str, LaneConfig], default: LaneConfig):
+        self.max_running = max_running
+        self._configs = lanes
+        self._default = default
+        self._lanes = {}
+        self._running = 0
+        self._waiters = []
+        self._seq = itertools.count()
+
+    def _lane(self, tipo: str) -> _Lane:
+        lane = self._lanes.get(tipo)
+        if lane is None:
+            lane = self._lanes[tipo] = _Lane(tipo, self._configs.get(tipo, self._default))
+        return lane
+
+    def _can_start(self, lane: _Lane) -> bool:
+        return self._running < self.max_running and lane.admitted < lane.config.workers
+
+    def _start(self, lane: _Lane):
+        self._running += 1
+        lane.admitted += 1
+
+    def _finish(self, lane: _Lane):
+        self._running -= 1
+        lane.admitted -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        # libera os que esperam, por prioridade e ordem de chegada; quem está no
+        # teto do próprio tipo não segura os outros
+        blocked = []
+
+        while self._waiters and self._running < self.max_running:
+            item = heapq.heappop(self._waiters)
+            _, _, lane, future = item
+
+            if future.done():
+                continue
+
+            if lane.admitted < lane.config.workers:
+                self._start(lane)
+                future.set_result(None)
+            else:
+                blocked.append(item)
+
+        for item in blocked:
+            heapq.heappush(self._waiters, item)
+
+    async def _acquire(self, lane: _Lane):
+        same_lane_waiting = any(waiting_lane is lane for _, _, waiting_lane, _ in self._waiters)
+
+        if self._can_start(lane) and not same_lane_waiting:
+            self._start(lane)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (lane.config.priority, next(self._seq), lane, future))
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            # cancelado depois de liberado: devolve a vaga
+            if future.done() and not future.cancelled():
+                self._finish(lane)
+            raise
+
+    async def run(self, tipo: str, fn, *args):
+        lane = self._lane(tipo)
+
+        if lane.waiting >= lane.config.queue:
+            metrics.inc("proposal_rejected_total", tipo=tipo)
+            raise QueueFull(tipo)
+
+        lane.waiting += 1
+        enqueued = time.perf_counter()
+
+        try:
+            await self._acquire(lane)
+        finally:
+            lane.waiting -= 1
+
+        metrics.observe("proposal_queue_seconds", time.perf_counter() - enqueued, tipo=tipo)
+
+        # a vaga só volta quando a thread termina, mesmo se o cliente desistir antes
+        loop = asyncio.get_running_loop()
+        try:
+            job = lane.executor.submit(fn, *args)
+        except BaseException:
+            self._finish(lane)
+            raise
+
+        job.add_done_callback(lambda _: loop.call_soon_threadsafe(self._finish, lane))
+
+        return await asyncio.wrap_future(job)
+
+    def shutdown(self):
+        for lane in self._lanes.values():
+            lane.executor.shutdown(wait=True)
+
+
+scheduler = ProposalScheduler(
+    SCHEDULER_MAX_RUNNING,
+    {tipo: LaneConfig(**config) for tipo, config in SCHEDULER_LANES.items()},
+    LaneConfig(**SCHEDULER_DEFAULT_LANE),
+)
@@ -0,0 +1,625 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from io import BytesIO
+from lxml import etree
+from PIL import Image, ImageDraw, ImageFont
+from pptx.enum.shapes import MSO_SHAPE_TYPE
+from pptx.enum.text import PP_ALIGN
+from pptx.oxml.ns import nsmap
+from services import metrics
+from services.disk_cache import evict_lru, scan, write_file
+from services.package_io import open_presentation_from_parts, read_package_parts
+from settings import PREVIEW_CACHE_DIR, PREVIEW_CACHE_MAX_BYTES, PREVIEW_WIDTH, PREVIEW_WORKERS
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# muda quando o desenho muda, para não servir miniaturas antigas do cache
+RENDER_VERSION = b"1"
+PREVIEW_KEY_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+# desenha em escala maior e reduz no final: bordas e texto sem serrilhado
+SUPERSAMPLE = 2
+
+EMU_PER_PT = 12700
+DEFAULT_FONT_PT = 18
+# margens padrão do bodyPr/tcPr em EMU (0,1" nas laterais, 0,05" em cima e embaixo)
+DEFAULT_INSETS = (91440, 45720, 91440, 45720)
+DEFAULT_LINE_EMU = 12700
+TABLE_GRID = (191, 191, 191)
+MISSING_IMAGE = (230, 230, 230)
+
+# cores de tema do Office padrão, usadas quando a shape referencia o esquema
+SCHEME_COLORS = {
+    "dk1": (0, 0, 0),
+    "tx1": (0, 0, 0),
+    "lt1": (255, 255, 255),
+    "bg1": (255, 255, 255),
+    "dk2": (68, 84, 106),
+    "tx2": (68, 84, 106),
+    "lt2": (231, 230, 230),
+    "bg2": (231, 230, 230),
+    "accent1": (68, 114, 196),
+    "accent2": (237, 125, 49),
+    "accent3": (165, 165, 165),
+    "accent4": (255, 192, 0),
+    "accent5": (91, 155, 213),
+    "accent6": (112, 173, 71),
+}
+
+ALIGNMENTS = {PP_ALIGN.CENTER: "center", PP_ALIGN.RIGHT: "right"}
+
+# p:style e seus filhos não têm classe no python-pptx: o xpath precisa dos prefixos
+NAMESPACES = nsmap("a", "p", "r")
+
+
+@dataclass
+class TextRun:
+    text: str
+    size: float
+    bold: bool
+    italic: bool
+    color: tuple
+
+
+@dataclass
+class TextBox:
+    box: tuple
+    paragraphs: list[tuple[str, list[TextRun]]]
+    insets: tuple = DEFAULT_INSETS
+    anchor: str = "t"
+    wrap: bool = True
+
+
+@dataclass
+class ShapeBox:
+    box: tuple
+    geometry: str = "rect"
+    fill: tuple = None
+    line: tuple = None
+    line_width: int = DEFAULT_LINE_EMU
+    radius: float = 0
+
+
+@dataclass
+class PictureBox:
+    box: tuple
+    blob: bytes
+
+
+@dataclass
+class SlideDrawing:
+    # o que o slide desenha, já resolvido para caixas em EMU; é só dado, então
+    # pode ser rasterizado fora da thread que leu o XML
+    width: int
+    height: int
+    background: tuple = (255, 255, 255)
+    items: list = field(default_factory=list)
+
+
+def _rgb(value: str) -> tuple:
+    return tuple(int(value[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def _first(element, path: str):
+    found = etree._Element.xpath(element, path, namespaces=NAMESPACES)
+    return found[0] if found else None
+
+
+def _color(element) -> tuple:
+    # primeira cor encontrada dentro do elemento (solidFill, fillRef, lnRef...)
+    if element is None:
+        return None
+
+    srgb = _first(element, "./a:srgbClr/@val")
+    if srgb:
+        return _rgb(srgb)
+
+    scheme = _first(element, "./a:schemeClr/@val")
+    if scheme:
+        return SCHEME_COLORS.get(scheme, SCHEME_COLORS["accent1"])
+
+    system = _first(element, "./a:sysClr/@lastClr")
+    if system:
+        return _rgb(system)
+
+    return None
+
+
+def _fill(spPr, style) -> tuple:
+    if spPr is None:
+        return None
+    if _first(spPr, "./a:noFill") is not None:
+        return None
+
+    solid = _first(spPr, "./a:solidFill")
+    if solid is not None:
+        return _color(solid)
+
+    if style is not None and _first(spPr, "./a:gradFill|./a:blipFill|./a:pattFill") is None:
+        return _color(_first(style, "./a:fillRef"))
+
+    return None
+
+
+def _line(spPr, style) -> tuple:
+    ln = _first(spPr, "./a:ln") if spPr is not None else None
+    width = int(ln.get("w", DEFAULT_LINE_EMU)) if ln is not None else DEFAULT_LINE_EMU
+
+    if ln is not None:
+        if _first(ln, "./a:noFill") is not None:
+            return None, width
+        solid = _first(ln, "./a:solidFill")
+        if solid is not None:
+            return _color(solid), width
+
+    if style is not None:
+        return _color(_first(style, "./a:lnRef")), width
+
+    return None, width
+
+
+def _geometry(spPr, width: int, height: int) -> tuple[str, float]:
+    prst = _first(spPr, "./a:prstGeom/@prst") if spPr is not None else None
+
+    if prst == "ellipse":
+        return "ellipse", 0
+
+    if prst == "roundRect":
+        adj = _first(spPr, "./a:prstGeom/a:avLst/a:gd[@name='adj']/@fmla")
+        ratio = int(adj.split()[-1]) / 100000 if adj else 0.16667
+        return "roundRect", min(width, height) * ratio
+
+    return "rect", 0
+
+
+def _runs(paragraph, default_size: float) -> list[TextRun]:
+    runs = []
+
+    for r in paragraph.runs:
+        font = r.font
+        size = font.size.pt if font.size is not None else default_size
+        color = _color(_first(r._r, "./a:rPr/a:solidFill")) or (0, 0, 0)
+        runs.append(TextRun(r.text, size, bool(font.bold), bool(font.italic), color))
+
+    return runs
+
+
+def _paragraphs(text_frame) -> list:
+    paragraphs = []
+
+    for p in text_frame.paragraphs:
+        size = _first(p._p, "./a:pPr/a:defRPr/@sz|./a:endParaRPr/@sz")
+        default_size = int(size) / 100 if size else DEFAULT_FONT_PT
+        paragraphs.append((ALIGNMENTS.get(p.alignment, "left"), _runs(p, default_size)))
+
+    return paragraphs
+
+
+def _text_box(box: tuple, text_frame) -> TextBox:
+    paragraphs = _paragraphs(text_frame)
+    if not any(run.text.strip() for _, runs in paragraphs for run in runs):
+        return None
+
+    bodyPr = text_frame._bodyPr
+    insets = tuple(
+        int(bodyPr.get(attr, default))
+        for attr, default in zip(("lIns", "tIns", "rIns", "bIns"), DEFAULT_INSETS)
+    )
+    return TextBox(box, paragraphs, insets, bodyPr.get("anchor", "t"), bodyPr.get("wrap") != "none")
+
+
+def _image_blob(shape, blip_path: str = ".//a:blip/@r:embed"):
+    rId = _first(shape._element, blip_path)
+    if rId is None:
+        return None
+
+    try:
+        return shape.part.related_part(rId).blob
+    except KeyError:
+        return None
+
+
+class _Transform:
+    # mapeia coordenadas de filhos de grupo (chOff/chExt) para as do slide
+
+    def __init__(self, dx: float = 0, dy: float = 0, sx: float = 1, sy: float = 1):
+        self.dx, self.dy, self.sx, self.sy = dx, dy, sx, sy
+
+    def box(self, left, top, width, height) -> tuple:
+        return (
+            self.dx + left * self.sx,
+            self.dy + top * self.sy,
+            width * self.sx,
+            height * self.sy,
+        )
+
+    def group(self, grpSpPr) -> "_Transform":
+        xfrm = _first(grpSpPr, "./a:xfrm")
+        if xfrm is None or xfrm.chExt is None or not xfrm.chExt.cx or not xfrm.chExt.cy:
+            return self
+
+        sx = xfrm.ext.cx / xfrm.chExt.cx
+        sy = xfrm.ext.cy / xfrm.chExt.cy
+        inner = _Transform(xfrm.off.x - xfrm.chOff.x * sx, xfrm.off.y - xfrm.chOff.y * sy, sx, sy)
+
+        return _Transform(
+            self.dx + inner.dx * self.sx,
+            self.dy + inner.dy * self.sy,
+            inner.sx * self.sx,
+            inner.sy * self.sy,
+        )
+
+
+def _describe_table(items: list, shape, box: tuple):
+    table = shape.table
+    widths = [col.width for col in table.columns]
+    heights = [row.height for row in table.rows]
+    scale_x = box[2] / (sum(widths) or 1)
+    scale_y = box[3] / (sum(heights) or 1)
+
+    top = box[1]
+    for r, row in enumerate(table.rows):
+        left = box[0]
+
+        for c, cell in enumerate(row.cells):
+            width = widths[c] * scale_x
+
+            if not cell.is_spanned:
+                span_w = sum(widths[c:c + cell.span_width]) * scale_x
+                span_h = sum(heights[r:r + cell.span_height]) * scale_y
+                cell_box = (left, top, span_w, span_h)
+
+                tcPr = cell._tc.tcPr
+                fill = _color(_first(tcPr, "./a:solidFill")) if tcPr is not None else None
+                items.append(ShapeBox(cell_box, fill=fill, line=TABLE_GRID))
+
+                text = _text_box(cell_box, cell.text_frame)
+                if text is not None:
+                    text.insets = (cell.margin_left, cell.margin_top, cell.margin_right, cell.margin_bottom)
+                    text.anchor = tcPr.get("anchor", "t") if tcPr is not None else "t"
+                    items.append(text)
+
+            left += width
+
+        top += heights[r] * scale_y
+
+
+def _describe_shapes(items: list, shapes, transform: _Transform, placeholders: bool):
+    for shape in shapes:
+        if shape.is_placeholder and not placeholders:
+            continue
+
+        if shape.shape_type == MSO_SHAPE_TYPE.GROUP:
+            _describe_shapes(items, shape.shapes, transform.group(shape._element.grpSpPr), placeholders)
+            continue
+
+        if None in (shape.left, shape.top, shape.width, shape.height):
+            continue
+
+        box = transform.box(shape.left, shape.top, shape.width, shape.height)
+
+        if getattr(shape, "has_table", False) and shape.has_table:
+            _describe_table(items, shape, box)
+            continue
+
+        spPr = _first(shape._element, "./p:spPr")
+        style = _first(shape._element, "./p:style")
+
+        blob = _image_blob(shape)
+        if blob is not None:
+            items.append(PictureBox(box, blob))
+        elif spPr is not None:
+            geometry, radius = _geometry(spPr, box[2], box[3])
+            line, line_width = _line(spPr, style)
+            fill = _fill(spPr, style)
+            if fill is not None or line is not None:
+                items.append(ShapeBox(box, geometry, fill, line, line_width * transform.sx, radius))
+
+        if shape.has_text_frame:
+            text = _text_box(box, shape.text_frame)
+            if text is not None:
+                items.append(text)
+
+
+def _background(items: list, base_slide, width: int, height: int) -> tuple:
+    bgPr = _first(base_slide._element, "./p:cSld/p:bg/p:bgPr")
+    if bgPr is None:
+        return None
+
+    blob = _image_blob(base_slide, "./p:cSld/p:bg/p:bgPr/a:blipFill/a:blip/@r:embed")
+    if blob is not None:
+        items.append(PictureBox((0, 0, width, height), blob))
+        return (255, 255, 255)
+
+    return _color(_first(bgPr, "./a:solidFill"))
+
+
+def describe_slide(slide, width: int, height: int) -> SlideDrawing:
+    # mestre e layout por baixo (sem os placeholders, que são só moldes), depois o slide
+    layout = slide.slide_layout
+    master = layout.slide_master
+    drawing = SlideDrawing(width, height)
+
+    for base in (master, layout, slide):
+        background_items = []
+        background = _background(background_items, base, width, height)
+        if background is not None:
+            drawing.background = background
+            drawing.items = background_items
+
+    for base in (master, layout):
+        _describe_shapes(drawing.items, base.shapes, _Transform(), placeholders=False)
+    _describe_shapes(drawing.items, slide.shapes, _Transform(), placeholders=True)
+
+    return drawing
+
+
+@lru_cache(maxsize=64)
+def _font(size: int, bold: bool, italic: bool):
+    names = {
+        (False, False): "DejaVuSans.ttf",
+        (True, False): "DejaVuSans-Bold.ttf",
+        (False, True): "DejaVuSans-Oblique.ttf",
+        (True, True): "DejaVuSans-BoldOblique.ttf",
+    }
+
+    try:
+        return ImageFont.truetype(names[bold, italic], size)
+    except OSError:
+        pass
+
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        # Pillow < 10.1: só a fonte bitmap, de tamanho fixo
+        return ImageFont.load_default()
+
+
+class _Canvas:
+
+    def __init__(self, drawing: SlideDrawing, width: int):
+        self.scale = width * SUPERSAMPLE / drawing.width
+        size = (width * SUPERSAMPLE, round(drawing.height * self.scale))
+        self.image = Image.new("RGB", size, drawing.background)
+        self.draw = ImageDraw.Draw(self.image)
+
+    def px(self, box: tuple) -> tuple:
+        left, top, width, height = (v * self.scale for v in box)
+        return round(left), round(top), round(left + width), round(top + height)
+
+    def shape(self, item: ShapeBox):
+        x0, y0, x1, y1 = self.px(item.box)
+        if x1 <= x0 or y1 <= y0:
+            return
+
+        width = max(1, round(item.line_width * self.scale)) if item.line else 0
+        kwargs = {"fill": item.fill, "outline": item.line, "width": width}
+
+        if item.geometry == "ellipse":
+            self.draw.ellipse((x0, y0, x1, y1), **kwargs)
+        elif item.geometry == "roundRect" and item.radius:
+            self.draw.rounded_rectangle((x0, y0, x1, y1), radius=round(item.radius * self.scale), **kwargs)
+        else:
+            self.draw.rectangle((x0, y0, x1, y1), **kwargs)
+
+    def picture(self, item: PictureBox):
+        x0, y0, x1, y1 = self.px(item.box)
+        size = (x1 - x0, y1 - y0)
+        if size[0] <= 0 or size[1] <= 0:
+            return
+
+        try:
+            with Image.open(BytesIO(item.blob)) as im:
+                # JPEG decodifica direto numa escala menor quando a caixa é pequena
+                im.draft("RGB", size)
+                im = im.convert("RGBA").resize(size, Image.LANCZOS)
+        except Exception:
+            # formato que o PIL não lê (EMF, WMF, SVG...): só marca o espaço
+            self.draw.rectangle((x0, y0, x1, y1), fill=MISSING_IMAGE)
+            return
+
+        self.image.paste(im, (x0, y0), im)
+
+    def _lines(self, item: TextBox, max_width: int) -> list:
+        # quebra por palavra mantendo o estilo de cada run; cada linha sai como
+        # (alinhamento, altura, [(texto, fonte, cor, largura)])
+        lines = []
+
+        for align, runs in item.paragraphs:
+            line, line_width, line_height = [], 0, 0
+
+            if not runs:
+                lines.append((align, round(DEFAULT_FONT_PT * EMU_PER_PT * self.scale * 1.2), []))
+                continue
+
+            for run in runs:
+                font = _font(max(1, round(run.size * EMU_PER_PT * self.scale)), run.bold, run.italic)
+                height = round(run.size * EMU_PER_PT * self.scale * 1.2)
+
+                for word in re.split(r"(\s+)", run.text.replace("\v", " ")):
+                    if not word:
+                        continue
+
+                    width = self.draw.textlength(word, font=font)
+
+                    if item.wrap and line and line_width + width > max_width and not word.isspace():
+                        lines.append((align, line_height, line))
+                        line, line_width, line_height = [], 0, 0
+
+                    if line or not word.isspace():
+                        line.append((word, font, run.color, width))
+                        line_width += width
+                        line_height = max(line_height, height)
+
+            lines.append((align, line_height, line))
+
+        return lines
+
+    def text(self, item: TextBox):
+        x0, y0, x1, y1 = self.px(item.box)
+        left, top, right, bottom = (round(v * self.scale) for v in item.insets)
+        x0, y0, x1, y1 = x0 + left, y0 + top, x1 - right, y1 - bottom
+
+        lines = self._lines(item, x1 - x0)
+        total = sum(height for _, height, _ in lines)
+
+        if item.anchor == "ctr":
+            y = y0 + (y1 - y0 - total) / 2
+        elif item.anchor == "b":
+            y = y1 - total
+        else:
+            y = y0
+
+        for align, height, words in lines:
+            width = sum(w for *_, w in words)
+
+            if align == "center":
+                x = x0 + (x1 - x0 - width) / 2
+            elif align == "right":
+                x = x1 - width
+            else:
+                x = x0
+
+            for word, font, color, word_width in words:
+                self.draw.text((x, y + height), word, font=font, fill=color, anchor="ls")
+                x += word_width
+
+            y += height
+
+    def png(self, width: int) -> bytes:
+        image = self.image.resize((width, round(self.image.height / SUPERSAMPLE)), Image.LANCZOS)
+        buffer = BytesIO()
+        image.save(buffer, "PNG", optimize=True)
+        return buffer.getvalue()
+
+
+def rasterize(drawing: SlideDrawing, width: int = PREVIEW_WIDTH) -> bytes:
+    canvas = _Canvas(drawing, width)
+
+    for item in drawing.items:
+        if isinstance(item, ShapeBox):
+            canvas.shape(item)
+        elif isinstance(item, PictureBox):
+            canvas.picture(item)
+        else:
+            canvas.text(item)
+
+    return canvas.png(width)
+
+
+def _member(part) -> str:
+    return part.partname.lstrip("/")
+
+
+def slide_key(slide, parts: dict[str, bytes], width: int, slide_size: tuple[int, int]) -> str:
+    # hash das partes que definem o desenho: XML do slide, layout, mestre e tema,
+    # mais as imagens relacionadas, e do tamanho do slide (que fica no
+    # presentation.xml). Slides do template que a geração não tocou saem com o
+    # mesmo hash em todas as propostas
+    digest = hashlib.sha256(RENDER_VERSION + b":%d:%d:%d" % (width, *slide_size))
+    layout = slide.slide_layout
+
+    for part in (slide.part, layout.part, layout.slide_master.part):
+        digest.update(parts[_member(part)])
+
+        # iterar as rels devolve as relações já ordenadas por rId
+        for rel in part.rels:
+            if rel.is_external:
+                continue
+            target = rel.target_part
+            if target.content_type.startswith("image/") or "/theme/" in target.partname:
+                digest.update(rel.rId.encode())
+                digest.update(hashlib.sha1(parts.get(_member(target), b"")).digest())
+
+    return digest.hexdigest()
+
+
+class SlidePreviewRenderer:
+    # miniaturas PNG dos slides, sem LibreOffice: o python-pptx lê as shapes e o
+    # PIL desenha retângulos, retângulos arredondados, imagens, tabelas e texto.
+    # Cada slide é rasterizado em paralelo e guardado pelo hash das suas partes
+
+    def __init__(self, directory: str, max_bytes: int, width: int, workers: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.width = width
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="previa")
+        self._lock = threading.Lock()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.png")
+
+    def get(self, key: str):
+        if not PREVIEW_KEY_PATTERN.match(key):
+            return None
+
+        path = self.path(key)
+
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+
+        return path
+
+    def _render_one(self, key: str, drawing: SlideDrawing):
+        png = rasterize(drawing, self.width)
+
+        write_file(self.path(key), png)
+
+    def render(self, pptx_path: str) -> list[str]:
+        logger.info(f"Gerando prévia de {os.path.basename(pptx_path)}...")
+        os.makedirs(self.directory, exist_ok=True)
+        start = time.perf_counter()
+
+        parts = read_package_parts(pptx_path)
+        # sem renumerar: a chave lê as partes pelo nome do membro no zip, e uma
+        # proposta com slides removidos teria slide2.xml apontando para outro slide
+        prs = open_presentation_from_parts(parts, rename_slides=False)
+        width, height = prs.slide_width, prs.slide_height
+
+        keys = []
+        jobs = {}
+
+        for slide in prs.slides:
+            key = slide_key(slide, parts, self.width, (width, height))
+            keys.append(key)
+
+            if key in jobs or self.get(key) is not None:
+                continue
+
+            # a leitura do XML fica nesta thread; só o desenho vai para o pool
+            jobs[key] = self._executor.submit(self._render_one, key, describe_slide(slide, width, height))
+
+        for job in jobs.values():
+            job.result()
+
+        metrics.inc("preview_slides_total", len(keys) - len(jobs), cache="hit")
+        metrics.inc("preview_slides_total", len(jobs), cache="miss")
+        metrics.observe("preview_seconds", time.perf_counter() - start)
+        logger.info(f"Prévia pronta: {len(keys)} slides, {len(jobs)} desenhados")
+
+        if jobs:
+            self.evict()
+
+        return keys
+
+    def _remove(self, key: str):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def evict(self):
+        with self._lock:
+            evict_lru(scan(self.directory, ".png", PREVIEW_KEY_PATTERN), self.max_bytes, self._remove)
+
+
+preview_renderer = SlidePreviewRenderer(PREVIEW_CACHE_DIR, PREVIEW_CACHE_MAX_BYTES, PREVIEW_WIDTH, PREVIEW_WORKERS)
@@ -0,0 +1,114 @@
+from pptx import Presentation
+from services.media_optimizer import optimize_media
+from services.package_io import deflate_parts, read_package_parts
+from services.template_loader import ARTIFACT_VERSION, artifact_path_for, build_index, normalize_parts
+from services.proposal_engine import ProposalSpec
+from services.proposal_specs import PROPOSAL_SPECS
+import argparse
+import hashlib
+import logging
+import os
+import pickle
+import sys
+
+logger = logging.getLogger(__name__)
+
+
+class TemplateValidationError(Exception):
+
+    def __init__(self, template_path: str, problems: list[str]):
+        self.template_path = template_path
+        self.problems = problems
+        super().__init__(f"Template inválido '{template_path}': " + "; ".join(problems))
+
+
+def compile_template(spec: ProposalSpec) -> dict:
+    template_path = spec.template_path
+
+    logger.info(f"Compilando template {template_path}...")
+
+    with open(template_path, "rb") as f:
+        source = f.read()
+
+    stat = os.stat(template_path)
+    prs = Presentation(template_path)
+    index = build_index(prs)
+
+    problems = spec.validate(index)
+    if problems:
+        raise TemplateValidationError(template_path, problems)
+
+    parts = optimize_media(normalize_parts(read_package_parts(template_path)))
+
+    return {
+        "version": ARTIFACT_VERSION,
+        "tipoProposta": spec.tipo,
+        "source": {
+            "path": template_path,
+            "sha256": hashlib.sha256(source).hexdigest(),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        },
+        "index": index,
+        "parts": parts,
+        # entradas de zip já comprimidas: as partes que a geração não altera são
+        # copiadas direto para o .pptx gerado
+        "deflated": deflate_parts(parts),
+    }
+
+
+def write_artifact(artifact: dict, artifact_path: str):
+    os.makedirs(os.path.dirname(artifact_path), exist_ok=True)
+
+    tmp_path = f"{artifact_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    os.replace(tmp_path, artifact_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Valida templates de proposta e gera o artefato pré-compilado."
+    )
+    parser.add_argument(
+        "tipos",
+        nargs="*",
+        help="tipoProposta a compilar (padrão: todos)",
+    )
+    args = parser.parse_args(argv)
+
+    tipos = args.tipos or list(PROPOSAL_SPECS)
+    failed = False
+
+    for tipo in tipos:
+        if tipo not in PROPOSAL_SPECS:
+            print(f"[ERRO] Tipo de proposta inválido: {tipo}", file=sys.stderr)
+            failed = True
+            continue
+
+        spec = PROPOSAL_SPECS[tipo]
+        template_path = spec.template_path
+
+        try:
+            artifact = compile_template(spec)
+        except FileNotFoundError:
+            print(f"[ERRO] {tipo}: template não encontrado em {template_path}", file=sys.stderr)
+            failed = True
+            continue
+        except TemplateValidationError as e:
+            print(f"[ERRO] {tipo}: {template_path}", file=sys.stderr)
+            for problem in e.problems:
+                print(f"  - {problem}", file=sys.stderr)
+            failed = True
+            continue
+
+        artifact_path = artifact_path_for(template_path)
+        write_artifact(artifact, artifact_path)
+        print(f"[OK] {tipo}: {template_path} -> {artifact_path}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+from pptx.oxml import parse_xml
+from pptx.opc.oxml import serialize_part_xml
+import logging
+import os
+import pickle
+import re
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_VERSION = 3
+COMPILED_DIR = "templates/compiled"
+TOKEN_PATTERN = re.compile(r"<[A-Z_]+>")
+
+_artifact_cache = {}
+
+
+def artifact_path_for(template_path: str) -> str:
+    name = os.path.splitext(os.path.basename(template_path))[0]
+    return os.path.join(COMPILED_DIR, f"{name}.pptc")
+
+
+def build_index(prs) -> dict:
+    slides = []
+
+    for slide in prs.slides:
+        shapes = []
+        tokens = set()
+
+        for shape in slide.shapes:
+            shapes.append(shape.name)
+
+            if shape.has_text_frame:
+                for paragraph in shape.text_frame.paragraphs:
+                    for run in paragraph.runs:
+                        tokens.update(TOKEN_PATTERN.findall(run.text))
+
+        slides.append({
+            "partname": str(slide.part.partname),
+            "shapes": shapes,
+            "tokens": sorted(tokens),
+        })
+
+    return {
+        "slides": slides,
+        "layouts": [layout.name for layout in prs.slide_layouts],
+    }
+
+
+def normalize_parts(raw_parts: dict[str, bytes]) -> dict[str, bytes]:
+    # XML já parseado e reserializado no formato que o python-pptx grava
+    parts = {}
+
+    for name, blob in raw_parts.items():
+        if name.endswith((".xml", ".rels")):
+            parts[name] = serialize_part_xml(parse_xml(blob))
+        else:
+            parts[name] = blob
+
+    return parts
+
+
+def load_artifact(template_path: str):
+    artifact_path = artifact_path_for(template_path)
+
+    try:
+        artifact_mtime = os.stat(artifact_path).st_mtime_ns
+        template_stat = os.stat(template_path)
+    except FileNotFoundError:
+        return None
+
+    cached = _artifact_cache.get(artifact_path)
+    if cached and cached[0] == artifact_mtime:
+        artifact = cached[1]
+    else:
+        with open(artifact_path, "rb") as f:
+            artifact = pickle.load(f)
+        _artifact_cache[artifact_path] = (artifact_mtime, artifact)
+
+    source = artifact["source"]
+    if (
+        artifact.get("version") != ARTIFACT_VERSION
+        or source["size"] != template_stat.st_size
+        or source["mtime_ns"] != template_stat.st_mtime_ns
+    ):
+        logger.warning(f"Artefato compilado desatualizado para {template_path}, recompile o template.")
+        return None
+
+    return artifact
+
@@ -0,0 +1,228 @@
+from services.media_optimizer import optimize_media
+from services.package_io import deflate_parts, read_package_parts, open_presentation_from_parts
+from services.template_loader import ARTIFACT_VERSION, load_artifact, artifact_path_for, build_index, normalize_parts
+from settings import TEMPLATE_STORE_DIR, TEMPLATE_STORE_CHECK_INTERVAL
+import hashlib
+import json
+import logging
+import mmap
+import os
+import stat
+import struct
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem lock entre processos
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+STORE_MAGIC = b"PPTXSTORE3"
+_HEADER = struct.Struct("<Q")
+
+_stores = {}
+_locks = {}
+_lock = threading.Lock()
+
+
+def _fingerprint(template_path: str) -> tuple:
+    stat = os.stat(template_path)
+
+    try:
+        artifact_mtime = os.stat(artifact_path_for(template_path)).st_mtime_ns
+    except FileNotFoundError:
+        artifact_mtime = None
+
+    # a versão entra para que um store publicado por código antigo seja refeito
+    return (stat.st_size, stat.st_mtime_ns, artifact_mtime, ARTIFACT_VERSION)
+
+
+def _check_private(path: str):
+    # o store vive numa área que outros usuários do host também escrevem (/dev/shm):
+    # só anexa o que é deste usuário e ninguém mais pode alterar
+    info = os.stat(path)
+
+    if info.st_uid != os.getuid() or info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise PermissionError(f"Store de templates não é privado deste usuário: {path}")
+
+
+def _private_dir(directory: str):
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    _check_private(directory)
+
+
+def store_path_for(template_path: str) -> str:
+    name = os.path.splitext(os.path.basename(template_path))[0]
+    # o diretório pode ser compartilhado por mais de uma instalação no mesmo host
+    suffix = hashlib.sha1(os.path.abspath(template_path).encode()).hexdigest()[:8]
+    return os.path.join(TEMPLATE_STORE_DIR, f"{name}-{suffix}.store")
+
+
+class SharedTemplate:
+    # template mapeado só para leitura; as páginas são compartilhadas entre os
+    # workers e cada requisição recebe uma cópia própria apenas do XML que parseia
+
+    def __init__(self, path: str, mm: mmap.mmap, header: dict, data_start: int):
+        self.path = path
+        self.fingerprint = tuple(header["fingerprint"])
+        self.sha256 = header["sha256"]
+        self.index = header["index"]
+
+        view = memoryview(mm)
+        self._parts = {
+            name: view[data_start + offset:data_start + offset + length]
+            for name, (offset, length) in header["parts"].items()
+        }
+        # cada parte também já comprimida como entrada de zip: (tamanho, crc, dados)
+        self._deflated = {
+            name: (len(self._parts[name]), crc, view[data_start + offset:data_start + offset + length])
+            for name, (offset, length, crc) in header["deflated"].items()
+        }
+
+    @classmethod
+    def attach(cls, path: str):
+        _check_private(os.path.dirname(path))
+        _check_private(path)
+
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if mm[:len(STORE_MAGIC)] != STORE_MAGIC:
+            raise ValueError(f"Arquivo de store inválido: {path}")
+
+        start = len(STORE_MAGIC)
+        (header_len,) = _HEADER.unpack_from(mm, start)
+        start += _HEADER.size
+        header = json.loads(mm[start:start + header_len])
+
+        return cls(path, mm, header, start + header_len)
+
+    @property
+    def parts(self):
+        return self._parts
+
+    def static_entry(self, name: str):
+        # (blob, entrada comprimida) da parte do template, para o save_presentation
+        # copiar a entrada quando a parte sair igual
+        deflated = self._deflated.get(name)
+        if deflated is None:
+            return None
+        return self._parts[name], deflated
+
+    def open_presentation(self):
+        # partes binárias (mídia) continuam apontando para o mmap até alguém
+        # substituir o blob: cópia só na escrita
+        return open_presentation_from_parts(self._parts)
+
+
+def _build_store(template_path: str, path: str, fingerprint: tuple):
+    logger.info(f"Publicando template {template_path} no store compartilhado...")
+
+    artifact = load_artifact(template_path)
+
+    with open(template_path, "rb") as f:
+        sha256 = hashlib.sha256(f.read()).hexdigest()
+
+    if artifact is not None:
+        parts = artifact["parts"]
+        index = artifact["index"]
+        deflated = artifact["deflated"]
+    else:
+        parts = optimize_media(normalize_parts(read_package_parts(template_path)))
+        index = build_index(open_presentation_from_parts(parts))
+        deflated = deflate_parts(parts)
+
+    layout = {}
+    deflated_layout = {}
+    offset = 0
+    for name, blob in parts.items():
+        layout[name] = (offset, len(blob))
+        offset += len(blob)
+    for name, (_, crc, raw) in deflated.items():
+        deflated_layout[name] = (offset, len(raw), crc)
+        offset += len(raw)
+
+    # offsets relativos ao início dos dados, que vêm logo depois do cabeçalho
+    # JSON e não pickle: ler o cabeçalho nunca executa nada
+    header = json.dumps({
+        "fingerprint": fingerprint,
+        "sha256": sha256,
+        "index": index,
+        "parts": layout,
+        "deflated": deflated_layout,
+    }).encode()
+
+    _private_dir(os.path.dirname(path))
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+
+    with open(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb") as f:
+        f.write(STORE_MAGIC)
+        f.write(_HEADER.pack(len(header)))
+        f.write(header)
+        for blob in parts.values():
+            f.write(blob)
+        for _, _, raw in deflated.values():
+            f.write(raw)
+
+    os.replace(tmp_path, path)
+
+
+def _attach_or_build(template_path: str, fingerprint: tuple) -> SharedTemplate:
+    path = store_path_for(template_path)
+    _private_dir(os.path.dirname(path))
+
+    with open(os.open(f"{path}.lock", os.O_RDWR | os.O_CREAT, 0o600), "a+b") as lock_file:
+        # um único worker reconstrói; os outros esperam e só anexam o resultado
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+        try:
+            if os.path.exists(path):
+                try:
+                    template = SharedTemplate.attach(path)
+                except ValueError:
+                    # formato antigo ou corrompido: refeito abaixo
+                    template = None
+                if template is not None and template.fingerprint == fingerprint:
+                    return template
+
+            _build_store(template_path, path, fingerprint)
+            return SharedTemplate.attach(path)
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _path_lock(template_path: str) -> threading.Lock:
+    # o lock global só cobre achar/criar o lock do template: publicar um template
+    # não segura o checkout dos outros tipos de proposta
+    with _lock:
+        lock = _locks.get(template_path)
+        if lock is None:
+            lock = _locks[template_path] = threading.Lock()
+        return lock
+
+
+def checkout(template_path: str) -> SharedTemplate:
+    with _path_lock(template_path):
+        entry = _stores.get(template_path)
+        now = time.monotonic()
+
+        if entry is not None and now - entry[1] < TEMPLATE_STORE_CHECK_INTERVAL:
+            return entry[0]
+
+        fingerprint = _fingerprint(template_path)
+
+        if entry is not None and entry[0].fingerprint == fingerprint:
+            _stores[template_path] = (entry[0], now)
+            return entry[0]
+
+        if entry is not None:
+            logger.info(f"Template {template_path} alterado, recarregando store compartilhado...")
+
+        # o mmap antigo é liberado pelo GC quando as requisições em andamento terminam
+        template = _attach_or_build(template_path, fingerprint)
+        _stores[template_path] = (template, now)
+        return template
@@ -0,0 +1,77 @@
+import json
+import os
+
+# área compartilhada entre os workers do uvicorn; /dev/shm fica em memória no Linux
+TEMPLATE_STORE_DIR = os.getenv(
+    "TEMPLATE_STORE_DIR",
+    "/dev/shm/proposal-templates" if os.path.isdir("/dev/shm") else "templates/compiled/store",
+)
+# resolução (ppi) com que as imagens do template são guardadas no tamanho em que aparecem;
+# maiores que isso são reduzidas uma vez, ao carregar o template (0 desliga a redução)
+TEMPLATE_MEDIA_DPI = int(os.getenv("TEMPLATE_MEDIA_DPI", "220"))
+# intervalo (s) entre as checagens de template alterado em disco
+TEMPLATE_STORE_CHECK_INTERVAL = float(os.getenv("TEMPLATE_STORE_CHECK_INTERVAL", "2"))
+
+# propostas geradas: orçamento de disco, validade e LRU
+OUTPUT_DIR = os.getenv("OUTPUT_DIR", "output")
+OUTPUT_MAX_BYTES = int(os.getenv("OUTPUT_MAX_BYTES", str(1024 * 1024 * 1024)))
+OUTPUT_TTL_SECONDS = int(os.getenv("OUTPUT_TTL_SECONDS", str(24 * 60 * 60)))
+# a limpeza trabalha num índice em memória; o diretório é relido a cada tantos segundos
+# para contar o que os outros workers gravaram ou removeram
+OUTPUT_SCAN_SECONDS = float(os.getenv("OUTPUT_SCAN_SECONDS", "60"))
+# guarda cada .pptx só com as partes que diferem do template (remontado no download)
+OUTPUT_DELTA = os.getenv("OUTPUT_DELTA", "true").lower() in ("1", "true", "yes")
+
+# profiling sob demanda: header X-Profile: 1 (se habilitado) ou amostragem aleatória
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_INTERVAL = float(os.getenv("PROFILING_INTERVAL", "0.005"))
+PROFILING_DIR = os.getenv("PROFILING_DIR", "diagnostics/profiles")
+PROFILING_KEEP = int(os.getenv("PROFILING_KEEP", "50"))
+
+# contabilidade de memória por etapa do gerador (tracemalloc; tem custo, use em diagnóstico)
+MEMORY_ACCOUNTING_ENABLED = os.getenv("MEMORY_ACCOUNTING_ENABLED", "false").lower() in ("1", "true", "yes")
+
+# upload do formulário /proposal/generate: lido em streaming, rejeitado assim que passa do limite
+PAYLOAD_MAX_BYTES = int(os.getenv("PAYLOAD_MAX_BYTES", str(1024 * 1024)))
+LOGO_MAX_BYTES = int(os.getenv("LOGO_MAX_BYTES", str(5 * 1024 * 1024)))
+LOGO_MAX_DIMENSION = int(os.getenv("LOGO_MAX_DIMENSION", "4096"))
+
+# logo por URL (campo logoUrl do payload): timeouts (s), pool de conexões e cache local.
+# Dentro de LOGO_CACHE_FRESH_SECONDS a cópia em disco é usada sem consultar a origem
+LOGO_FETCH_CONNECT_TIMEOUT = float(os.getenv("LOGO_FETCH_CONNECT_TIMEOUT", "3"))
+LOGO_FETCH_TIMEOUT = float(os.getenv("LOGO_FETCH_TIMEOUT", "10"))
+LOGO_FETCH_POOL_SIZE = int(os.getenv("LOGO_FETCH_POOL_SIZE", "16"))
+LOGO_CACHE_DIR = os.getenv("LOGO_CACHE_DIR", os.path.join(OUTPUT_DIR, ".logos"))
+LOGO_CACHE_MAX_BYTES = int(os.getenv("LOGO_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+LOGO_CACHE_FRESH_SECONDS = int(os.getenv("LOGO_CACHE_FRESH_SECONDS", "300"))
+# libera logoUrl apontando para a rede interna/localhost (bloqueado por padrão)
+LOGO_URL_ALLOW_PRIVATE = os.getenv("LOGO_URL_ALLOW_PRIVATE", "false").lower() in ("1", "true", "yes")
+
+# máximo de variantes geradas numa única requisição (opção "variants" do payload)
+VARIANTS_MAX = int(os.getenv("VARIANTS_MAX", "8"))
+
+# threads que serializam e comprimem as partes no save (1 = sequencial)
+SAVE_WORKERS = int(os.getenv("SAVE_WORKERS", str(min(os.cpu_count() or 1, 8))))
+
+# agendamento da geração: cada tipoProposta tem sua fila e seu pool de threads.
+# workers: gerações simultâneas do tipo; priority: menor passa na frente quando as
+# vagas globais (SCHEDULER_MAX_RUNNING) estão disputadas; queue: máximo esperando (503 acima)
+SCHEDULER_MAX_RUNNING = int(os.getenv("SCHEDULER_MAX_RUNNING", str(os.cpu_count() or 4)))
+SCHEDULER_DEFAULT_LANE = {"workers": 2, "priority": 1, "queue": 16}
+SCHEDULER_LANES = {
+    "SUSTENTACAO": {"workers": 4, "priority": 0, "queue": 64},
+    "SQUAD": {"workers": 4, "priority": 0, "queue": 64},
+    "CONSTRUCAO": {"workers": 2, "priority": 1, "queue": 16},
+    "AI AGENT/SUSTENTACAO": {"workers": 2, "priority": 1, "queue": 16},
+}
+# ex.: SCHEDULER_LANES='{"CONSTRUCAO": {"workers": 3}}' sobrescreve só o que vier
+for _tipo, _lane in json.loads(os.getenv("SCHEDULER_LANES", "{}")).items():
+    SCHEDULER_LANES[_tipo] = {**SCHEDULER_LANES.get(_tipo, SCHEDULER_DEFAULT_LANE), **_lane}
+
+# prévia dos slides (PNG); o cache é por hash das partes do slide, então os slides
+# do template que a geração não altera são desenhados uma vez só
+PREVIEW_CACHE_DIR = os.getenv("PREVIEW_CACHE_DIR", os.path.join(OUTPUT_DIR, ".previews"))
+PREVIEW_CACHE_MAX_BYTES = int(os.getenv("PREVIEW_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+PREVIEW_WIDTH = int(os.getenv("PREVIEW_WIDTH", "480"))
+PREVIEW_WORKERS = int(os.getenv("PREVIEW_WORKERS", str(os.cpu_count() or 4)))
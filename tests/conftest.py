@@ -0,0 +1,132 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+import json
+import os
+import tempfile
+import threading
+
+# os módulos leem os diretórios de settings ao importar: tudo que os testes gravam
+# fica num diretório temporário, nunca no output/ de verdade
+WORKDIR = tempfile.mkdtemp(prefix="proposal-tests-")
+os.environ["OUTPUT_DIR"] = os.path.join(WORKDIR, "output")
+os.environ["TEMPLATE_STORE_DIR"] = os.path.join(WORKDIR, "store")
+os.environ["PROFILING_DIR"] = os.path.join(WORKDIR, "profiles")
+
+import pytest  # noqa: E402
+from PIL import Image  # noqa: E402
+from tests.templates import build_templates  # noqa: E402
+
+SCOPE_DETAILS = [f"- Item de escopo numero {i} com um texto razoavelmente longo para paginar" for i in range(25)]
+
+SQUAD = {
+    "tipoProposta": "SQUAD",
+    "cliente": {"nome": "ACME", "briefing": {"po": "20", "dev": "40", "ux": "0", "curador": "10", "dados": "0"}},
+}
+SUSTENTACAO = {"tipoProposta": "SUSTENTACAO", "cliente": {"nome": "ACME", "briefing": {"adequatePlan": "gold"}}}
+CONSTRUCAO = {
+    "tipoProposta": "CONSTRUCAO",
+    "cliente": {
+        "nome": "ACME",
+        "briefing": {
+            "mainGoal": "Automatizar atendimento",
+            "briefingDetails": SCOPE_DETAILS,
+            "timeLine": {
+                "flowDrawing": 1.5,
+                "drawingHomologation": "1",
+                "development": "4",
+                "qaHomologation": "2",
+                "clientHomologation": "0.5",
+            },
+            "adequatePlan": "silver",
+        },
+    },
+}
+AI_AGENT = {**CONSTRUCAO, "tipoProposta": "AI AGENT/SUSTENTACAO"}
+PAYLOADS = [SQUAD, SUSTENTACAO, CONSTRUCAO, AI_AGENT]
+
+
+def make_png(color: str, size: tuple[int, int] = (40, 20)) -> bytes:
+    buffer = BytesIO()
+    Image.new("RGB", size, color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def workdir():
+    # os specs apontam para templates/<nome>.pptx relativo ao diretório atual
+    images = os.path.join(WORKDIR, "images")
+    os.makedirs(images, exist_ok=True)
+    paths = {"logo": os.path.join(images, "logo.png"), "pink": os.path.join(images, "pink.png")}
+    with open(paths["logo"], "wb") as f:
+        f.write(make_png("navy", (200, 100)))
+    with open(paths["pink"], "wb") as f:
+        f.write(make_png("pink", (120, 120)))
+
+    build_templates(os.path.join(WORKDIR, "templates"), paths)
+
+    cwd = os.getcwd()
+    os.chdir(WORKDIR)
+    yield WORKDIR
+    os.chdir(cwd)
+
+
+@pytest.fixture(scope="session")
+def client(workdir):
+    from fastapi.testclient import TestClient
+    from main import app
+
+    return TestClient(app)
+
+
+def post_proposal(client, data: dict, logo: bytes = None):
+    # /proposal/generate com o payload e, se houver, o logo
+    files = [("payload", (None, json.dumps(data)))]
+    if logo is not None:
+        files.append(("logo", ("logo.png", logo, "image/png")))
+    return client.post("/proposal/generate", files=files)
+
+
+class OriginServer:
+    # servidor HTTP local: routes[path] = (status, headers, corpo) ou função(handler)
+    # que devolve isso; requests guarda (path, headers) de cada requisição recebida
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server.requests.append((self.path, dict(self.headers)))
+                route = server.routes.get(self.path, (404, {}, b""))
+                status, headers, body = route(self) if callable(route) else route
+
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.port = self._httpd.server_port
+        self._thread = threading.Thread(target=self._httpd.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.port}{path}"
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture
+def origin():
+    server = OriginServer()
+    yield server
+    server.close()
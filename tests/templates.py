@@ -0,0 +1,102 @@
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE
+from pptx.util import Inches
+import os
+
+# templates mínimos com os shapes que cada spec procura; os .pptx de verdade
+# vêm dos designers e não ficam no repositório
+
+PLANS = ["STARTER_PLAN", "SILVER_PLAN", "GOLD_PLAN", "DIAMOND_PLAN"]
+
+
+def _blank(prs):
+    return prs.slides.add_slide(prs.slide_layouts[6])
+
+
+def _text(slide, name: str, text: str, y: float = 1):
+    shape = slide.shapes.add_textbox(Inches(1), Inches(y), Inches(4), Inches(1))
+    shape.name = name
+    shape.text_frame.text = text
+    return shape
+
+
+def _box(slide, name: str, text: str, x: float, y: float, width: float, height: float):
+    shape = slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, Inches(x), Inches(y), Inches(width), Inches(height))
+    shape.name = name
+    shape.text_frame.text = text
+    return shape
+
+
+def _picture(slide, name: str, image: str, x: float, y: float, width: float, height: float):
+    shape = slide.shapes.add_picture(image, Inches(x), Inches(y), Inches(width), Inches(height))
+    shape.name = name
+    return shape
+
+
+def _cover(prs, images: dict):
+    slide = _blank(prs)
+    _picture(slide, "CLIENT_LOGO", images["logo"], 0.5, 0.5, 2, 1)
+    _text(slide, "TITLE", "Proposta para <NOME_EMPRESA>", y=3)
+
+
+def _plans(prs):
+    for plan in PLANS:
+        _box(_blank(prs), plan, plan, 1, 1, 3, 1)
+
+
+def _squad(path: str, images: dict):
+    prs = Presentation()
+    _cover(prs, images)
+
+    for role in ["COMPOSICAO_PO", "COMPOSICAO_DEV", "COMPOSICAO_UX", "COMPOSICAO_CURADOR", "COMPOSICAO_ANALISTA"]:
+        slide = _blank(prs)
+        _text(slide, role, role)
+        _text(slide, "HRS_TEXT", "Dedicacao <HRS> semanais para <NOME_EMPRESA>", y=3)
+
+    _text(_blank(prs), "END", "Obrigado <NOME_EMPRESA>")
+    prs.save(path)
+
+
+def _sustentacao(path: str, images: dict):
+    prs = Presentation()
+    _cover(prs, images)
+    _plans(prs)
+    prs.save(path)
+
+
+def _construcao(path: str, images: dict):
+    prs = Presentation()
+    _cover(prs, images)
+
+    slide = _blank(prs)
+    _picture(slide, "PINK_IMAGE", images["pink"], 8, 0, 2, 2)
+    _picture(slide, "DIGITALBOT_LOGO", images["logo"], 8, 6, 1.5, 0.7)
+    _box(slide, "SCOPE", "ESCOPO", 0.2, 0.2, 4, 0.6)
+    _box(slide, "SCOPE_MAIN_GOAL", "x", 0.2, 1, 7, 0.8)
+    _box(slide, "SCOPE_DETAILS", "y", 0.2, 2, 7, 4.5)
+
+    graph = _blank(prs).shapes.add_table(6, 14, Inches(0.2), Inches(1), Inches(9.6), Inches(3))
+    graph.name = "GRAPH_SHAPE"
+    for column in range(14):
+        graph.table.cell(0, column).text = "-"
+    for row, name in enumerate(["Etapa", "Fluxo", "Hom", "Dev", "QA", "Cliente"]):
+        graph.table.cell(row, 0).text = name
+
+    _plans(prs)
+    prs.save(path)
+
+
+BUILDERS = {
+    "squad.pptx": _squad,
+    "sustentacao.pptx": _sustentacao,
+    "construcao.pptx": _construcao,
+    "ai-agent-e-sustentacao.pptx": _construcao,
+}
+
+
+def build_templates(directory: str, images: dict):
+    # images: {"logo": caminho, "pink": caminho}
+    os.makedirs(directory, exist_ok=True)
+
+    for name, build in BUILDERS.items():
+        build(os.path.join(directory, name), images)
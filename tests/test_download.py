@@ -0,0 +1,46 @@
+from tests.conftest import SUSTENTACAO, make_png, post_proposal
+import io
+import pytest
+import zipfile
+
+LOGO = make_png("teal")
+
+
+@pytest.fixture(scope="module")
+def proposal(client):
+    response = post_proposal(client, SUSTENTACAO, LOGO)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_downloads_the_generated_proposal(client, proposal):
+    response = client.get(proposal["url"])
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+    assert "proposta_sustentacao.pptx" in response.headers["content-disposition"]
+    assert zipfile.ZipFile(io.BytesIO(response.content)).testzip() is None
+
+
+def test_range_and_head(client, proposal):
+    full = client.get(proposal["url"]).content
+
+    partial = client.get(proposal["url"], headers={"Range": "bytes=100-199"})
+    assert partial.status_code == 206
+    assert partial.content == full[100:200]
+
+    head = client.head(proposal["url"])
+    assert head.status_code == 200
+    assert head.headers["content-length"] == str(len(full))
+    assert head.content == b""
+
+
+def test_unknown_or_invalid_id(client):
+    assert client.get("/proposal/files/" + "0" * 32).status_code == 404
+    assert client.get("/proposal/files/..%2Fsettings.py").status_code == 404
+
+
+def test_head_is_not_a_separate_operation(client):
+    paths = client.get("/openapi.json").json()["paths"]
+
+    assert list(paths["/proposal/files/{file_id}"]) == ["get", "patch"]
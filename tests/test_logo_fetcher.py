@@ -0,0 +1,169 @@
+from services import logo_fetcher
+from services.logo_fetcher import MAX_REDIRECTS, LogoFetcher, LogoFetchError, OriginUnavailable
+from tests.conftest import SUSTENTACAO, make_png, post_proposal
+import io
+import os
+import pytest
+import zipfile
+
+LOGO = make_png("red")
+
+
+@pytest.fixture
+def fetcher(tmp_path, monkeypatch):
+    # o servidor de teste é local: só os testes de SSRF mantêm o bloqueio
+    monkeypatch.setattr(logo_fetcher, "LOGO_URL_ALLOW_PRIVATE", True)
+    return LogoFetcher(str(tmp_path), 10 * 1024 * 1024, 0, 2)
+
+
+@pytest.fixture
+def checked_fetcher(tmp_path, monkeypatch):
+    # "logo.example" resolve para o servidor local como se fosse um endereço público
+    checked = []
+    allowed_address = logo_fetcher._allowed_address
+
+    def fake_allowed(host, port):
+        checked.append((host, port))
+        if host == "logo.example":
+            return "127.0.0.1"
+        return allowed_address(host, port)
+
+    monkeypatch.setattr(logo_fetcher, "_allowed_address", fake_allowed)
+    fetcher = LogoFetcher(str(tmp_path), 10 * 1024 * 1024, 0, 2)
+    fetcher.checked = checked
+    return fetcher
+
+
+def test_blocks_private_address(tmp_path, origin):
+    origin.routes["/logo.png"] = (200, {}, LOGO)
+    fetcher = LogoFetcher(str(tmp_path), 10 * 1024 * 1024, 0, 2)
+
+    with pytest.raises(LogoFetchError, match="não permitido"):
+        fetcher.fetch(origin.url("/logo.png"))
+
+    assert origin.requests == []
+
+
+def test_connects_to_the_checked_address(checked_fetcher, origin):
+    origin.routes["/logo.png"] = (200, {}, LOGO)
+
+    assert checked_fetcher.fetch(f"http://logo.example:{origin.port}/logo.png") == LOGO
+    assert checked_fetcher.checked == [("logo.example", origin.port)]
+    assert origin.requests[0][1]["Host"] == f"logo.example:{origin.port}"
+
+
+def test_checks_every_redirect_hop(checked_fetcher, origin):
+    origin.routes["/redir"] = (302, {"Location": "http://10.0.0.1/logo.png"}, b"")
+
+    with pytest.raises(LogoFetchError, match="não permitido"):
+        checked_fetcher.fetch(f"http://logo.example:{origin.port}/redir")
+
+    assert [path for path, _ in origin.requests] == ["/redir"]
+    assert checked_fetcher.checked[-1] == ("10.0.0.1", 80)
+
+
+def test_rejects_redirect_to_other_scheme(fetcher, origin):
+    origin.routes["/redir"] = (302, {"Location": "file:///etc/passwd"}, b"")
+
+    with pytest.raises(LogoFetchError, match="inválida"):
+        fetcher.fetch(origin.url("/redir"))
+
+
+def test_follows_redirects(fetcher, origin):
+    origin.routes["/a"] = (301, {"Location": "/b"}, b"")
+    origin.routes["/b"] = (302, {"Location": origin.url("/logo.png")}, b"")
+    origin.routes["/logo.png"] = (200, {}, LOGO)
+
+    assert fetcher.fetch(origin.url("/a")) == LOGO
+    assert [path for path, _ in origin.requests] == ["/a", "/b", "/logo.png"]
+
+
+def test_stops_after_too_many_redirects(fetcher, origin):
+    origin.routes["/loop"] = (302, {"Location": "/loop"}, b"")
+
+    with pytest.raises(LogoFetchError, match="redirecionamentos"):
+        fetcher.fetch(origin.url("/loop"))
+
+    assert len(origin.requests) == MAX_REDIRECTS + 1
+
+
+def test_revalidates_with_etag(fetcher, origin):
+    def logo(handler):
+        if handler.headers.get("If-None-Match") == '"v1"':
+            return 304, {}, b""
+        return 200, {"ETag": '"v1"'}, LOGO
+
+    origin.routes["/logo.png"] = logo
+    url = origin.url("/logo.png")
+
+    assert fetcher.fetch(url) == LOGO
+    assert fetcher.fetch(url) == LOGO
+    assert origin.requests[0][1].get("If-None-Match") is None
+    assert origin.requests[1][1]["If-None-Match"] == '"v1"'
+
+    # dentro do prazo de frescor a cópia local serve sem consultar a origem
+    fetcher.fresh_seconds = 300
+    assert fetcher.fetch(url) == LOGO
+    assert len(origin.requests) == 2
+
+
+def test_serves_stale_copy_when_origin_fails(fetcher, origin):
+    origin.routes["/logo.png"] = (200, {"ETag": '"v1"'}, LOGO)
+    url = origin.url("/logo.png")
+    fetcher.fetch(url)
+
+    origin.routes["/logo.png"] = (503, {}, b"")
+    assert fetcher.fetch(url) == LOGO
+
+    # 4xx não é falha da origem: a resposta dela vale
+    origin.routes["/logo.png"] = (404, {}, b"")
+    with pytest.raises(LogoFetchError, match="404"):
+        fetcher.fetch(url)
+
+    origin.close()
+    assert fetcher.fetch(url) == LOGO
+
+
+def test_origin_failure_without_cache(fetcher, origin):
+    origin.routes["/logo.png"] = (500, {}, b"")
+
+    with pytest.raises(OriginUnavailable):
+        fetcher.fetch(origin.url("/logo.png"))
+
+
+def test_evicts_least_recently_used(fetcher, origin):
+    logos = {f"/{color}.png": make_png(color) for color in ("red", "green", "blue")}
+    for path, data in logos.items():
+        origin.routes[path] = (200, {}, data)
+    red, green, blue = (origin.url(path) for path in logos)
+
+    fetcher.max_bytes = len(logos["/red.png"]) + len(logos["/green.png"]) + 1
+    fetcher.fetch(red)
+    fetcher.fetch(green)
+
+    # red foi usado por último: green é o menos recente quando blue entra
+    os.utime(fetcher._paths(green)[0], (1, 1))
+    os.utime(fetcher._paths(red)[0], (2, 2))
+    fetcher.fetch(blue)
+
+    assert os.path.exists(fetcher._paths(red)[0])
+    assert not os.path.exists(fetcher._paths(green)[0])
+    assert not os.path.exists(fetcher._paths(green)[1])
+    assert os.path.exists(fetcher._paths(blue)[0])
+
+
+def test_generates_with_logo_url(client, origin, monkeypatch):
+    monkeypatch.setattr(logo_fetcher, "LOGO_URL_ALLOW_PRIVATE", True)
+    monkeypatch.setattr(logo_fetcher.logo_fetcher, "fresh_seconds", 0)
+    origin.routes["/logo.png"] = (200, {"Content-Type": "image/png"}, LOGO)
+    origin.routes["/texto.png"] = (200, {"Content-Type": "image/png"}, b"nao e imagem")
+    origin.routes["/sumiu.png"] = (404, {}, b"")
+
+    response = post_proposal(client, {**SUSTENTACAO, "logoUrl": origin.url("/logo.png")})
+    assert response.status_code == 200
+    package = zipfile.ZipFile(io.BytesIO(client.get(response.json()["url"]).content))
+    assert LOGO in [package.read(name) for name in package.namelist() if name.startswith("ppt/media/")]
+
+    # mesmas respostas do upload para imagem inválida; falha da origem é 502
+    assert post_proposal(client, {**SUSTENTACAO, "logoUrl": origin.url("/texto.png")}).status_code == 415
+    assert post_proposal(client, {**SUSTENTACAO, "logoUrl": origin.url("/sumiu.png")}).status_code == 502
@@ -0,0 +1,79 @@
+from PIL import Image
+from pptx import Presentation
+from pptx.util import Inches
+from services.media_optimizer import optimize_media
+from services.package_io import open_presentation_from_parts, read_package_parts
+from tests.conftest import make_png
+import io
+import random
+
+
+def _noise(size: tuple[int, int], fmt: str = "PNG") -> bytes:
+    # ruído não comprime: a redução aparece no tamanho
+    rng = random.Random(size[0])
+    image = Image.frombytes("RGB", size, rng.randbytes(size[0] * size[1] * 3))
+    buffer = io.BytesIO()
+    image.save(buffer, fmt)
+    return buffer.getvalue()
+
+
+def _package(tmp_path, images: list[tuple[bytes, float]]) -> dict[str, bytes]:
+    # um slide por imagem, exibida com a largura dada em polegadas
+    prs = Presentation()
+    for blob, width in images:
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        slide.shapes.add_picture(io.BytesIO(blob), Inches(1), Inches(1), width=Inches(width))
+    prs.save(tmp_path / "template.pptx")
+    return read_package_parts(str(tmp_path / "template.pptx"))
+
+
+def _pictures(parts: dict[str, bytes]) -> list[bytes]:
+    prs = open_presentation_from_parts(parts)
+    return [shape.image.blob for slide in prs.slides for shape in slide.shapes]
+
+
+def test_downscales_to_the_displayed_size(tmp_path):
+    parts = _package(tmp_path, [(_noise((2000, 1000)), 1)])
+
+    optimized = optimize_media(parts, dpi=220)
+    [blob] = _pictures(optimized)
+
+    with Image.open(io.BytesIO(blob)) as image:
+        # 1 x 0.5 polegada a 220 dpi
+        assert image.format == "PNG"
+        assert image.size == (220, 110)
+    assert len(optimized["ppt/media/image1.png"]) < len(parts["ppt/media/image1.png"])
+
+
+def test_keeps_the_largest_use(tmp_path):
+    image = _noise((2000, 1000))
+    parts = _package(tmp_path, [(image, 1), (image, 4)])
+
+    [blob, same] = _pictures(optimize_media(parts, dpi=100))
+
+    assert blob == same
+    assert Image.open(io.BytesIO(blob)).size == (400, 200)
+
+
+def test_small_or_disabled_is_left_alone(tmp_path):
+    jpeg = _noise((300, 300), "JPEG")
+    parts = _package(tmp_path, [(jpeg, 3), (_noise((2000, 1000)), 1)])
+
+    # JPEG já no tamanho exibido não é recomprimido; dpi 0 desliga a redução
+    assert _pictures(optimize_media(parts, dpi=100))[0] == jpeg
+    assert Image.open(io.BytesIO(_pictures(optimize_media(parts, dpi=0))[1])).size == (2000, 1000)
+
+
+def test_deduplicates_identical_media(tmp_path):
+    logo = make_png("navy", (200, 100))
+    parts = _package(tmp_path, [(logo, 2), (make_png("pink", (200, 100)), 2)])
+    # cópia com outro nome, como a de um template montado colando slides
+    assert b"image2.png" in parts["ppt/slides/_rels/slide2.xml.rels"]
+    parts["ppt/media/image2.png"] = parts["ppt/media/image1.png"]
+
+    optimized = optimize_media(parts, dpi=0)
+
+    assert "ppt/media/image2.png" not in optimized
+    assert b"image2.png" not in optimized["ppt/slides/_rels/slide2.xml.rels"]
+    assert b"image2.png" not in optimized["[Content_Types].xml"]
+    assert len(set(_pictures(optimized))) == 1
@@ -0,0 +1,50 @@
+from routes.proposal_router import _generate
+from services.memory_accounting import MemoryReport, new_report
+from services.proposal_specs import PROPOSAL_SPECS, parse_payload
+from tests.conftest import CONSTRUCAO, SQUAD, make_png
+import json
+import pytest
+import tracemalloc
+
+LOGO = make_png("maroon")
+
+
+@pytest.fixture
+def tracing():
+    tracemalloc.start()
+    yield
+    tracemalloc.stop()
+
+
+def test_disabled_without_tracemalloc():
+    assert new_report("SQUAD").verify_released() == []
+    assert not isinstance(new_report("SQUAD"), MemoryReport)
+
+
+def test_reports_every_stage(tracing):
+    memory, _, _ = _generate(PROPOSAL_SPECS["CONSTRUCAO"], CONSTRUCAO, LOGO, {}, 10)
+
+    assert {"template", "PaginateText", "DrawTimeline", "save"} <= set(memory.stages)
+
+
+@pytest.mark.parametrize("data", [SQUAD, CONSTRUCAO], ids=lambda data: data["tipoProposta"])
+def test_no_leak_reported_while_the_result_is_still_held(tracing, data):
+    # o Future do scheduler segura o resultado de _generate até depois da resposta
+    result = _generate(PROPOSAL_SPECS[data["tipoProposta"]], data, LOGO, {}, 10)
+
+    assert result[0].verify_released() == []
+
+
+def test_variants_release_every_copy(tracing):
+    data = parse_payload(json.dumps({**SQUAD, "variants": [{"label": "a"}, {"label": "b", "overrides": {}}]}))
+    result = _generate(PROPOSAL_SPECS["SQUAD"], data, LOGO, {}, 10)
+
+    assert result[0].verify_released() == []
+
+
+def test_reports_objects_still_alive(tracing):
+    report = MemoryReport("SQUAD")
+    kept = type("Kept", (), {})()
+    report.track(kept, "presentation")
+
+    assert report.verify_released() == ["presentation"]
@@ -0,0 +1,167 @@
+from services import output_store as output_store_module
+from services.output_store import OutputStore, output_store
+from services.package_io import iter_segments, save_presentation
+from services.proposal_engine import ProposalGenerator
+from services.proposal_specs import PROPOSAL_SPECS, parse_payload
+from tests.conftest import SUSTENTACAO, make_png, post_proposal
+import hashlib
+import io
+import json
+import os
+import pytest
+import zipfile
+
+
+def _writer(data: bytes):
+    def write(path):
+        with open(path, "wb") as f:
+            f.write(data)
+    return write
+
+
+@pytest.fixture
+def store(tmp_path):
+    return OutputStore(str(tmp_path), 10 * 1024 * 1024, 3600, scan_seconds=3600)
+
+
+def test_evicts_least_recently_used(store):
+    store.max_bytes = 250
+    first = store.write(_writer(b"1" * 100), "1.bin")
+    second = store.write(_writer(b"2" * 100), "2.bin")
+    store.get(first.id)
+    store.write(_writer(b"3" * 100), "3.bin")
+
+    assert store.get(first.id) is not None
+    assert store.get(second.id) is None
+
+
+def test_eviction_uses_the_index_between_scans(store, tmp_path, monkeypatch):
+    store.write(_writer(b"1"), "1.bin")
+
+    def no_scan():
+        raise AssertionError("diretório relido antes de scan_seconds")
+
+    monkeypatch.setattr(store, "_scan", no_scan)
+    for i in range(5):
+        store.write(_writer(b"x"), f"{i}.bin")
+
+
+def test_rescan_sees_files_from_other_workers(store, tmp_path):
+    other = OutputStore(str(tmp_path), store.max_bytes, store.ttl_seconds)
+    store.write(_writer(b"1" * 100), "1.bin")
+    foreign = other.write(_writer(b"2" * 100), "2.bin")
+
+    store.max_bytes = 150
+    store.evict()
+    assert store.get(foreign.id) is not None
+
+    store.scan_seconds = 0
+    os.utime(foreign.path, (1, 1))
+    store.evict()
+    assert store.get(foreign.id) is None
+
+
+def test_expired_files_are_removed(store, monkeypatch):
+    stored = store.write(_writer(b"x"), "a.bin")
+    monkeypatch.setattr(output_store_module.time, "time", lambda: stored.created + store.ttl_seconds + 1)
+
+    store.evict()
+
+    assert not os.path.exists(stored.path)
+
+
+@pytest.fixture
+def generated(workdir, tmp_path):
+    # .pptx gerado a partir do template compartilhado, com uma cópia para comparar
+    generator = ProposalGenerator(PROPOSAL_SPECS["SUSTENTACAO"])
+    prs = generator.render(parse_payload(json.dumps(SUSTENTACAO)), {"logo": make_png("teal")})
+    path = tmp_path / "original.pptx"
+    save_presentation(prs, str(path))
+    return generator.template, path.read_bytes()
+
+
+def _entries(path) -> list:
+    with zipfile.ZipFile(path) as package:
+        return [(info.filename, info.CRC, package.read(info)) for info in package.infolist()]
+
+
+def test_pptx_is_stored_as_delta(tmp_path, generated):
+    template, original = generated
+    store = OutputStore(str(tmp_path / "out"), 10 * 1024 * 1024, 3600, delta=True)
+
+    stored = store.write(_writer(original), "a.pptx", template=template)
+    again = store.write(_writer(original), "b.pptx", template=template)
+
+    # a base é uma só por template; a proposta guarda só o que mudou
+    assert stored.base == again.base
+    assert os.listdir(tmp_path / "out" / ".bases") == [os.path.basename(stored.base)]
+    assert stored.path.endswith(".delta")
+    assert os.path.getsize(stored.path) < len(original) / 2
+
+    # servido em streaming: os mesmos bytes do arquivo remontado
+    segments, size = store.segments(stored)
+    streamed = b"".join(iter_segments(segments))
+    assert len(streamed) == size
+
+    with store.materialized(stored) as path:
+        assert _entries(path) == _entries(io.BytesIO(original))
+        assert streamed == open(path, "rb").read()
+
+
+def test_delta_disabled_stores_the_whole_file(tmp_path, generated):
+    template, original = generated
+    store = OutputStore(str(tmp_path / "out"), 10 * 1024 * 1024, 3600, delta=False)
+
+    stored = store.write(_writer(original), "a.pptx", template=template)
+
+    assert stored.base is None
+    assert open(stored.path, "rb").read() == original
+
+
+def test_download_rebuilds_the_delta(client):
+    response = post_proposal(client, SUSTENTACAO, make_png("teal"))
+    stored = output_store.get(response.json()["id"])
+    assert stored.base is not None
+    assert response.json()["file"] is None
+
+    download = client.get(response.json()["url"]).content
+    with output_store.materialized(stored) as path:
+        assert download == open(path, "rb").read()
+
+
+def test_state_and_blobs_round_trip(store):
+    logo = b"\x89PNG" + b"L" * 1000
+    stored = store.write(_writer(b"x" * 100), "a.pptx", state={"created": {1: ["rId9"]}}, blobs={"logo": logo})
+
+    state, blobs = store.load_state(stored.id)
+    # JSON: as chaves numéricas voltam como texto
+    assert state == {"created": {"1": ["rId9"]}}
+    assert blobs == {"logo": logo}
+
+
+def test_same_logo_is_stored_once(store, tmp_path):
+    logo = b"L" * 1000
+    a = store.write(_writer(b"a"), "a.pptx", state={}, blobs={"logo": logo})
+    b = store.write(_writer(b"b"), "b.pptx", state={}, blobs={"logo": logo})
+
+    assert len(os.listdir(tmp_path / ".blobs")) == 1
+    assert store.load_state(a.id)[1] == store.load_state(b.id)[1]
+
+
+def test_state_is_not_unpickled(store):
+    stored = store.write(_writer(b"x"), "a.pptx", state={})
+
+    with open(store._state_path(stored.id), "wb") as f:
+        f.write(b"\x80\x04K\x01.")
+
+    assert store.load_state(stored.id) is None
+
+
+def test_unused_blobs_are_removed_after_grace(store, tmp_path, monkeypatch):
+    monkeypatch.setattr(output_store_module, "BASE_GRACE_SECONDS", -1)
+    store.max_bytes = 1500
+    store.write(_writer(b"a" * 100), "a.bin", state={}, blobs={"logo": b"L" * 1000})
+    store.write(_writer(b"b" * 100), "b.bin", state={}, blobs={"logo": b"M" * 1000})
+
+    # o primeiro logo saiu com a proposta que o usava
+    assert os.listdir(tmp_path / ".blobs") == [f"{hashlib.sha256(b'M' * 1000).hexdigest()}.bin"]
@@ -0,0 +1,118 @@
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pptx import Presentation
+from services import package_io
+from services.package_io import deflate_parts, open_presentation_from_parts, read_package_parts, save_presentation
+import zipfile
+
+
+class _Template:
+    # o mínimo de SharedTemplate que o save_presentation usa
+
+    def __init__(self, parts):
+        self.parts = parts
+        self.deflated = deflate_parts(parts)
+
+    def static_entry(self, name):
+        return self.parts[name], self.deflated[name]
+
+
+def _template_parts():
+    prs = Presentation()
+    slide = prs.slides.add_slide(prs.slide_layouts[1])
+    slide.shapes.title.text = "Proposta"
+    buffer = BytesIO()
+    prs.save(buffer)
+    return read_package_parts(BytesIO(buffer.getvalue()))
+
+
+def _entries(data: bytes):
+    with zipfile.ZipFile(BytesIO(data)) as z:
+        return [(info.filename, info.CRC, info.compress_size, z.read(info)) for info in z.infolist()]
+
+
+def _save(prs, template=None):
+    buffer = BytesIO()
+    save_presentation(prs, buffer, template)
+    return buffer.getvalue()
+
+
+def test_static_parts_come_from_the_template(monkeypatch):
+    parts = _template_parts()
+    template = _Template(parts)
+    prs = open_presentation_from_parts(parts)
+    prs.slides[0].shapes.title.text = "Proposta para ACME"
+
+    expected = _save(prs)
+
+    compressed = []
+    deflate = package_io._deflate
+
+    def counting_deflate(blob, static=None):
+        result = deflate(blob, static)
+        if static is None or result is not static[1]:
+            compressed.append(result)
+        return result
+
+    monkeypatch.setattr(package_io, "_deflate", counting_deflate)
+    saved = _save(prs, template)
+
+    # só o slide alterado (e o que é sempre regerado) passa pelo deflate
+    assert _entries(saved) == _entries(expected)
+    assert 0 < len(compressed) < len(parts) // 2
+
+
+def test_untouched_parts_are_not_parsed():
+    parts = _template_parts()
+    prs = open_presentation_from_parts(parts)
+    package = prs.part.package
+
+    lazy = {part.partname.membername: part for part in package.iter_parts() if hasattr(part, "_raw")}
+    assert all(lazy[name]._parsed is None for name in ("ppt/slides/slide1.xml", "ppt/slideMasters/slideMaster1.xml"))
+
+    # só o slide lido é parseado; as outras partes voltam com os bytes lidos
+    prs.slides[0].shapes.title.text = "Proposta para ACME"
+    assert lazy["ppt/slides/slide1.xml"]._parsed is not None
+    assert lazy["ppt/slideMasters/slideMaster1.xml"]._parsed is None
+
+    written = package_io.write_package_parts(package)
+    untouched = [name for name, part in lazy.items() if part._parsed is None]
+    assert "ppt/slideMasters/slideMaster1.xml" in untouched
+    assert all(written[name] is parts[name] for name in untouched)
+    assert b"Proposta para ACME" in written["ppt/slides/slide1.xml"]
+
+
+def test_lazy_open_saves_like_python_pptx():
+    parts = _template_parts()
+    buffer = BytesIO()
+    package_io.write_package_zip(parts, buffer)
+
+    prs = Presentation(BytesIO(buffer.getvalue()))
+    prs.slides[0].shapes.title.text = "Proposta para ACME"
+    expected = BytesIO()
+    prs.save(expected)
+
+    lazy = open_presentation_from_parts(parts)
+    lazy.slides[0].shapes.title.text = "Proposta para ACME"
+
+    assert _entries(_save(lazy)) == _entries(expected.getvalue())
+
+
+def test_parallel_save_matches_sequential(monkeypatch):
+    parts = _template_parts()
+    template = _Template(parts)
+
+    def edited():
+        prs = open_presentation_from_parts(parts)
+        prs.slides[0].shapes.title.text = "Proposta para ACME"
+        return prs
+
+    sequential = _save(edited())
+    from_template = _save(edited(), template)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        monkeypatch.setattr(package_io, "_save_executor", executor)
+
+        # as partes saem na ordem do pacote, qualquer que seja a ordem em que comprimem
+        assert _entries(_save(edited())) == _entries(sequential)
+        assert _entries(_save(edited(), template)) == _entries(from_template) == _entries(sequential)
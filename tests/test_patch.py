@@ -0,0 +1,82 @@
+from services import logo_fetcher
+from services.proposal_specs import _merge
+from tests.conftest import AI_AGENT, CONSTRUCAO, SCOPE_DETAILS, SQUAD, SUSTENTACAO, make_png, post_proposal
+import io
+import pytest
+import zipfile
+
+LOGO = make_png("maroon")
+
+
+def _parts(blob: bytes) -> dict[str, bytes]:
+    package = zipfile.ZipFile(io.BytesIO(blob))
+    return {name: package.read(name) for name in package.namelist()}
+
+
+def _generate(client, data: dict, logo: bytes = LOGO) -> dict:
+    response = post_proposal(client, data, logo)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+@pytest.mark.parametrize(
+    "base, patches",
+    [
+        (SQUAD, [{"cliente": {"nome": "Nova Empresa"}}, {"cliente": {"briefing": {"ux": "8"}}}, {"cliente": {"briefing": {"po": "0"}}}]),
+        (SUSTENTACAO, [{"cliente": {"briefing": {"adequatePlan": "diamond"}}}, {"cliente": {"briefing": {"adequatePlan": "starter"}}}]),
+        (
+            CONSTRUCAO,
+            [
+                {"cliente": {"briefing": {"timeLine": {"qaHomologation": 1}}}},
+                {"cliente": {"briefing": {"adequatePlan": "gold"}}},
+                {"cliente": {"briefing": {"briefingDetails": SCOPE_DETAILS[:3]}}},
+                {"cliente": {"briefing": {"briefingDetails": SCOPE_DETAILS * 2, "mainGoal": "Outro"}}},
+                {"cliente": {"nome": "Outra"}},
+            ],
+        ),
+        (AI_AGENT, [{"cliente": {"briefing": {"timeLine": {"development": 1}}}}]),
+    ],
+    ids=lambda value: value["tipoProposta"] if isinstance(value, dict) else "",
+)
+def test_patch_equals_a_fresh_generation(client, base, patches):
+    proposal = _generate(client, base)
+    data = base
+
+    for patch in patches:
+        data = _merge(data, patch)
+
+        response = client.patch(proposal["url"], json=patch)
+        assert response.status_code == 200
+        # cada atualização é uma proposta nova; a anterior continua disponível
+        assert response.json()["id"] != proposal["id"]
+        proposal = response.json()
+
+        fresh = _generate(client, data)
+        assert _parts(client.get(proposal["url"]).content) == _parts(client.get(fresh["url"]).content), patch
+
+
+def test_patch_swaps_the_logo_from_logo_url(client, origin, monkeypatch):
+    monkeypatch.setattr(logo_fetcher, "LOGO_URL_ALLOW_PRIVATE", True)
+    monkeypatch.setattr(logo_fetcher.logo_fetcher, "fresh_seconds", 0)
+    logo = make_png("lime")
+    origin.routes["/novo.png"] = (200, {"Content-Type": "image/png"}, logo)
+
+    proposal = _generate(client, SUSTENTACAO)
+    response = client.patch(proposal["url"], json={"logoUrl": origin.url("/novo.png")})
+    assert response.status_code == 200
+    assert [path for path, _ in origin.requests] == ["/novo.png"]
+
+    patched = _parts(client.get(response.json()["url"]).content)
+    assert patched == _parts(client.get(_generate(client, SUSTENTACAO, logo)["url"]).content)
+
+    # o logo baixado fica no estado: um PATCH seguinte não volta ao upload original
+    response = client.patch(response.json()["url"], json={"cliente": {"briefing": {"adequatePlan": "silver"}}})
+    expected = _generate(client, _merge(SUSTENTACAO, {"cliente": {"briefing": {"adequatePlan": "silver"}}}), logo)
+    assert _parts(client.get(response.json()["url"]).content) == _parts(client.get(expected["url"]).content)
+
+
+def test_patch_refuses_variants_and_unknown_ids(client):
+    proposal = _generate(client, {**SUSTENTACAO, "variants": [{"label": "a"}, {"label": "b"}]})
+
+    assert client.patch(proposal["url"], json={}).status_code == 409
+    assert client.patch("/proposal/files/" + "0" * 32, json={}).status_code == 404
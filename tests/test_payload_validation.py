@@ -0,0 +1,88 @@
+from routes import proposal_router
+from services.proposal_specs import parse_payload
+from tests.conftest import CONSTRUCAO, SQUAD, SUSTENTACAO, make_png, post_proposal
+import pytest
+
+LOGO = make_png("navy")
+
+
+@pytest.fixture
+def no_generation(monkeypatch):
+    # payload inválido não pode chegar a construir o gerador
+    def fail(*args, **kwargs):
+        raise AssertionError("gerador construído com payload inválido")
+
+    monkeypatch.setattr(proposal_router, "ProposalGenerator", fail)
+
+
+def _locs(response) -> list:
+    return [tuple(error["loc"]) for error in response.json()["detail"]]
+
+
+def test_parse_payload_normalizes_the_payload():
+    data = parse_payload(
+        b'{"tipoProposta": "SUSTENTACAO", "cliente": {"briefing": {"adequatePlan": "GOLD"}}}'
+    )
+
+    assert data["cliente"]["briefing"]["adequatePlan"] == "gold"
+    assert data["cliente"]["nome"] is None
+
+    timeline = parse_payload(
+        b'{"tipoProposta": "CONSTRUCAO", "cliente": {"briefing": {"timeLine": {"development": ""}}}}'
+    )["cliente"]["briefing"]["timeLine"]
+    assert timeline["development"] == 0
+
+
+@pytest.mark.parametrize(
+    "data, error",
+    [
+        (
+            {**SUSTENTACAO, "cliente": {"briefing": {"adequatePlan": "platinum"}}},
+            ("enum", ("SUSTENTACAO", "cliente", "briefing", "adequatePlan")),
+        ),
+        (
+            {**CONSTRUCAO, "cliente": {"nome": "ACME", "briefing": {"mainGoal": "x"}}},
+            ("missing", ("CONSTRUCAO", "cliente", "briefing", "timeLine")),
+        ),
+        (
+            {**CONSTRUCAO, "cliente": {"briefing": {"timeLine": {"development": -1}}}},
+            ("greater_than_equal", ("CONSTRUCAO", "cliente", "briefing", "timeLine", "development")),
+        ),
+        ({"tipoProposta": "SQUAD"}, ("missing", ("SQUAD", "cliente"))),
+        ({**SQUAD, "tipoProposta": "OUTRO"}, ("union_tag_invalid", ())),
+        ({"cliente": {}}, ("union_tag_not_found", ())),
+    ],
+)
+def test_invalid_payload_is_422(client, no_generation, data, error):
+    response = post_proposal(client, data, LOGO)
+
+    assert response.status_code == 422
+    assert error in [(e["type"], tuple(e["loc"])) for e in response.json()["detail"]]
+
+
+def test_malformed_json_is_422(client, no_generation):
+    response = client.post("/proposal/generate", files=[("payload", (None, "{nao e json"))])
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["type"] == "json_invalid"
+
+
+def test_missing_payload_is_422(client, no_generation):
+    response = client.post("/proposal/generate", files=[("logo", ("logo.png", LOGO, "image/png"))])
+
+    assert response.status_code == 422
+    assert _locs(response) == [("body", "payload")]
+
+
+def test_invalid_patch_is_422(client):
+    proposal = post_proposal(client, SUSTENTACAO, LOGO).json()
+    before = client.get(proposal["url"]).content
+
+    response = client.patch(proposal["url"], json={"cliente": {"briefing": {"adequatePlan": "platinum"}}})
+    assert response.status_code == 422
+    assert ("SUSTENTACAO", "cliente", "briefing", "adequatePlan") in _locs(response)
+
+    # a proposta salva não muda com o PATCH recusado
+    assert client.patch(proposal["url"], json={"variants": [{}]}).status_code == 422
+    assert client.patch(proposal["url"], content=b"[1").status_code == 422
+    assert client.get(proposal["url"]).content == before
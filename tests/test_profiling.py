@@ -0,0 +1,79 @@
+from services import profiling
+from tests.conftest import SUSTENTACAO, make_png, post_proposal
+import json
+import os
+import pytest
+
+LOGO = make_png("olive")
+
+
+@pytest.fixture
+def profiles(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILING_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _run(tipo="SQUAD"):
+    result = {}
+    with profiling._profile(tipo, 10, result):
+        sum(range(10000))
+    return result
+
+
+def test_keeps_only_the_most_recent(profiles, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILING_KEEP", 2)
+    names = [_run()["profile"] for _ in range(4)]
+
+    assert sorted(os.listdir(profiles)) == sorted(names[-2:])
+
+
+def test_keep_zero_keeps_none(profiles, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILING_KEEP", 2)
+    _run()
+    monkeypatch.setattr(profiling, "PROFILING_KEEP", 0)
+
+    assert _run() == {}
+    assert os.listdir(profiles) == []
+
+
+def test_prune_tolerates_files_removed_by_another_worker(profiles, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILING_KEEP", 1)
+    _run()
+    remove = os.remove
+
+    def racing_remove(path):
+        remove(path)
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(profiling.os, "remove", racing_remove)
+
+    assert "profile" in _run()
+
+
+def test_save_failure_does_not_fail_the_request(tmp_path, monkeypatch):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    monkeypatch.setattr(profiling, "PROFILING_DIR", str(blocker / "profiles"))
+
+    assert _run() == {}
+
+
+def test_profiles_a_request_on_demand(client, profiles, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(profiling, "PROFILING_KEEP", 5)
+
+    assert "profile" not in post_proposal(client, SUSTENTACAO, LOGO).json()
+
+    response = client.post(
+        "/proposal/generate",
+        files=[("payload", (None, json.dumps(SUSTENTACAO))), ("logo", ("logo.png", LOGO, "image/png"))],
+        headers={"X-Profile": "1"},
+    )
+    name = response.json()["profile"]
+
+    assert [profile["name"] for profile in client.get("/proposal/diagnostics/profiles").json()] == [name]
+    assert client.get(f"/proposal/diagnostics/profiles/{name}").status_code == 200
+
+
+def test_diagnostics_are_hidden_when_disabled(client):
+    assert client.get("/proposal/diagnostics/profiles").status_code == 404
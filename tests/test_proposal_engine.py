@@ -0,0 +1,68 @@
+from pptx import Presentation
+from services.output_store import output_store
+from services.proposal_engine import ProposalGenerator
+from services.proposal_specs import PROPOSAL_SPECS
+from services.template_loader import build_index
+from tests.conftest import CONSTRUCAO, PAYLOADS, SCOPE_DETAILS, SQUAD, SUSTENTACAO, make_png
+import pytest
+
+LOGO = make_png("orange", (300, 150))
+
+
+def _generate(data: dict, logo: bytes = LOGO):
+    stored = ProposalGenerator(PROPOSAL_SPECS[data["tipoProposta"]]).generate(data, logo)
+
+    with output_store.materialized(stored) as path:
+        return Presentation(path)
+
+
+def _texts(slide) -> dict[str, str]:
+    return {shape.name: shape.text_frame.text for shape in slide.shapes if shape.has_text_frame}
+
+
+@pytest.mark.parametrize("tipo", list(PROPOSAL_SPECS))
+def test_spec_matches_its_template(tipo):
+    spec = PROPOSAL_SPECS[tipo]
+
+    assert spec.validate(build_index(Presentation(spec.template_path))) == []
+
+
+@pytest.mark.parametrize("data", PAYLOADS, ids=lambda data: data["tipoProposta"])
+def test_replaces_the_client_logo(data):
+    cover = _generate(data).slides[0]
+    pictures = [shape for shape in cover.shapes if shape.shape_type == 13]
+
+    assert [picture.image.blob for picture in pictures] == [LOGO]
+
+
+def test_squad_allocates_one_slide_per_role():
+    prs = _generate(SQUAD)
+    texts = [_texts(slide) for slide in prs.slides]
+
+    assert texts[0]["TITLE"] == "Proposta para ACME"
+    # papéis com 0 horas saem da proposta
+    assert [(next(iter(t)), t["HRS_TEXT"]) for t in texts[1:-1]] == [
+        ("COMPOSICAO_PO", "Dedicacao 20H semanais para ACME"),
+        ("COMPOSICAO_DEV", "Dedicacao 40H semanais para ACME"),
+        ("COMPOSICAO_CURADOR", "Dedicacao 10H semanais para ACME"),
+    ]
+    assert texts[-1] == {"END": "Obrigado ACME"}
+
+
+def test_sustentacao_keeps_only_the_chosen_plan():
+    prs = _generate(SUSTENTACAO)
+
+    assert [list(_texts(slide)) for slide in list(prs.slides)[1:]] == [["GOLD_PLAN"]]
+
+
+def test_construcao_paginates_scope_and_draws_timeline():
+    prs = _generate(CONSTRUCAO)
+    scope = [_texts(slide) for slide in prs.slides if "SCOPE_DETAILS" in _texts(slide)]
+    names = [shape.name for slide in prs.slides for shape in slide.shapes]
+
+    assert len(scope) > 1
+    assert all(page["SCOPE_MAIN_GOAL"].endswith("Automatizar atendimento") for page in scope)
+    assert "\n".join(page["SCOPE_DETAILS"] for page in scope).count("Item de escopo") == len(SCOPE_DETAILS)
+
+    assert {"BAR_flowDrawing", "BAR_development", "BAR_clientHomologation"} <= set(names)
+    assert "SILVER_PLAN" in names and "GOLD_PLAN" not in names
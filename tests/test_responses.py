@@ -0,0 +1,75 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from routes.responses import RangeFileResponse
+import pytest
+
+DATA = bytes(range(256)) * 40
+
+
+@pytest.fixture
+def client(tmp_path):
+    path = tmp_path / "proposta.pptx"
+    path.write_bytes(DATA)
+    app = FastAPI()
+
+    @app.api_route("/file", methods=["GET", "HEAD"])
+    def download():
+        return RangeFileResponse(str(path), "proposta.pptx")
+
+    return TestClient(app)
+
+
+def test_full_file(client):
+    response = client.get("/file")
+
+    assert response.status_code == 200
+    assert response.content == DATA
+    assert response.headers["accept-ranges"] == "bytes"
+
+
+@pytest.mark.parametrize("header, start, end", [
+    ("bytes=10-19", 10, 19),
+    ("bytes=10-", 10, len(DATA) - 1),
+    ("bytes=-100", len(DATA) - 100, len(DATA) - 1),
+    ("bytes=100-999999", 100, len(DATA) - 1),
+])
+def test_range(client, header, start, end):
+    response = client.get("/file", headers={"Range": header})
+
+    assert response.status_code == 206
+    assert response.content == DATA[start:end + 1]
+    assert response.headers["content-range"] == f"bytes {start}-{end}/{len(DATA)}"
+
+
+@pytest.mark.parametrize("header", ["bytes=5-2", "bytes=0-1,5-6", "items=0-1", "bytes=-"])
+def test_invalid_range_is_ignored(client, header):
+    response = client.get("/file", headers={"Range": header})
+
+    assert response.status_code == 200
+    assert response.content == DATA
+
+
+@pytest.mark.parametrize("header", [f"bytes={len(DATA)}-", f"bytes={len(DATA) + 5}-{len(DATA) + 9}", "bytes=-0"])
+def test_unsatisfiable_range(client, header):
+    response = client.get("/file", headers={"Range": header})
+
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(DATA)}"
+
+
+def test_if_range_with_stale_etag_sends_everything(client):
+    etag = client.get("/file").headers["etag"]
+
+    assert client.get("/file", headers={"Range": "bytes=0-9", "If-Range": etag}).status_code == 206
+
+    response = client.get("/file", headers={"Range": "bytes=0-9", "If-Range": '"outro"'})
+    assert response.status_code == 200
+    assert response.content == DATA
+
+
+def test_head(client):
+    response = client.head("/file", headers={"Range": "bytes=0-9"})
+
+    assert response.status_code == 206
+    assert response.headers["content-length"] == "10"
+    assert response.content == b""
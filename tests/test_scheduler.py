@@ -0,0 +1,109 @@
+from routes import proposal_router
+from services.scheduler import LaneConfig, ProposalScheduler, QueueFull
+from tests.conftest import SUSTENTACAO, make_png, post_proposal
+import asyncio
+import pytest
+import threading
+
+
+def _scheduler(max_running: int, **lanes) -> ProposalScheduler:
+    return ProposalScheduler(max_running, lanes, LaneConfig(workers=1, priority=1, queue=1))
+
+
+async def _settle():
+    # deixa as tarefas criadas chegarem até a fila do scheduler
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+def test_higher_priority_runs_first():
+    scheduler = _scheduler(
+        1,
+        URGENTE=LaneConfig(workers=1, priority=0, queue=4),
+        LENTO=LaneConfig(workers=1, priority=2, queue=4),
+    )
+    release = threading.Event()
+    order = []
+
+    async def main():
+        blocker = asyncio.create_task(scheduler.run("LENTO", release.wait))
+        await _settle()
+
+        # chegou depois, mas a prioridade passa na frente quando a vaga abre
+        tasks = [
+            asyncio.create_task(scheduler.run("LENTO", order.append, "lento")),
+            asyncio.create_task(scheduler.run("URGENTE", order.append, "urgente")),
+        ]
+        await _settle()
+        assert order == []
+
+        release.set()
+        await asyncio.gather(blocker, *tasks)
+
+    asyncio.run(main())
+    scheduler.shutdown()
+
+    assert order == ["urgente", "lento"]
+
+
+def test_lane_cap_does_not_block_other_lanes():
+    scheduler = _scheduler(
+        4,
+        A=LaneConfig(workers=1, priority=0, queue=4),
+        B=LaneConfig(workers=1, priority=1, queue=4),
+    )
+    release = threading.Event()
+    started = []
+
+    def job(name):
+        started.append(name)
+        release.wait()
+
+    async def main():
+        tasks = [asyncio.create_task(scheduler.run(lane, job, f"{lane}{i}")) for lane, i in (("A", 1), ("A", 2), ("B", 1))]
+
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if len(started) == 2:
+                break
+
+        # A2 espera o teto de A; B1 usa uma das vagas globais livres
+        assert sorted(started) == ["A1", "B1"]
+
+        release.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    scheduler.shutdown()
+
+    assert sorted(started) == ["A1", "A2", "B1"]
+
+
+def test_full_queue_is_rejected():
+    scheduler = _scheduler(1, A=LaneConfig(workers=1, priority=0, queue=1))
+    release = threading.Event()
+
+    async def main():
+        running = asyncio.create_task(scheduler.run("A", release.wait))
+        await _settle()
+        waiting = asyncio.create_task(scheduler.run("A", lambda: None))
+        await _settle()
+
+        with pytest.raises(QueueFull):
+            await scheduler.run("A", lambda: None)
+
+        release.set()
+        await asyncio.gather(running, waiting)
+
+    asyncio.run(main())
+    scheduler.shutdown()
+
+
+def test_full_queue_answers_503(client, monkeypatch):
+    full = _scheduler(1, SUSTENTACAO=LaneConfig(workers=1, priority=0, queue=0))
+    monkeypatch.setattr(proposal_router, "scheduler", full)
+
+    response = post_proposal(client, SUSTENTACAO, make_png("gray"))
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
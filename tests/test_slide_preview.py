@@ -0,0 +1,72 @@
+from PIL import Image
+from pptx import Presentation
+from pptx.util import Inches
+from services.proposal_specs import _merge
+from services.slide_preview import SlidePreviewRenderer
+from tests.conftest import SUSTENTACAO, make_png, post_proposal
+import io
+import os
+import pytest
+import settings
+
+
+def _save(path, width=Inches(10), height=Inches(7.5)):
+    prs = Presentation()
+    prs.slide_width, prs.slide_height = width, height
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    slide.shapes.add_textbox(Inches(1), Inches(1), Inches(4), Inches(1)).text_frame.text = "Proposta"
+    prs.save(path)
+    return path
+
+
+@pytest.fixture
+def renderer(tmp_path):
+    return SlidePreviewRenderer(str(tmp_path / "previews"), 10 * 1024 * 1024, 160, 2)
+
+
+def test_reuses_cached_slides(tmp_path, renderer):
+    first = renderer.render(_save(tmp_path / "a.pptx"))
+    # regravar troca o arquivo (rename): o mesmo inode prova que não foi desenhado de novo
+    inode = os.stat(renderer.path(first[0])).st_ino
+
+    assert renderer.render(_save(tmp_path / "b.pptx")) == first
+    assert os.stat(renderer.path(first[0])).st_ino == inode
+
+
+def test_slide_size_is_part_of_the_key(tmp_path, renderer):
+    # o tamanho do slide fica no presentation.xml, fora das partes do slide
+    standard = renderer.render(_save(tmp_path / "a.pptx"))
+    wide = renderer.render(_save(tmp_path / "b.pptx", width=Inches(13.333)))
+
+    assert standard != wide
+    assert os.path.exists(renderer.path(standard[0]))
+    assert os.path.exists(renderer.path(wide[0]))
+
+
+def test_preview_route(client):
+    logo = make_png("fuchsia")
+    gold = post_proposal(client, SUSTENTACAO, logo).json()
+    response = client.get(f"{gold['url']}/preview")
+
+    assert response.status_code == 200
+    slides = response.json()["slides"]
+    assert [slide["index"] for slide in slides] == list(range(1, len(slides) + 1))
+
+    thumbnail = client.get(slides[0]["url"])
+    assert thumbnail.headers["content-type"] == "image/png"
+    assert "immutable" in thumbnail.headers["cache-control"]
+    assert Image.open(io.BytesIO(thumbnail.content)).width == settings.PREVIEW_WIDTH
+
+    # outro plano: os slides que não mudam reaproveitam a mesma imagem
+    silver = post_proposal(client, _merge(SUSTENTACAO, {"cliente": {"briefing": {"adequatePlan": "silver"}}}), logo).json()
+    other = client.get(f"{silver['url']}/preview").json()["slides"]
+    assert slides[0]["url"] == other[0]["url"]
+    assert [slide["url"] for slide in slides] != [slide["url"] for slide in other]
+
+
+def test_preview_route_errors(client):
+    archive = post_proposal(client, {**SUSTENTACAO, "variants": [{"label": "a"}]}, make_png("fuchsia")).json()
+
+    assert client.get(f"{archive['url']}/preview").status_code == 409
+    assert client.get("/proposal/files/" + "0" * 32 + "/preview").status_code == 404
+    assert client.get("/proposal/previews/" + "0" * 64 + ".png").status_code == 404
@@ -0,0 +1,69 @@
+from pptx import Presentation
+from services import template_loader
+from services.proposal_specs import PROPOSAL_SPECS
+from services.template_compiler import TemplateValidationError, compile_template, main, write_artifact
+from services.template_loader import artifact_path_for, load_artifact
+import dataclasses
+import os
+import pytest
+
+
+@pytest.fixture
+def compiled_dir(tmp_path, monkeypatch):
+    # artefatos só deste teste: os outros continuam lendo o .pptx
+    monkeypatch.setattr(template_loader, "COMPILED_DIR", str(tmp_path / "compiled"))
+    return tmp_path / "compiled"
+
+
+def _without_shape(source: str, target: str, shape_name: str) -> str:
+    prs = Presentation(source)
+    for slide in prs.slides:
+        for shape in list(slide.shapes):
+            if shape.name == shape_name:
+                shape._element.getparent().remove(shape._element)
+    prs.save(target)
+    return target
+
+
+def test_compiles_every_spec(compiled_dir):
+    assert main([]) == 0
+
+    for spec in PROPOSAL_SPECS.values():
+        artifact = load_artifact(spec.template_path)
+        assert artifact["tipoProposta"] == spec.tipo
+        assert spec.validate(artifact["index"]) == []
+        # cada parte também já comprimida, pronta para o save copiar
+        assert artifact["deflated"].keys() == artifact["parts"].keys()
+
+
+def test_reports_missing_shapes(tmp_path):
+    spec = PROPOSAL_SPECS["CONSTRUCAO"]
+    broken = dataclasses.replace(
+        spec,
+        template_path=_without_shape(spec.template_path, str(tmp_path / "construcao.pptx"), "GRAPH_SHAPE"),
+    )
+
+    with pytest.raises(TemplateValidationError) as error:
+        compile_template(broken)
+
+    assert error.value.problems == ["shape 'GRAPH_SHAPE' não encontrado"]
+
+
+def test_rejects_unknown_tipo(compiled_dir, capsys):
+    assert main(["NAO_EXISTE"]) == 1
+    assert "Tipo de proposta inválido" in capsys.readouterr().err
+
+
+def test_stale_artifact_is_ignored(compiled_dir, tmp_path):
+    template_path = str(tmp_path / "squad.pptx")
+    with open(PROPOSAL_SPECS["SQUAD"].template_path, "rb") as source, open(template_path, "wb") as target:
+        target.write(source.read())
+
+    spec = dataclasses.replace(PROPOSAL_SPECS["SQUAD"], template_path=template_path)
+    write_artifact(compile_template(spec), artifact_path_for(template_path))
+    assert load_artifact(template_path) is not None
+
+    # template alterado depois da compilação: volta a ler o .pptx
+    stat = os.stat(template_path)
+    os.utime(template_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert load_artifact(template_path) is None
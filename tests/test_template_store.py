@@ -0,0 +1,90 @@
+from services import template_store
+from services.proposal_specs import PROPOSAL_SPECS
+from services.template_store import STORE_MAGIC, checkout, store_path_for
+import json
+import os
+import pytest
+import shutil
+import struct
+
+
+@pytest.fixture
+def store_dir(tmp_path, monkeypatch):
+    directory = tmp_path / "store"
+    monkeypatch.setattr(template_store, "TEMPLATE_STORE_DIR", str(directory))
+    monkeypatch.setattr(template_store, "_stores", {})
+    return directory
+
+
+@pytest.fixture
+def template_path(tmp_path):
+    path = str(tmp_path / "squad.pptx")
+    shutil.copyfile(PROPOSAL_SPECS["SQUAD"].template_path, path)
+    return path
+
+
+def _header(path: str) -> dict:
+    with open(path, "rb") as f:
+        data = f.read()
+    assert data.startswith(STORE_MAGIC)
+    (length,) = struct.unpack_from("<Q", data, len(STORE_MAGIC))
+    start = len(STORE_MAGIC) + 8
+    return json.loads(data[start:start + length])
+
+
+def test_publishes_a_private_store_with_json_header(store_dir, template_path):
+    template = checkout(template_path)
+    path = store_path_for(template_path)
+
+    assert os.stat(store_dir).st_mode & 0o777 == 0o700
+    assert os.stat(path).st_mode & 0o077 == 0
+    assert _header(path)["parts"].keys() == template.parts.keys()
+    assert checkout(template_path) is template
+
+
+def test_other_workers_attach_the_published_store(store_dir, template_path, monkeypatch):
+    first = checkout(template_path)
+    monkeypatch.setattr(template_store, "_stores", {})
+    monkeypatch.setattr(template_store, "_build_store", lambda *args: pytest.fail("store refeito"))
+
+    second = checkout(template_path)
+
+    assert second is not first
+    assert second.fingerprint == first.fingerprint
+    assert bytes(second.parts["ppt/presentation.xml"]) == bytes(first.parts["ppt/presentation.xml"])
+
+
+def test_rebuilds_when_the_template_changes(store_dir, template_path, monkeypatch):
+    monkeypatch.setattr(template_store, "TEMPLATE_STORE_CHECK_INTERVAL", 0)
+    first = checkout(template_path)
+
+    stat = os.stat(template_path)
+    os.utime(template_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert checkout(template_path).fingerprint != first.fingerprint
+
+
+def test_rebuilds_a_store_in_an_unknown_format(store_dir, template_path):
+    os.makedirs(store_dir, mode=0o700)
+    with open(store_path_for(template_path), "wb") as f:
+        f.write(b"PPTXSTORE1" + b"\0" * 64)
+
+    assert checkout(template_path).parts
+
+
+def test_refuses_a_writable_store_directory(store_dir, template_path):
+    os.makedirs(store_dir)
+    os.chmod(store_dir, 0o777)
+
+    with pytest.raises(PermissionError):
+        checkout(template_path)
+
+
+def test_refuses_a_store_owned_by_another_user(store_dir, template_path, monkeypatch):
+    checkout(template_path)
+    monkeypatch.setattr(template_store, "_stores", {})
+    uid = os.getuid()
+    monkeypatch.setattr(template_store.os, "getuid", lambda: uid + 1)
+
+    with pytest.raises(PermissionError):
+        checkout(template_path)
@@ -0,0 +1,106 @@
+from routes import proposal_router
+from services.image_upload import ImageAccumulator, ImageTooLarge, UnsupportedImage
+from tests.conftest import SUSTENTACAO, make_png, post_proposal
+import io
+import json
+import pytest
+import settings
+import zipfile
+
+LOGO = make_png("olive")
+
+
+@pytest.fixture
+def no_generation(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("gerador construído com upload inválido")
+
+    monkeypatch.setattr(proposal_router, "ProposalGenerator", fail)
+
+
+def test_accumulator_sniffs_format_and_dimensions_in_chunks():
+    image = make_png("olive", (300, 120))
+    accumulator = ImageAccumulator()
+
+    for i in range(0, len(image), 7):
+        accumulator.feed(image[i:i + 7])
+
+    assert accumulator.format == "PNG"
+    assert accumulator.dimensions == (300, 120)
+    assert accumulator.finish() == image
+
+
+def test_accumulator_hands_a_single_chunk_over_without_copying():
+    accumulator = ImageAccumulator()
+    accumulator.feed(LOGO)
+
+    assert accumulator.finish() is LOGO
+
+
+def test_accumulator_rejects_early():
+    # o formato sai dos primeiros bytes, antes do resto do corpo
+    with pytest.raises(UnsupportedImage):
+        ImageAccumulator().feed(b"<svg xmlns='http://www.w3.org/2000/svg'>")
+
+    with pytest.raises(ImageTooLarge):
+        ImageAccumulator(max_bytes=100).feed(LOGO + bytes(100))
+
+    with pytest.raises(ImageTooLarge):
+        ImageAccumulator(max_dimension=1000).feed(make_png("olive", (1001, 1)))
+
+    truncated = ImageAccumulator()
+    truncated.feed(LOGO[:12])
+    with pytest.raises(UnsupportedImage):
+        truncated.finish()
+
+
+def test_non_multipart_is_415(client, no_generation):
+    response = client.post("/proposal/generate", json=SUSTENTACAO)
+
+    assert response.status_code == 415
+
+
+def test_unsupported_logo_is_415(client, no_generation):
+    response = post_proposal(client, SUSTENTACAO, b"%PDF-1.7 nao e imagem")
+
+    assert response.status_code == 415
+
+
+def test_oversized_logo_is_413(client, no_generation):
+    response = post_proposal(client, SUSTENTACAO, LOGO + bytes(settings.LOGO_MAX_BYTES))
+    assert response.status_code == 413
+
+    response = post_proposal(client, SUSTENTACAO, make_png("olive", (settings.LOGO_MAX_DIMENSION + 1, 1)))
+    assert response.status_code == 413
+
+
+def test_oversized_payload_is_413(client, no_generation, monkeypatch):
+    monkeypatch.setattr(settings, "PAYLOAD_MAX_BYTES", len(json.dumps(SUSTENTACAO)) - 1)
+    assert post_proposal(client, SUSTENTACAO, LOGO).status_code == 413
+
+    # Content-Length acima do máximo possível: recusado sem ler o corpo
+    monkeypatch.setattr(settings, "LOGO_MAX_BYTES", 0)
+    response = client.post(
+        "/proposal/generate",
+        content=bytes(64 * 1024),
+        headers={"content-type": "multipart/form-data; boundary=x"},
+    )
+    assert response.status_code == 413
+
+
+def test_logo_and_logo_url_are_exclusive(client, no_generation):
+    response = post_proposal(client, SUSTENTACAO, None)
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "logo"]
+
+    response = post_proposal(client, {**SUSTENTACAO, "logoUrl": "https://example.com/logo.png"}, LOGO)
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["type"] == "extra_forbidden"
+
+
+def test_streamed_logo_is_embedded(client):
+    response = post_proposal(client, SUSTENTACAO, LOGO)
+
+    assert response.status_code == 200
+    package = zipfile.ZipFile(io.BytesIO(client.get(response.json()["url"]).content))
+    assert LOGO in [package.read(name) for name in package.namelist() if name.startswith("ppt/media/")]
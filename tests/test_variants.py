@@ -0,0 +1,81 @@
+from services.proposal_specs import _merge, parse_payload
+from tests.conftest import AI_AGENT, CONSTRUCAO, SQUAD, SUSTENTACAO, make_png, post_proposal
+import io
+import json
+import pytest
+import settings
+import zipfile
+
+LOGO = make_png("purple")
+
+
+def _parts(blob: bytes) -> dict[str, bytes]:
+    package = zipfile.ZipFile(io.BytesIO(blob))
+    return {name: package.read(name) for name in package.namelist()}
+
+
+def _download(client, data: dict) -> bytes:
+    response = post_proposal(client, data, LOGO)
+    assert response.status_code == 200, response.text
+    return client.get(response.json()["url"]).content
+
+
+def _labels(variants: list[dict]) -> list[str]:
+    data = parse_payload(json.dumps({**SUSTENTACAO, "variants": variants}))
+    return [variant["label"] for variant in data["variants"]]
+
+
+def test_labels_stay_unique():
+    assert _labels([{"label": "a"}, {"label": "a_3"}, {"label": "a"}]) == ["a", "a_3", "a_4"]
+    assert _labels([{"label": "variante_2"}, {}]) == ["variante_2", "variante_2_2"]
+    assert _labels([{}, {}, {"label": "variante_1"}]) == ["variante_1", "variante_2", "variante_1_3"]
+
+
+def test_variants_are_validated_merged(client):
+    variants = [
+        {"overrides": {"cliente": {"briefing": {"adequatePlan": "gold"}}}},
+        {"overrides": {"cliente": {"briefing": {"adequatePlan": "bronze"}}}},
+    ]
+    response = post_proposal(client, {**SUSTENTACAO, "variants": variants}, LOGO)
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["variants", 1, "overrides", "SUSTENTACAO", "cliente", "briefing", "adequatePlan"]
+
+    # o logo é um só para todas as variantes
+    response = post_proposal(client, {**SUSTENTACAO, "variants": [{"overrides": {"logoUrl": "https://example.com/a.png"}}]}, LOGO)
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["variants", 0, "overrides", "logoUrl"]
+
+
+def test_variants_limit(client):
+    variants = [{}] * (settings.VARIANTS_MAX + 1)
+    response = post_proposal(client, {**SUSTENTACAO, "variants": variants}, LOGO)
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["type"] == "too_long"
+
+
+@pytest.mark.parametrize(
+    "base, variants",
+    [
+        (SUSTENTACAO, [{"label": plan, "overrides": {"cliente": {"briefing": {"adequatePlan": plan}}}} for plan in ("starter", "silver", "gold", "diamond")]),
+        (SQUAD, [{"overrides": {"cliente": {"briefing": {"po": "10"}}}}, {"overrides": {"cliente": {"briefing": {"ux": "5", "dev": "0"}}}}]),
+        (CONSTRUCAO, [{"label": "a"}, {"label": "b", "overrides": {"cliente": {"briefing": {"mainGoal": "Outro", "timeLine": {"development": 2}}}}}]),
+        (AI_AGENT, [{}, {"overrides": {"cliente": {"nome": "Outra"}}}]),
+    ],
+    ids=lambda value: value["tipoProposta"] if isinstance(value, dict) else "",
+)
+def test_each_variant_equals_its_own_generation(client, base, variants):
+    response = post_proposal(client, {**base, "variants": variants}, LOGO)
+    assert response.status_code == 200
+
+    download = client.get(response.json()["url"])
+    assert download.headers["content-type"] == "application/zip"
+
+    archive = zipfile.ZipFile(io.BytesIO(download.content))
+    names = archive.namelist()
+    assert names == [f"{label}.pptx" for label in _labels(variants)]
+
+    for name, variant in zip(names, variants):
+        single = _download(client, _merge(base, variant.get("overrides", {})))
+        assert _parts(archive.read(name)) == _parts(single), name